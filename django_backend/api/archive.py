@@ -0,0 +1,186 @@
+"""
+Archival of removed rows.
+
+Deleting an entity through the API only flags it ``removed``. ``archive()``
+("manage.py archive_removed") moves the rows removed longer than their
+model's retention (ARCHIVE_RETENTION_DAYS) out of the entity tables and
+into ArchivedRecord, one record per row with the rows deleted along with
+it: the items of invoices, quotes and recurring invoices, the payments and
+reminders of invoices, and so on, following the CASCADE foreign keys.
+Foreign keys with SET_NULL that point at an archived row are cleared.
+
+Every batch of ARCHIVE_BATCH_SIZE rows is one transaction of set-based
+statements: one SELECT per table involved, one INSERT of the records, one
+UPDATE per cleared foreign key and one DELETE per table. As the records
+are written in the same transaction as the deletes, every row is archived
+exactly once.
+
+Clients, products and payment modes are only archived once no document
+refers to them any more; their documents are archived first, with their
+own retention. Rows that live rows (``removed`` false) would be deleted
+with are kept, such as an invoice with a payment that is not removed.
+
+A row's ``updated`` is taken as the time it was removed, as removed rows
+cannot be edited any more.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .counts import invalidate_counts
+from .models import (
+    ArchivedRecord, Customer, Invoice, InvoiceItem, Payment, PaymentMode, Product, Quote, QuoteItem,
+    RecurringInvoice, RecurringInvoiceItem,
+)
+from .reports import invalidate_aging
+
+# Documents first, so the clients, products and payment modes they refer
+# to can go in the same run
+ARCHIVED_MODELS = (Payment, Invoice, Quote, RecurringInvoice, Customer, Product, PaymentMode)
+# Rows of these models are kept while rows of the listed models refer to them
+KEPT_WHILE_REFERENCED = {
+    Customer: (Quote, Invoice, Payment, RecurringInvoice),
+    Product: (InvoiceItem, QuoteItem, RecurringInvoiceItem),
+    PaymentMode: (Payment,),
+}
+
+
+def retention_days():
+    """
+    ARCHIVE_RETENTION_DAYS as ``{model name: days}``: a plain number applies
+    to every model, ``<model>=<days>`` to one, e.g. "365,invoice=730"; 0
+    keeps the rows.
+    """
+    default = 0
+    days = {}
+    for part in settings.ARCHIVE_RETENTION_DAYS.split(','):
+        name, _, value = part.strip().rpartition('=')
+        if not value:
+            continue
+        if name:
+            days[name.lower()] = int(value)
+        else:
+            default = int(value)
+    return {model._meta.model_name: days.get(model._meta.model_name, default) for model in ARCHIVED_MODELS}
+
+def _reverse_relations(model):
+    # related_objects leaves out relations declared with related_name='+'
+    return [
+        field for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created and not field.concrete and (field.one_to_many or field.one_to_one)
+    ]
+
+def archivable(model, cutoff):
+    """The rows of ``model`` removed before ``cutoff`` that can be archived."""
+    queryset = model.all_objects.filter(removed=True, updated__lt=cutoff)
+    for related in KEPT_WHILE_REFERENCED.get(model, ()):
+        for field in related._meta.fields:
+            if field.is_relation and field.related_model is model:
+                queryset = queryset.filter(~Exists(related._base_manager.filter(**{field.name: OuterRef('pk')})))
+    for relation in _reverse_relations(model):
+        related = relation.related_model
+        if relation.on_delete is models.CASCADE and hasattr(related, 'all_objects'):
+            # A live row would be deleted along, e.g. a payment of an invoice
+            # removed before deletes cascaded, or restored since
+            queryset = queryset.filter(~Exists(related.all_objects.filter(
+                **{relation.field.name: OuterRef('pk')}, removed=False)))
+    return queryset
+
+def _collect(model, roots, records, deletes, cleared):
+    """
+    Add the rows that reference ``roots`` (``{pk: pk of the archived row}``)
+    of ``model`` with CASCADE to the children of their archived row,
+    recursively, and clear the SET_NULL references to them. ``deletes``
+    gets the children's ``(model, filter)`` pairs, deepest first.
+    """
+    now = timezone.now()
+    for relation in _reverse_relations(model):
+        related = relation.related_model
+        field = relation.field
+        condition = {f'{field.name}__in': list(roots)}
+
+        if relation.on_delete is models.CASCADE:
+            # Removed rows too, the default managers leave them out
+            rows = list(related._base_manager.filter(**condition).values())
+            if not rows:
+                continue
+            pk_name = related._meta.pk.attname
+            children = {}
+            for row in rows:
+                root = roots[row[field.attname]]
+                records[root]['children'][related._meta.label_lower].append(row)
+                children[row[pk_name]] = root
+            _collect(related, children, records, deletes, cleared)
+            deletes.append((related, condition))
+        elif relation.on_delete is models.SET_NULL:
+            values = {field.name: None}
+            if any(f.name == 'updated' for f in related._meta.fields):
+                # Let incremental sync pick the change up
+                values['updated'] = now
+            if related._base_manager.filter(**condition).update(**values):
+                cleared.add(related)
+
+def archive_batch(model, cutoff, batch_size):
+    """Archive up to ``batch_size`` rows of ``model`` removed before ``cutoff``; returns how many."""
+    with transaction.atomic():
+        # Concurrent runs take different rows
+        rows = list(archivable(model, cutoff).select_for_update(skip_locked=True)
+                    .order_by('updated', 'id').values()[:batch_size])
+        if not rows:
+            return 0
+
+        records = {
+            row['id']: {'fields': row, 'children': defaultdict(list)}
+            for row in rows
+        }
+        deletes = []
+        cleared = set()
+        _collect(model, {row['id']: row['id'] for row in rows}, records, deletes, cleared)
+
+        ArchivedRecord.objects.bulk_create([
+            ArchivedRecord(
+                model=model._meta.label_lower,
+                object_id=row['id'],
+                data=records[row['id']],
+                removed=row['updated'],
+            )
+            for row in rows
+        ])
+
+        touched = {model} | cleared
+        for related, condition in deletes:
+            # Children and their references were handled above; delete
+            # without the collector loading every row again
+            queryset = related._base_manager.filter(**condition)
+            queryset._raw_delete(queryset.db)
+            touched.add(related)
+        queryset = model.all_objects.filter(id__in=list(records))
+        queryset._raw_delete(queryset.db)
+
+        # Raw deletes send no signals
+        transaction.on_commit(invalidate_aging)
+        for touched_model in touched:
+            transaction.on_commit(lambda touched_model=touched_model: invalidate_counts(touched_model))
+
+    return len(rows)
+
+def archive(now=None):
+    """Archive every model's rows past their retention; returns ``{model name: rows archived}``."""
+    now = now or timezone.now()
+    archived = {}
+    retention = retention_days()
+    for model in ARCHIVED_MODELS:
+        days = retention[model._meta.model_name]
+        if not days:
+            continue
+        cutoff = now - datetime.timedelta(days=days)
+        count = 0
+        while batch := archive_batch(model, cutoff, settings.ARCHIVE_BATCH_SIZE):
+            count += batch
+        archived[model._meta.model_name] = count
+    return archived
@@ -1,8 +1,7 @@
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.utils import timezone
 from datetime import timedelta
@@ -10,9 +9,12 @@ import uuid
 
 from .models import Admin, AdminPassword
 from .serializers import AdminSerializer
+from .sessions import open_session, end_session, end_all_sessions
+from .throttling import LoginIPThrottle, LoginEmailThrottle
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginEmailThrottle])
 def login(request):
     email = request.data.get('email')
     password = request.data.get('password')
@@ -24,7 +26,7 @@ def login(request):
             'message': 'Email and password are required',
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    user = authenticate(email=email, password=password)
+    user = authenticate(request, email=email, password=password)
     
     if not user:
         return Response({
@@ -47,25 +49,18 @@ def login(request):
             'message': 'Your account has been removed',
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    # Generate token
-    refresh = RefreshToken.for_user(user)
+    # Generate tokens and store their session in the session store
+    refresh = open_session(user)
     access_token = str(refresh.access_token)
     
-    # Store token in logged sessions
-    admin_password, created = AdminPassword.objects.get_or_create(user=user)
-    if not created and not admin_password.logged_sessions:
-        admin_password.logged_sessions = []
-    
-    admin_password.logged_sessions.append(access_token)
-    admin_password.save()
-    
-    # Return user data and token
+    # Return user data and tokens
     serializer = AdminSerializer(user)
     
     return Response({
         'success': True,
         'result': {
             'token': access_token,
+            'refreshToken': str(refresh),
             'admin': serializer.data
         },
         'message': 'Login successful',
@@ -81,26 +76,25 @@ def logout(request):
             'message': 'No authentication token provided',
         }, status=status.HTTP_401_UNAUTHORIZED)
     
-    token = auth_header.split(' ')[1]
-    user = request.user
+    end_session(request.auth)
     
-    try:
-        admin_password = AdminPassword.objects.get(user=user)
-        if token in admin_password.logged_sessions:
-            admin_password.logged_sessions.remove(token)
-            admin_password.save()
-        
-        return Response({
-            'success': True,
-            'result': None,
-            'message': 'Logout successful',
-        }, status=status.HTTP_200_OK)
-    except AdminPassword.DoesNotExist:
-        return Response({
-            'success': False,
-            'result': None,
-            'message': 'User password record not found',
-        }, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        'success': True,
+        'result': None,
+        'message': 'Logout successful',
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+def logout_all(request):
+    revoked = end_all_sessions(request.user)
+    
+    return Response({
+        'success': True,
+        'result': {
+            'revoked': revoked
+        },
+        'message': 'All sessions have been logged out',
+    }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -115,7 +109,7 @@ def forget_password(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = Admin.objects.get(email=email, removed=False)
+        user = Admin.objects.get(email=email)
         
         # Generate reset token
         reset_token = str(uuid.uuid4())
@@ -160,7 +154,7 @@ def reset_password(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        user = Admin.objects.get(email=email, removed=False)
+        user = Admin.objects.get(email=email)
         admin_password = AdminPassword.objects.get(user=user)
         
         # Verify token
@@ -183,6 +177,9 @@ def reset_password(request):
         user.set_password(password)
         user.save()
         
+        # Log out every existing session
+        end_all_sessions(user)
+        
         # Clear reset token
         admin_password.password_reset_token = None
         admin_password.password_reset_expires = None
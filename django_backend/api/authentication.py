@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Admin
+from .sessions import is_session_active
+
+USER_CACHE_PREFIX = 'auth_user'
+# Enough for authentication and permission checks; the password hash in
+# particular never goes into the cache
+USER_CACHE_FIELDS = ('id', 'email', 'name', 'surname', 'is_staff', 'is_superuser', 'is_active', 'enabled', 'removed')
+
+
+def _user_cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}:{user_id}'
+
+def _cached_attnames():
+    # Model.from_db() takes the values in model field order
+    return [field.attname for field in Admin._meta.concrete_fields if field.attname in USER_CACHE_FIELDS]
+
+def get_cached_user(user_id):
+    """
+    Return the ``Admin`` with primary key ``user_id``, or None if there is none.
+    Only ``USER_CACHE_FIELDS`` are loaded; other fields load on first access,
+    and saving the instance only writes the loaded ones.
+
+    Found users are cached for ``AUTH_USER_CACHE_TIMEOUT`` seconds; the entry
+    is dropped whenever the admin is saved or deleted (see ``api.signals``).
+    That only reaches other workers through a shared cache, so the timeout
+    defaults to 0 (off) unless ``REDIS_URL`` is set.
+    """
+    timeout = settings.AUTH_USER_CACHE_TIMEOUT
+    if timeout:
+        values = cache.get(_user_cache_key(user_id))
+        if values is not None:
+            return Admin.from_db(router.db_for_read(Admin), _cached_attnames(), values)
+
+    try:
+        # Removed admins too, get_user() rejects them with their own message
+        user = Admin.all_objects.only(*USER_CACHE_FIELDS).get(pk=user_id)
+    except (Admin.DoesNotExist, ValidationError):
+        return None
+
+    if timeout:
+        values = tuple(getattr(user, attname) for attname in _cached_attnames())
+        cache.set(_user_cache_key(user_id), values, timeout)
+
+    return user
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_cache_key(user_id))
+
+
+class SessionJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that also rejects tokens whose session was revoked
+    (logout, revoke-all) or pruned from the session store, and resolves the
+    user through a short-lived cache instead of a query per request when a
+    shared cache (REDIS_URL) is configured.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+
+        if not is_session_active(validated_token):
+            raise InvalidToken(_('Token has been revoked'))
+
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = get_cached_user(user_id)
+
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if not user.is_active or not user.enabled:
+            raise AuthenticationFailed(_('Your account is disabled'), code='user_inactive')
+
+        if user.removed:
+            raise AuthenticationFailed(_('Your account has been removed'), code='user_removed')
+
+        return user
+
+
+class SessionTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refuses to refresh a token whose session was revoked (logout, revoke-all,
+    password reset). The new access token keeps the refresh token's ``sid``
+    claim, so it is accepted for as long as the session lives.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        if not is_session_active(refresh):
+            raise InvalidToken(_('Token has been revoked'))
+
+        try:
+            return super().validate(attrs)
+        except Admin.DoesNotExist:
+            # The default manager hides removed admins
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
@@ -1,19 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
 from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core.exceptions import PermissionDenied
+from .authentication import get_cached_user
 from .models import Admin
 import bcrypt
 
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+# bcrypt and Django's hashers release the GIL, so hashing runs in a small pool:
+# logins still hash in parallel, but a burst of them cannot take every core.
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix='password-hash',
+)
+
+def _in_hash_pool(fn, *args):
+    return _hash_pool.submit(fn, *args).result()
+
+def _bcrypt_hash(password):
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+def _bcrypt_check(password, encoded):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), encoded.encode('utf-8'))
+    except ValueError:
+        # Malformed hash
+        return False
+
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    return _bcrypt_hash('dummy-password')
+
+def is_bcrypt_hash(encoded):
+    return bool(encoded) and encoded.startswith(BCRYPT_PREFIXES)
+
+def bcrypt_cost(encoded):
+    # "$2b$12$<salt and hash>"
+    try:
+        return int(encoded.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
 class BcryptBackend(BaseBackend):
+    """
+    Authenticates admins by email and password.
+
+    Passwords carried over from the Express backend are raw bcrypt hashes,
+    the others use Django's hash format; the stored hash decides which check
+    runs. For email logins this backend has the final say, so a failed login
+    does not fall through to ModelBackend for a second lookup and hash check.
+    Hashes below the configured cost are rehashed after a successful login.
+    """
+
     def authenticate(self, request, email=None, password=None, **kwargs):
-        try:
-            user = Admin.objects.get(email=email)
-            if bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
-                return user
-        except Admin.DoesNotExist:
+        if email is None or password is None:
+            # Not an email login (e.g. the admin site), leave it to ModelBackend
             return None
-        return None
 
-    def get_user(self, user_id):
         try:
-            return Admin.objects.get(pk=user_id)
+            # Removed admins too, the login view tells them they were removed
+            user = Admin.all_objects.get(email=email)
         except Admin.DoesNotExist:
-            return None
\ No newline at end of file
+            # Spend the same time as a wrong password so emails can't be probed
+            _in_hash_pool(_bcrypt_check, password, _dummy_hash())
+            raise PermissionDenied
+
+        encoded = user.password
+        if is_bcrypt_hash(encoded):
+            verified = _in_hash_pool(_bcrypt_check, password, encoded)
+            cost = bcrypt_cost(encoded)
+            must_update = verified and cost is not None and cost < settings.BCRYPT_ROUNDS
+            hasher = _bcrypt_hash
+        else:
+            verified = _in_hash_pool(check_password, password, encoded)
+            must_update = verified and identify_hasher(encoded).must_update(encoded)
+            hasher = make_password
+
+        if not verified:
+            raise PermissionDenied
+
+        if must_update:
+            user.password = _in_hash_pool(hasher, password)
+            user.save(update_fields=['password'])
+
+        return user
+
+    def get_user(self, user_id):
+        return get_cached_user(user_id)
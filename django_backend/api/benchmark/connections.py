@@ -0,0 +1,71 @@
+"""
+Per-request latency with and without connection reuse.
+
+Django's test client keeps database connections open across requests, so
+``ConnectionBenchmarkRunner`` closes old connections around every request
+the way the WSGI handler does. Each mode then changes how the ``default``
+connection is configured:
+
+- ``per_request``: ``CONN_MAX_AGE = 0``, a new connection per request
+- ``persistent``: connections are kept for ``CONN_MAX_AGE`` seconds
+- ``pool``: the psycopg pool of ``DB_POOL`` (only when it is configured)
+"""
+
+import copy
+
+from django.db import close_old_connections, connections, DEFAULT_DB_ALIAS
+
+from .runner import BenchmarkRunner
+
+PERSISTENT_MAX_AGE = 600
+
+
+class ConnectionBenchmarkRunner(BenchmarkRunner):
+    def _call(self, client, build, ctx):
+        close_old_connections()
+        try:
+            return super()._call(client, build, ctx)
+        finally:
+            close_old_connections()
+
+
+def available_modes():
+    modes = ['per_request', 'persistent']
+    if connections[DEFAULT_DB_ALIAS].settings_dict['OPTIONS'].get('pool'):
+        modes.append('pool')
+    return modes
+
+def _configure(settings_dict, original, mode):
+    settings_dict['OPTIONS'] = copy.copy(original['OPTIONS'])
+    if mode == 'pool':
+        settings_dict['CONN_MAX_AGE'] = 0
+        return
+
+    settings_dict['OPTIONS'].pop('pool', None)
+    if mode == 'per_request':
+        settings_dict['CONN_MAX_AGE'] = 0
+    else:
+        settings_dict['CONN_MAX_AGE'] = original['CONN_MAX_AGE'] or PERSISTENT_MAX_AGE
+
+def benchmark_connections(modes, scenarios, requests=200, warmup=10, seed=1, host=None):
+    unknown = set(modes) - set(available_modes())
+    if unknown:
+        raise ValueError(f'Unavailable modes: {", ".join(sorted(unknown))} (set DB_POOL=True for "pool")')
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    settings_dict = connection.settings_dict
+    original = {'CONN_MAX_AGE': settings_dict['CONN_MAX_AGE'], 'OPTIONS': settings_dict['OPTIONS']}
+
+    results = {}
+    try:
+        for mode in modes:
+            connection.close()
+            _configure(settings_dict, original, mode)
+            runner = ConnectionBenchmarkRunner(
+                scenarios, requests=requests, warmup=warmup, seed=seed, host=host)
+            results[mode] = runner.run()
+    finally:
+        connection.close()
+        settings_dict.update(original)
+
+    return results
@@ -0,0 +1,215 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+The same seed and scale always produce the same rows (ids included), so runs
+against different databases or commits work on identical data.
+"""
+
+import datetime
+import random
+import uuid
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import (
+    Admin, AdminPassword, Customer, PaymentMode, Product, Quote, QuoteItem,
+    Invoice, InvoiceItem, Payment
+)
+
+BENCHMARK_EMAIL = 'benchmark@example.com'
+BENCHMARK_PASSWORD = 'benchmark123'
+BATCH_SIZE = 1000
+
+# Every generated date falls in the two years before this day
+ANCHOR_DATE = datetime.date(2025, 1, 1)
+TAX_RATES = (Decimal('0'), Decimal('10'), Decimal('20'))
+COUNTRIES = ('United Kingdom', 'France', 'Germany', 'Spain', 'Italy', 'United States')
+WORDS = (
+    'alpha', 'bravo', 'cobalt', 'delta', 'ember', 'falcon', 'granite', 'harbor',
+    'indigo', 'juniper', 'keystone', 'lumen', 'meridian', 'nimbus', 'onyx', 'pioneer',
+)
+
+
+class DataGenerator:
+    """
+    Generates a benchmark data set for the current tenant schema:
+    customers, products, quotes and invoices with ``items_per_document`` items
+    each, and payments for a ``paid_ratio`` share of the invoices.
+    """
+
+    def __init__(self, seed=42, customers=1000, products=200, quotes=500, invoices=2000,
+                 items_per_document=5, paid_ratio=0.6):
+        self.rng = random.Random(seed)
+        self.customers = customers
+        self.products = products
+        self.quotes = quotes
+        self.invoices = invoices
+        self.items_per_document = items_per_document
+        self.paid_ratio = paid_ratio
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def date(self):
+        return ANCHOR_DATE - datetime.timedelta(days=self.rng.randrange(730))
+
+    def timestamp(self, date):
+        moment = datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(
+            seconds=self.rng.randrange(86400))
+        return timezone.make_aware(moment, datetime.timezone.utc)
+
+    def name(self, words=2):
+        return ' '.join(self.rng.choice(WORDS).capitalize() for _ in range(words))
+
+    @transaction.atomic
+    def generate(self):
+        admin = get_benchmark_admin()
+
+        payment_modes = [
+            PaymentMode(id=self.uuid(), name=name, created_by=admin)
+            for name in ('Cash', 'Bank Transfer', 'Credit Card')
+        ]
+        PaymentMode.objects.bulk_create(payment_modes)
+
+        customers = []
+        for i in range(self.customers):
+            name = f'{self.name()} {i}'
+            customers.append(Customer(
+                id=self.uuid(),
+                name=name,
+                email=f'customer{i}@example.com',
+                phone=f'+44 {self.rng.randrange(10**9, 10**10)}',
+                country=self.rng.choice(COUNTRIES),
+                address=f'{self.rng.randrange(1, 200)} {self.name(1)} Street',
+                created_by=admin,
+                created=self.timestamp(self.date()),
+            ))
+        Customer.objects.bulk_create(customers, batch_size=BATCH_SIZE)
+
+        products = []
+        for i in range(self.products):
+            products.append(Product(
+                id=self.uuid(),
+                name=f'{self.name()} {i}',
+                reference=f'REF-{i:06d}',
+                price=Decimal(self.rng.randrange(100, 100000)) / 100,
+                created_by=admin,
+                created=self.timestamp(self.date()),
+            ))
+        Product.objects.bulk_create(products, batch_size=BATCH_SIZE)
+
+        quotes, quote_items = self._documents(Quote, QuoteItem, 'quote', self.quotes, customers, products, admin)
+        Quote.objects.bulk_create(quotes, batch_size=BATCH_SIZE)
+        QuoteItem.objects.bulk_create(quote_items, batch_size=BATCH_SIZE)
+
+        invoices, invoice_items = self._documents(Invoice, InvoiceItem, 'invoice', self.invoices, customers, products, admin)
+        payments = self._payments(invoices, payment_modes, admin)
+        Invoice.objects.bulk_create(invoices, batch_size=BATCH_SIZE)
+        InvoiceItem.objects.bulk_create(invoice_items, batch_size=BATCH_SIZE)
+        Payment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+
+        return {
+            'payment_modes': len(payment_modes),
+            'customers': len(customers),
+            'products': len(products),
+            'quotes': len(quotes),
+            'quote_items': len(quote_items),
+            'invoices': len(invoices),
+            'invoice_items': len(invoice_items),
+            'payments': len(payments),
+        }
+
+    def _documents(self, model, item_model, parent_field, count, customers, products, admin):
+        documents = []
+        items = []
+        for i in range(count):
+            date = self.date()
+            document = model(
+                id=self.uuid(),
+                number=str(i + 1),
+                year=date.year,
+                date=date,
+                expiry_date=date + datetime.timedelta(days=30),
+                client=self.rng.choice(customers),
+                tax_rate=self.rng.choice(TAX_RATES),
+                status=self.rng.choice(('draft', 'pending', 'sent')),
+                pdf=f'{parent_field}-{i + 1}.pdf',
+                created_by=admin,
+                created=self.timestamp(date),
+            )
+
+            sub_total = Decimal('0')
+            for _ in range(self.items_per_document):
+                product = self.rng.choice(products)
+                quantity = Decimal(self.rng.randrange(1, 10))
+                total = product.price * quantity
+                sub_total += total
+                items.append(item_model(
+                    id=self.uuid(),
+                    product=product,
+                    name=product.name,
+                    quantity=quantity,
+                    price=product.price,
+                    total=total,
+                    **{parent_field: document},
+                ))
+
+            document.sub_total = sub_total
+            document.tax_total = (sub_total * document.tax_rate / 100).quantize(Decimal('0.01'))
+            document.total = document.sub_total + document.tax_total
+            documents.append(document)
+
+        return documents, items
+
+    def _payments(self, invoices, payment_modes, admin):
+        payments = []
+        for invoice in invoices:
+            if self.rng.random() >= self.paid_ratio:
+                continue
+
+            # Roughly a third of the paid invoices are only partly paid
+            if self.rng.random() < 0.33:
+                amount = (invoice.total * Decimal(self.rng.randrange(10, 90)) / 100).quantize(Decimal('0.01'))
+                invoice.status = 'partially'
+            else:
+                amount = invoice.total
+                invoice.status = 'paid'
+            invoice.credit = amount
+
+            date = min(invoice.date + datetime.timedelta(days=self.rng.randrange(45)), ANCHOR_DATE)
+            payments.append(Payment(
+                id=self.uuid(),
+                number=str(len(payments) + 1),
+                year=date.year,
+                date=date,
+                amount=amount,
+                payment_mode=self.rng.choice(payment_modes),
+                invoice=invoice,
+                client=invoice.client,
+                created_by=admin,
+                created=self.timestamp(date),
+            ))
+
+        return payments
+
+
+def get_benchmark_admin():
+    """Return the admin the benchmark runs as, creating it if needed."""
+    admin = Admin.objects.filter(email=BENCHMARK_EMAIL).first()
+    if admin is None:
+        admin = Admin.objects.create_user(
+            email=BENCHMARK_EMAIL,
+            password=BENCHMARK_PASSWORD,
+            name='Benchmark',
+            surname='User',
+        )
+        AdminPassword.objects.create(user=admin)
+    return admin
+
+def flush_data():
+    """Delete every customer, product, quote, invoice and payment of the schema."""
+    with transaction.atomic():
+        for model in (Payment, InvoiceItem, Invoice, QuoteItem, Quote, Product, Customer, PaymentMode):
+            model.objects.all().delete()
@@ -0,0 +1,80 @@
+"""
+Render time and response size of the JSON renderers.
+
+Serializes real list pages once, then renders the same data repeatedly with
+DRF's JSONRenderer and api.renderers.ORJSONRenderer, so the numbers cover
+only the JSON encoding step. Sizes are reported raw and compressed.
+"""
+
+import gzip
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Customer, Invoice
+from api.renderers import ORJSONRenderer, orjson
+from api.serializers import CustomerSerializer, InvoiceSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RENDERERS = {
+    'drf': JSONRenderer,
+    'orjson': ORJSONRenderer,
+}
+
+
+def _page(model, serializer_class, limit):
+    queryset = serializer_class.setup_eager_loading(model.objects.all())
+    data = serializer_class(queryset.order_by('-created')[:limit], many=True).data
+    return {
+        'success': True,
+        'result': data,
+        'pagination': {'page': 1, 'pages': 1, 'count': len(data)},
+        'message': f'{model.__name__} list retrieved successfully',
+    }
+
+def build_pages(limit):
+    return {
+        'invoice_list': _page(Invoice, InvoiceSerializer, limit),
+        'client_list': _page(Customer, CustomerSerializer, limit),
+    }
+
+def time_render(renderer, data, repeat):
+    """Best and mean render time in milliseconds over ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        renderer.render(data, 'application/json', {})
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 3), round(sum(timings) / repeat * 1000, 3)
+
+def benchmark_renderers(limit=100, repeat=50):
+    if orjson is None:
+        raise ValueError('orjson is not installed, ORJSONRenderer would fall back to DRF')
+
+    results = {}
+    for name, data in build_pages(limit).items():
+        if not data['result']:
+            raise ValueError('No benchmark data found, run "manage.py generate_data" first')
+
+        outputs = {}
+        for renderer_name, renderer_class in RENDERERS.items():
+            renderer = renderer_class()
+            content = renderer.render(data, 'application/json', {})
+            best_ms, mean_ms = time_render(renderer, data, repeat)
+            outputs[renderer_name] = content
+            results[f'{name}/{renderer_name}'] = {
+                'rows': len(data['result']),
+                'best_ms': best_ms,
+                'mean_ms': mean_ms,
+                'bytes': len(content),
+                'gzip_bytes': len(gzip.compress(content)),
+                'br_bytes': len(brotli.compress(content, quality=5)) if brotli else None,
+            }
+
+        results[f'{name}/orjson']['identical'] = outputs['orjson'] == outputs['drf']
+
+    return results
@@ -0,0 +1,259 @@
+"""
+Scripted API benchmark scenarios.
+
+Each scenario issues real requests through the full middleware and
+authentication stack with Django's test client, against whatever database
+the settings point at. Results carry throughput and latency percentiles and
+can be compared with a stored baseline to gate regressions.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import connection, connections
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Customer, PaymentMode, Product, Quote, Invoice, Payment
+from api.sessions import start_session
+from .data import get_benchmark_admin, WORDS
+
+PAGE_SIZE = 10
+
+
+class BenchmarkContext:
+    """Ids and counts the scenarios pick their targets from."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.customers = list(Customer.objects.values_list('id', flat=True))
+        self.products = list(Product.objects.values('id', 'name', 'price'))
+        self.payment_modes = list(PaymentMode.objects.values_list('id', flat=True))
+        self.quotes = list(Quote.objects.filter(converted=False).values_list('id', flat=True))
+        self.unpaid_invoices = list(
+            Invoice.objects.filter(credit=0).values('id', 'client_id', 'total')[:5000]
+        )
+        self.invoice_count = Invoice.objects.count()
+        self.counter = 0
+
+        if not (self.customers and self.products and self.quotes and self.unpaid_invoices):
+            raise ValueError('No benchmark data found, run "manage.py generate_data" first')
+
+    def page(self, total):
+        return self.rng.randint(1, max((total + PAGE_SIZE - 1) // PAGE_SIZE, 1))
+
+    def next_number(self):
+        self.counter += 1
+        return f'BENCH-{self.counter}'
+
+
+def _client_list(ctx):
+    return 'get', f'/api/client/list?page={ctx.page(len(ctx.customers))}&limit={PAGE_SIZE}', None
+
+def _invoice_list(ctx):
+    return 'get', f'/api/invoice/list?page={ctx.page(ctx.invoice_count)}&limit={PAGE_SIZE}', None
+
+def _client_search(ctx):
+    return 'get', f'/api/client/search?q={ctx.rng.choice(WORDS)}', None
+
+def _invoice_search(ctx):
+    return 'get', f'/api/invoice/search?q={ctx.rng.randint(1, ctx.invoice_count)}', None
+
+def _invoice_summary(ctx):
+    return 'get', f'/api/invoice/summary?year={ctx.rng.choice((2023, 2024))}', None
+
+def _payment_summary(ctx):
+    return 'get', f'/api/payment/summary?year={ctx.rng.choice((2023, 2024))}', None
+
+def _invoice_create(ctx):
+    items = []
+    sub_total = Decimal('0')
+    for product in ctx.rng.sample(ctx.products, min(5, len(ctx.products))):
+        total = product['price'] * 2
+        sub_total += total
+        items.append({
+            'product': str(product['id']),
+            'name': product['name'],
+            'quantity': '2',
+            'price': str(product['price']),
+            'total': str(total),
+        })
+
+    return 'post', '/api/invoice/create', {
+        'number': ctx.next_number(),
+        'year': 2025,
+        'date': '2025-01-01',
+        'expiry_date': '2025-01-31',
+        'client': str(ctx.rng.choice(ctx.customers)),
+        'sub_total': str(sub_total),
+        'total': str(sub_total),
+        'status': 'draft',
+        'items': items,
+    }
+
+def _quote_convert(ctx):
+    # A quote converts once; later picks of the same quote are refused with 409
+    quote = ctx.quotes.pop() if len(ctx.quotes) > 1 else ctx.quotes[0]
+    return 'post', f'/api/quote/convert/{quote}', None
+
+def _payment_create(ctx):
+    invoice = ctx.rng.choice(ctx.unpaid_invoices)
+    return 'post', '/api/payment/create', {
+        'number': ctx.next_number(),
+        'year': 2025,
+        'date': '2025-01-01',
+        'amount': '1.00',
+        'payment_mode': str(ctx.rng.choice(ctx.payment_modes)) if ctx.payment_modes else None,
+        'invoice': str(invoice['id']),
+        'client': str(invoice['client_id']),
+    }
+
+SCENARIOS = {
+    'client_list': _client_list,
+    'invoice_list': _invoice_list,
+    'client_search': _client_search,
+    'invoice_search': _invoice_search,
+    'invoice_summary': _invoice_summary,
+    'payment_summary': _payment_summary,
+    'invoice_create': _invoice_create,
+    'quote_convert': _quote_convert,
+    'payment_create': _payment_create,
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * len(sorted_values) + 0.5)) - 1, len(sorted_values) - 1)
+    return sorted_values[max(index, 0)]
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput': round(count / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+class BenchmarkRunner:
+    def __init__(self, scenarios, requests=200, warmup=10, concurrency=1, seed=1, host=None):
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise ValueError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+        self.scenarios = scenarios
+        self.requests = requests
+        self.warmup = warmup
+        self.concurrency = concurrency
+        self.seed = seed
+        self.host = host
+
+    def _client(self, token):
+        extra = {'HTTP_HOST': self.host} if self.host else {}
+        client = APIClient(**extra)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def _token(self):
+        admin = get_benchmark_admin()
+        token = AccessToken.for_user(admin)
+        start_session(admin, token)
+        return str(token)
+
+    def _call(self, client, build, ctx):
+        method, path, data = build(ctx)
+        send = getattr(client, method)
+        start = time.perf_counter()
+        if data is None:
+            response = send(path)
+        else:
+            response = send(path, data, format='json')
+        return time.perf_counter() - start, response.status_code
+
+    def _worker(self, token, build, ctx, count, in_thread=False):
+        client = self._client(token)
+        latencies = []
+        errors = 0
+        try:
+            for _ in range(count):
+                latency, status_code = self._call(client, build, ctx)
+                latencies.append(latency)
+                if status_code >= 400:
+                    errors += 1
+        finally:
+            if in_thread:
+                # Pool threads each opened their own connections
+                connections.close_all()
+        return latencies, errors
+
+    def run(self):
+        rng = random.Random(self.seed)
+        ctx = BenchmarkContext(rng)
+        token = self._token()
+
+        results = {}
+        for name in self.scenarios:
+            build = SCENARIOS[name]
+            self._worker(token, build, ctx, self.warmup)
+
+            shares = [self.requests // self.concurrency] * self.concurrency
+            for i in range(self.requests % self.concurrency):
+                shares[i] += 1
+
+            start = time.perf_counter()
+            if self.concurrency == 1:
+                outcomes = [self._worker(token, build, ctx, self.requests)]
+            else:
+                with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                    outcomes = list(pool.map(lambda share: self._worker(token, build, ctx, share, in_thread=True), shares))
+            elapsed = time.perf_counter() - start
+
+            latencies = [latency for outcome in outcomes for latency in outcome[0]]
+            errors = sum(outcome[1] for outcome in outcomes)
+            results[name] = summarize(latencies, errors, elapsed)
+
+        return {
+            'database': connection.vendor,
+            'schema': getattr(connection, 'schema_name', None),
+            'concurrency': self.concurrency,
+            'scale': {
+                'customers': len(ctx.customers),
+                'products': len(ctx.products),
+                'quotes': len(ctx.quotes),
+                'invoices': ctx.invoice_count,
+                'payments': Payment.objects.count(),
+            },
+            'scenarios': results,
+        }
+
+
+def find_regressions(results, baseline, max_regression):
+    """
+    Compare ``results`` with a ``baseline`` run. A scenario regresses when its
+    p95 latency grew, or its throughput dropped, by more than ``max_regression``
+    (a fraction).
+    """
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+        if previous['throughput'] and current['throughput'] < previous['throughput'] * (1 - max_regression):
+            regressions.append(
+                f"{name}: throughput {current['throughput']}/s vs baseline {previous['throughput']}/s")
+    return regressions
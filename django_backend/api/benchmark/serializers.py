@@ -0,0 +1,77 @@
+"""
+ModelSerializer versus the values() read path (api.read_serializers).
+
+Times building the ``result`` of a list page both ways, queries included,
+and checks that both render to the same JSON.
+"""
+
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Customer, Product, Quote, Invoice, Payment
+from api.read_serializers import get_values_serializer
+from api.serializers import (
+    CustomerSerializer, ProductSerializer, QuoteSerializer, InvoiceSerializer, PaymentSerializer
+)
+
+TARGETS = {
+    'customer': (Customer, CustomerSerializer),
+    'product': (Product, ProductSerializer),
+    'quote': (Quote, QuoteSerializer),
+    'invoice': (Invoice, InvoiceSerializer),
+    'payment': (Payment, PaymentSerializer),
+}
+
+
+def model_serializer_page(model, serializer_class, limit):
+    queryset = serializer_class.setup_eager_loading(model.objects.all())
+    return serializer_class(queryset.order_by('-created')[:limit], many=True).data
+
+def values_serializer_page(model, serializer_class, limit):
+    queryset = model.objects.all().order_by('-created')[:limit]
+    return get_values_serializer(serializer_class).serialize(queryset)
+
+VARIANTS = {
+    'model': model_serializer_page,
+    'values': values_serializer_page,
+}
+
+
+def time_build(build, repeat):
+    """Best and mean time in milliseconds over ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 3), round(sum(timings) / repeat * 1000, 3)
+
+def benchmark_serializers(targets=None, limit=100, repeat=20):
+    renderer = JSONRenderer()
+    results = {}
+    for name in targets or TARGETS:
+        model, serializer_class = TARGETS[name]
+        outputs = {}
+        for variant, page in VARIANTS.items():
+            def build():
+                return page(model, serializer_class, limit)
+
+            with CaptureQueriesContext(connection) as queries:
+                data = build()
+            if not data:
+                raise ValueError('No benchmark data found, run "manage.py generate_data" first')
+
+            outputs[variant] = renderer.render(data)
+            best_ms, mean_ms = time_build(build, repeat)
+            results[f'{name}/{variant}'] = {
+                'rows': len(data),
+                'queries': len(queries),
+                'best_ms': best_ms,
+                'mean_ms': mean_ms,
+            }
+
+        results[f'{name}/values']['identical'] = outputs['values'] == outputs['model']
+    return results
@@ -0,0 +1,82 @@
+"""
+Quote to invoice conversion.
+
+Quotes are converted in one transaction with set-based statements: the
+quotes are locked and read in one query, their invoices inserted with one
+``bulk_create``, all of their items read in one query and copied with
+another ``bulk_create``, and the quotes flagged ``converted`` with one
+UPDATE. Nothing is re-validated, the data comes from rows that were
+validated when the quotes were saved.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .counts import invalidate_counts
+from .models import Invoice, InvoiceItem, Quote, QuoteItem
+from .outbox import record_events
+from .reports import invalidate_aging
+from .serializers import InvoiceSerializer
+
+# Copied from the quote as they are
+COPIED_FIELDS = (
+    'number', 'year', 'date', 'expiry_date', 'client_id', 'sub_total', 'tax_rate', 'tax_total',
+    'discount', 'total', 'note',
+)
+COPIED_ITEM_FIELDS = ('product_id', 'name', 'description', 'quantity', 'price', 'total')
+
+
+def convert_quotes(quote_ids, user):
+    """
+    Create a draft invoice from every quote of ``quote_ids`` that exists and
+    was not converted yet. Returns ``(invoices, skipped)``: the serialized
+    invoices in the order of ``quote_ids`` and the ids that were skipped.
+    """
+    with transaction.atomic():
+        # Locked so concurrent conversions of the same quote wait, then skip it
+        quotes = {
+            quote['id']: quote
+            for quote in Quote.objects.select_for_update()
+            .filter(id__in=quote_ids, converted=False)
+            .values('id', *COPIED_FIELDS)
+        }
+        quote_ids = list(dict.fromkeys(quote_ids))
+        ordered = [quotes[id] for id in quote_ids if id in quotes]
+        skipped = [id for id in quote_ids if id not in quotes]
+        if not ordered:
+            return [], skipped
+
+        invoices = []
+        invoice_ids = {}
+        for quote in ordered:
+            invoice = Invoice(
+                **{field: quote[field] for field in COPIED_FIELDS},
+                quote_id=quote['id'],
+                credit=0,
+                status='draft',
+                created_by=user,
+            )
+            invoice.pdf = f"invoice-{invoice.id}.pdf"
+            invoices.append(invoice)
+            invoice_ids[quote['id']] = invoice.id
+        Invoice.objects.bulk_create(invoices)
+
+        items = [
+            InvoiceItem(invoice_id=invoice_ids[item.pop('quote_id')], **item)
+            for item in QuoteItem.objects.filter(quote_id__in=invoice_ids).values('quote_id', *COPIED_ITEM_FIELDS)
+        ]
+        InvoiceItem.objects.bulk_create(items)
+
+        Quote.objects.filter(id__in=invoice_ids).update(converted=True, updated=timezone.now())
+
+        queryset = InvoiceSerializer.setup_eager_loading(Invoice.objects.filter(id__in=invoice_ids.values()))
+        by_id = {invoice.id: invoice for invoice in queryset}
+        created = [by_id[invoice.id] for invoice in invoices]
+        data = InvoiceSerializer(created, many=True).data
+        record_events(created, 'created', data)
+
+        # bulk_create and update() send no signals
+        transaction.on_commit(invalidate_aging)
+        transaction.on_commit(lambda: invalidate_counts(Invoice))
+
+    return data, skipped
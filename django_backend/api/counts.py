@@ -0,0 +1,106 @@
+"""
+Row counts for pagination.
+
+An exact ``COUNT(*)`` of a big table costs more than fetching the page it
+paginates. With ``PAGINATION_COUNT = 'auto'``:
+
+- unfiltered lists use the PostgreSQL planner's row estimate (EXPLAIN) once
+  it exceeds PAGINATION_ESTIMATE_THRESHOLD rows; smaller tables, and other
+  databases, are counted exactly;
+- filtered lists count at most PAGINATION_COUNT_CAP + 1 rows, so a broad
+  filter stops early and reports the cap.
+
+Exact counts are cached per query for PAGINATION_COUNT_CACHE_TIMEOUT
+seconds. Every model keeps a generation number in the cache that writes
+bump (see ``api.signals``), which drops the cached counts of its lists.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+
+def _generation_key(model):
+    return f'count_generation:{model._meta.label_lower}'
+
+def _generation(model):
+    generation = cache.get(_generation_key(model))
+    if generation is None:
+        generation = 1
+        cache.add(_generation_key(model), generation, None)
+    return generation
+
+def invalidate_counts(model):
+    """Drop the cached counts of ``model``'s lists in the current tenant."""
+    try:
+        cache.incr(_generation_key(model))
+    except ValueError:
+        cache.add(_generation_key(model), 1, None)
+
+def _count_key(queryset):
+    # The SQL with its parameters identifies the filters
+    signature = hashlib.sha256(str(queryset.order_by().query).encode()).hexdigest()
+    return f'count:{queryset.model._meta.label_lower}:{_generation(queryset.model)}:{signature}'
+
+def estimated_count(queryset):
+    """The planner's row estimate for ``queryset``, or None where there is none."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    try:
+        plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    except (DatabaseError, ValueError):
+        return None
+    # Django flattens the one-element JSON array to its object
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan['Plan']['Plan Rows'])
+
+def exact_count(queryset):
+    """``queryset.count()``, cached until the next write to its model."""
+    timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    if not timeout:
+        return queryset.count()
+
+    key = _count_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+def capped_count(queryset, cap):
+    """
+    Count at most ``cap`` + 1 rows of ``queryset``; returns ``(count, exact)``
+    with ``count`` = ``cap`` when there are more. Counts under the cap are
+    cached like exact counts.
+    """
+    timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    key = _count_key(queryset) if timeout else None
+    if key:
+        count = cache.get(key)
+        if count is not None:
+            return count, True
+
+    # COUNT(*) over a subquery with LIMIT cap + 1
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, False
+    if key:
+        cache.set(key, count, timeout)
+    return count, True
+
+def pagination_count(queryset, filtered):
+    """Row count of a list for its pagination, as ``(count, exact)``."""
+    if settings.PAGINATION_COUNT == 'exact':
+        return exact_count(queryset), True
+
+    if filtered:
+        return capped_count(queryset, settings.PAGINATION_COUNT_CAP)
+
+    estimate = estimated_count(queryset)
+    if estimate is not None and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+        return estimate, False
+    return exact_count(queryset), True
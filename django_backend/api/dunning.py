@@ -0,0 +1,150 @@
+"""
+Overdue invoices and payment reminders.
+
+``run_dunning()`` ("manage.py run_dunning --loop") works in three steps:
+
+- overdue invoices that were paid in full in the meantime (by a payment
+  recorded some other way than ``payment/create``, which settles them
+  itself) are flagged ``paid``;
+- invoices still open (pending, sent or partially paid) with an unpaid
+  balance after their ``expiry_date`` are flagged ``overdue``, with one
+  UPDATE per DUNNING_BATCH_SIZE invoices found through the
+  ``(status, expiry_date)`` index;
+- overdue invoices with an unpaid balance get a reminder email once they
+  are as many days past due as a step of DUNNING_REMINDER_DAYS. Reminders
+  go through the outgoing mail queue (api.mailer), which sends them in
+  batches and within MAIL_RATE_LIMIT, and are recorded as InvoiceReminder,
+  unique per invoice and step, so no step is sent twice. When the job fell
+  behind, only the latest step reached is sent.
+
+Rows are locked with SKIP LOCKED, so workers can run side by side.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .counts import invalidate_counts
+from .mailer import company_name
+from .models import Invoice, InvoiceReminder, MailMessage
+from .outbox import record_events
+from .serializers import InvoiceSerializer
+
+OPEN_STATUSES = ('pending', 'sent', 'partially')
+REMINDER_FIELDS = (
+    'id', 'number', 'year', 'total', 'credit', 'expiry_date', 'client__name', 'client__email', 'reminded',
+)
+
+
+def unpaid_invoices():
+    return Invoice.objects.filter(total__gt=F('credit'))
+
+def mark_overdue(today, batch_size):
+    """Flag the open invoices that expired before ``today`` overdue; returns how many."""
+    marked = 0
+    while True:
+        with transaction.atomic():
+            ids = list(unpaid_invoices()
+                       .filter(status__in=OPEN_STATUSES, expiry_date__lt=today)
+                       .select_for_update(skip_locked=True)
+                       .values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return marked
+            Invoice.objects.filter(id__in=ids).update(status='overdue', updated=timezone.now())
+
+            invoices = list(InvoiceSerializer.setup_eager_loading(Invoice.objects.filter(id__in=ids)))
+            record_events(invoices, 'updated', InvoiceSerializer(invoices, many=True).data)
+            # update() sends no signals
+            transaction.on_commit(lambda: invalidate_counts(Invoice))
+        marked += len(ids)
+
+def clear_settled(batch_size):
+    """Flag the overdue invoices paid in full ``paid``; returns how many."""
+    cleared = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Invoice.objects.filter(status='overdue', credit__gte=F('total'))
+                       .select_for_update(skip_locked=True)
+                       .values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return cleared
+            Invoice.objects.filter(id__in=ids).update(status='paid', updated=timezone.now())
+
+            invoices = list(InvoiceSerializer.setup_eager_loading(Invoice.objects.filter(id__in=ids)))
+            record_events(invoices, 'updated', InvoiceSerializer(invoices, many=True).data)
+            # update() sends no signals
+            transaction.on_commit(lambda: invalidate_counts(Invoice))
+        cleared += len(ids)
+
+def reminder_level(days_overdue, steps):
+    return sum(1 for step in steps if days_overdue >= step)
+
+def reminder_message(invoice, level, days_overdue, company, steps):
+    final = 'Final reminder' if level == len(steps) else 'Reminder'
+    return MailMessage(
+        kind='reminder',
+        to=invoice['client__email'],
+        subject=f"{final}: invoice #{invoice['number']}/{invoice['year']} is overdue",
+        body=(
+            f"Dear {invoice['client__name']},\n\n"
+            f"Invoice #{invoice['number']}/{invoice['year']} was due on {invoice['expiry_date'].isoformat()} "
+            f"and is {days_overdue} days overdue. The outstanding amount is "
+            f"{invoice['total'] - invoice['credit']}.\n\n{company}\n"
+        ),
+        invoice_id=invoice['id'],
+    )
+
+def queue_reminders(today, batch_size):
+    """Queue the reminders due on ``today``; returns how many."""
+    steps = settings.DUNNING_REMINDER_DAYS
+    if not steps:
+        return 0
+
+    last_level = (InvoiceReminder.objects.filter(invoice=OuterRef('pk'))
+                  .order_by('-level').values('level')[:1])
+    candidates = (unpaid_invoices()
+                  .filter(status='overdue', expiry_date__lte=today - datetime.timedelta(days=steps[0]))
+                  .annotate(reminded=Coalesce(Subquery(last_level), Value(0)))
+                  .filter(reminded__lt=len(steps), client__email__gt='')
+                  .order_by('id'))
+    company = company_name()
+    queued = 0
+    after = None
+
+    while True:
+        with transaction.atomic():
+            batch = candidates if after is None else candidates.filter(id__gt=after)
+            # Lock only the invoices, not their clients
+            rows = list(batch.select_for_update(skip_locked=True, of=('self',)).values(*REMINDER_FIELDS)[:batch_size])
+            if not rows:
+                return queued
+            after = rows[-1]['id']
+
+            due = []
+            for row in rows:
+                days_overdue = (today - row['expiry_date']).days
+                level = reminder_level(days_overdue, steps)
+                if level > row['reminded']:
+                    due.append((row, level, days_overdue))
+
+            messages = MailMessage.objects.bulk_create([
+                reminder_message(row, level, days_overdue, company, steps) for row, level, days_overdue in due
+            ])
+            InvoiceReminder.objects.bulk_create([
+                InvoiceReminder(invoice_id=row['id'], level=level, days_overdue=days_overdue, message=message)
+                for (row, level, days_overdue), message in zip(due, messages)
+            ])
+        queued += len(due)
+
+def run_dunning(today=None):
+    """
+    Every step in the current tenant; returns ``(settled, marked overdue,
+    reminders queued)``.
+    """
+    today = today or timezone.localdate()
+    batch_size = settings.DUNNING_BATCH_SIZE
+    return clear_settled(batch_size), mark_overdue(today, batch_size), queue_reminders(today, batch_size)
@@ -0,0 +1,139 @@
+"""
+Query-string filters of the list and filter endpoints.
+
+Every whitelisted field can be filtered with ``<field>=<value>`` and, where
+its kind allows, with an operator suffix::
+
+    ?status__in=draft,pending&date__gte=2024-01-01&total__lt=1000&client=<id>
+    &ordering=-date,number
+
+All conditions are ANDed into one query. Values are parsed with the model
+field, so a malformed date or id is rejected instead of reaching the
+database. The older ``filter=<field>&equal=<value>`` pair is still accepted
+and goes through the same whitelist.
+"""
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+from django.utils import timezone
+
+# Operators per kind of field
+EXACT = ('exact', 'in')
+TEXT = ('exact', 'in', 'icontains')
+RANGE = ('exact', 'in', 'gt', 'gte', 'lt', 'lte')
+
+# model name -> {field: operators}
+FILTER_FIELDS = {
+    'customer': {
+        'name': TEXT, 'email': TEXT, 'phone': TEXT, 'country': EXACT, 'assigned': EXACT,
+        'enabled': EXACT, 'created': RANGE, 'updated': RANGE,
+    },
+    'paymentmode': {
+        'name': TEXT, 'enabled': EXACT, 'created': RANGE, 'updated': RANGE,
+    },
+    'product': {
+        'name': TEXT, 'reference': TEXT, 'price': RANGE, 'enabled': EXACT, 'created': RANGE, 'updated': RANGE,
+    },
+    'quote': {
+        'number': TEXT, 'year': RANGE, 'client': EXACT, 'status': EXACT, 'date': RANGE,
+        'expiry_date': RANGE, 'total': RANGE, 'enabled': EXACT, 'created': RANGE, 'updated': RANGE,
+    },
+    'invoice': {
+        'number': TEXT, 'year': RANGE, 'client': EXACT, 'quote': EXACT, 'status': EXACT, 'date': RANGE,
+        'expiry_date': RANGE, 'total': RANGE, 'credit': RANGE, 'enabled': EXACT, 'created': RANGE,
+        'updated': RANGE,
+    },
+    'recurringinvoice': {
+        'name': TEXT, 'client': EXACT, 'interval': EXACT, 'next_date': RANGE, 'end_date': RANGE,
+        'send_email': EXACT, 'enabled': EXACT, 'created': RANGE, 'updated': RANGE,
+    },
+    'payment': {
+        'number': TEXT, 'year': RANGE, 'client': EXACT, 'invoice': EXACT, 'payment_mode': EXACT,
+        'date': RANGE, 'amount': RANGE, 'enabled': EXACT, 'created': RANGE, 'updated': RANGE,
+    },
+}
+
+# Query parameters that are not filters; the frontend sends the page size
+# as items and the search columns as fields
+RESERVED_PARAMS = {'page', 'limit', 'items', 'q', 'fields', 'filter', 'equal', 'ordering', 'cursor', 'since', 'format'}
+MAX_IN_VALUES = 100
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _parse_value(field, raw):
+    name = field.name
+    if isinstance(field, models.ForeignKey):
+        field = field.target_field
+    if isinstance(field, models.BooleanField):
+        raw = raw.capitalize()
+
+    try:
+        value = field.to_python(raw)
+    except ValidationError:
+        raise FilterError(f'Invalid value for {name}: {raw}')
+
+    if isinstance(field, models.DateTimeField) and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+def _is_column(model, name):
+    try:
+        return model._meta.get_field(name).concrete
+    except FieldDoesNotExist:
+        return False
+
+def _condition(model, allowed, name, raw_values):
+    field_name, _, operator = name.partition('__')
+    operator = operator or 'exact'
+    if field_name not in allowed:
+        raise FilterError(f'Cannot filter {model.__name__} by {field_name}')
+    if operator not in allowed[field_name]:
+        raise FilterError(f'Cannot filter {field_name} with {operator}')
+
+    field = model._meta.get_field(field_name)
+    if operator == 'in':
+        raw = [value for values in raw_values for value in values.split(',') if value]
+        if not raw or len(raw) > MAX_IN_VALUES:
+            raise FilterError(f'{name} takes 1 to {MAX_IN_VALUES} values')
+        return {name: [_parse_value(field, value) for value in raw]}
+    if operator == 'icontains':
+        return {name: raw_values[-1]}
+    return {name: _parse_value(field, raw_values[-1])}
+
+def _ordering(model, allowed, param):
+    ordering = []
+    for name in param.split(','):
+        name = name.strip()
+        if name.lstrip('-') not in allowed:
+            raise FilterError(f'Cannot order {model.__name__} by {name.lstrip("-")}')
+        ordering.append(name)
+    return ordering
+
+def compile_filters(model, params):
+    """
+    Turn the query parameters ``params`` (a QueryDict) into filter keyword
+    arguments and an ordering for ``model``; raises ``FilterError`` on a
+    field or operator outside the whitelist or an unparsable value.
+    """
+    allowed = FILTER_FIELDS.get(model._meta.model_name, {})
+    conditions = {}
+
+    for name in params:
+        if name in RESERVED_PARAMS:
+            continue
+        if name not in allowed and '__' not in name and not _is_column(model, name):
+            # Parameters that are no column (e.g. cache busters) are left alone;
+            # other columns are rejected below as not whitelisted
+            continue
+        conditions.update(_condition(model, allowed, name, params.getlist(name)))
+
+    filter_param = params.get('filter')
+    equal_param = params.get('equal')
+    if filter_param and equal_param:
+        conditions.update(_condition(model, allowed, filter_param, [equal_param]))
+
+    ordering = _ordering(model, allowed, params['ordering']) if params.get('ordering') else []
+    return conditions, ordering
@@ -0,0 +1,109 @@
+"""
+Idempotency keys for POST requests.
+
+A client that sends ``Idempotency-Key: <key>`` with a POST can retry it
+safely: the first request runs and its response is stored; a retry with the
+same key and the same request gets the stored response back without running
+the view again, marked ``Idempotent-Replayed: true``. Reusing a key for a
+different request is refused with 422. Requests are compared by method,
+path and body; multipart bodies by their fields and the names and contents
+of their files.
+
+Keys are scoped to the authenticated admin. The key row is inserted in the
+same transaction as the request's writes (``IdempotencyMiddleware`` wraps
+the whole request in one), so a key is only ever stored together with the
+writes it describes, and a concurrent duplicate waits on the key's unique
+index until the first request commits. Responses with 5xx are rolled back
+and not stored, so the request can be retried; 401, 403 and 429 are not
+stored either, as the view did not run.
+
+Keys expire after IDEMPOTENCY_KEY_TTL seconds; ``manage.py
+prune_idempotency_keys`` deletes expired ones.
+"""
+
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http.multipartparser import MultiPartParserError
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+# The view did not run: the client may retry with the same key
+UNSTORED_STATUSES = {401, 403, 429}
+
+
+class IdempotencyConflict(Exception):
+    pass
+
+
+def _update_multipart(digest, request):
+    # Parsing here is not wasted: DRF reuses request.POST and request.FILES
+    try:
+        fields, files = request.POST, request.FILES
+    except MultiPartParserError:
+        # The view rejects the request
+        return
+    for name, values in sorted(fields.lists()):
+        digest.update(json.dumps([name, values]).encode())
+    for name, uploads in sorted(files.lists()):
+        for upload in uploads:
+            digest.update(json.dumps([name, upload.name, upload.size]).encode())
+            # Uploads are hashed chunk by chunk, big ones from their temporary file
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+
+def request_fingerprint(request):
+    digest = hashlib.sha256(f'{request.method} {request.path}\n'.encode())
+    if request.content_type == 'multipart/form-data':
+        _update_multipart(digest, request)
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+def expiry_cutoff():
+    return timezone.now() - datetime.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+def claim_key(user, key, fingerprint, path):
+    """
+    Insert the key for ``user``, or return the stored row of an earlier
+    request with it. Must run inside the request's transaction. Raises
+    ``IdempotencyConflict`` when the key was used for another request.
+    """
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(user=user, key=key, request_hash=fingerprint, path=path)
+        return None
+    except IntegrityError:
+        pass
+
+    stored = IdempotencyKey.objects.select_for_update().get(user=user, key=key)
+    if stored.created < expiry_cutoff():
+        # Expired, start over as a new request
+        stored.request_hash = fingerprint
+        stored.path = path
+        stored.status_code = None
+        stored.content_type = ''
+        stored.body = b''
+        stored.created = timezone.now()
+        stored.save()
+        return None
+    if stored.request_hash != fingerprint:
+        raise IdempotencyConflict('Idempotency-Key was already used for a different request')
+    return stored
+
+def store_response(user, key, response):
+    IdempotencyKey.objects.filter(user=user, key=key).update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        body=response.content,
+    )
+
+def prune_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(created__lt=expiry_cutoff()).delete()
+    return deleted
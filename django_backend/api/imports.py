@@ -0,0 +1,160 @@
+"""
+Streaming CSV/XLSX import of clients and products.
+
+Files are read one row at a time (csv module, or openpyxl in read-only mode
+for XLSX) and handled in chunks of IMPORT_CHUNK_SIZE rows: a chunk is
+validated with the entity's serializer, its valid rows are bulk-inserted
+and the job's progress is saved in the same transaction. A job that fails
+or whose worker dies resumes after the last committed chunk.
+
+Column headers are the serializer field names (``name``, ``email``,
+``phone``, ``country``, ``address`` for clients; ``name``, ``reference``,
+``description``, ``price`` for products). Other columns are ignored.
+"""
+
+import codecs
+import csv
+import datetime
+import logging
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .counts import invalidate_counts
+from .models import Customer, Product, ImportJob
+from .serializers import CustomerSerializer, ProductSerializer
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+IMPORTERS = {
+    'client': (Customer, CustomerSerializer),
+    'product': (Product, ProductSerializer),
+}
+FORMATS = ('csv', 'xlsx')
+# Set by the importer, never taken from the file
+PROTECTED_FIELDS = ('id', 'created_by', 'created', 'updated', 'removed')
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def file_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in FORMATS:
+        raise ImportFileError('Only .csv and .xlsx files can be imported')
+    if extension == 'xlsx' and openpyxl is None:
+        raise ImportFileError('XLSX import requires the openpyxl package')
+    return extension
+
+def _clean_header(header):
+    return [str(column or '').strip().lower() for column in header]
+
+def _csv_rows(file):
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    header = _clean_header(next(reader, []))
+    for values in reader:
+        if any(values):
+            yield dict(zip(header, values))
+
+def _xlsx_rows(file):
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = _clean_header(next(rows, []))
+        for values in rows:
+            if any(value is not None for value in values):
+                # Leave empty cells out so the serializer applies defaults
+                yield {column: value for column, value in zip(header, values) if value is not None}
+    finally:
+        workbook.close()
+
+def read_rows(file, format):
+    """Yield the data rows of ``file`` as dicts keyed by lowercased header."""
+    if format == 'xlsx':
+        return _xlsx_rows(file)
+    return _csv_rows(file)
+
+
+def _import_chunk(job, model, serializer_class, rows, first_row):
+    # One serializer validates the whole chunk, like ListSerializer does
+    validator = serializer_class()
+    objects = []
+    errors = []
+    for number, row in enumerate(rows, start=first_row):
+        data = {key: value for key, value in row.items() if key not in PROTECTED_FIELDS}
+        try:
+            validated = validator.run_validation(data)
+        except ValidationError as e:
+            errors.append({'row': number, 'errors': e.detail})
+        else:
+            objects.append(model(created_by=job.created_by, **validated))
+
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=settings.IMPORT_CHUNK_SIZE)
+        job.rows_processed += len(rows)
+        job.rows_imported += len(objects)
+        job.rows_failed += len(errors)
+        job.errors = (job.errors + errors)[:settings.IMPORT_MAX_ERRORS]
+        job.save(update_fields=['rows_processed', 'rows_imported', 'rows_failed', 'errors', 'updated'])
+        # bulk_create sends no post_save signals
+        if objects:
+            transaction.on_commit(lambda: invalidate_counts(model))
+
+def run_import(job, progress=None):
+    """
+    Import ``job``'s file from ``job.rows_processed`` on. ``progress`` is
+    called with the job after every chunk.
+    """
+    model, serializer_class = IMPORTERS[job.entity]
+    job.status = 'running'
+    job.message = ''
+    job.save(update_fields=['status', 'message', 'updated'])
+
+    try:
+        with job.file.open('rb') as file:
+            rows = islice(read_rows(file, file_format(job.filename)), job.rows_processed, None)
+            while True:
+                chunk = list(islice(rows, settings.IMPORT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                # Data rows are numbered from 1, after the header
+                _import_chunk(job, model, serializer_class, chunk, job.rows_processed + 1)
+                if progress:
+                    progress(job)
+    except Exception as e:
+        logger.exception('Import %s failed', job.id)
+        job.status = 'failed'
+        job.message = str(e)
+        job.save(update_fields=['status', 'message', 'updated'])
+        return job
+
+    job.status = 'completed'
+    job.save(update_fields=['status', 'updated'])
+    # The rows are in the database now
+    job.file.delete(save=True)
+    return job
+
+def next_job():
+    """
+    Claim the oldest pending job, or a running one whose worker stopped
+    updating it for IMPORT_STALE_SECONDS.
+    """
+    stale = timezone.now() - datetime.timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+    with transaction.atomic():
+        job = (ImportJob.objects.select_for_update(skip_locked=True)
+               .filter(Q(status='pending') | Q(status='running', updated__lt=stale))
+               .order_by('created').first())
+        if job is not None:
+            job.status = 'running'
+            job.save(update_fields=['status', 'updated'])
+    return job
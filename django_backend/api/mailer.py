@@ -0,0 +1,167 @@
+"""
+Outgoing email queue.
+
+Emails are queued as MailMessage rows inside the transaction that decides
+to send them, so nothing is mailed for a write that was rolled back.
+``send_pending()`` ("manage.py send_queued_mail --loop") sends them in
+batches of MAIL_BATCH_SIZE over one SMTP connection per batch, and at most
+MAIL_RATE_LIMIT per minute per tenant. A message that fails is retried
+with exponential backoff; after MAIL_MAX_ATTEMPTS failures it is marked
+``failed``.
+
+A batch is claimed first: its messages are marked ``sending`` with a lease
+(``next_attempt``) in a short transaction, so the SMTP work runs outside any
+transaction and other workers take other messages. Messages of a worker
+that died are claimed again once their lease runs out, and may be sent
+twice.
+"""
+
+import datetime
+import logging
+import smtplib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MailMessage, Setting
+
+logger = logging.getLogger(__name__)
+
+
+def company_name():
+    setting = Setting.objects.filter(key='company_name').first()
+    return setting.value if setting and isinstance(setting.value, str) else 'IDURAR'
+
+def invoice_message(invoice, company):
+    """An unsaved MailMessage of ``invoice`` (with its client loaded) to its client."""
+    due = f" and is due on {invoice.expiry_date.isoformat()}" if invoice.expiry_date else ''
+    return MailMessage(
+        kind='invoice',
+        to=invoice.client.email,
+        subject=f"Invoice #{invoice.number}/{invoice.year} from {company}",
+        body=(
+            f"Dear {invoice.client.name},\n\n"
+            f"Invoice #{invoice.number}/{invoice.year} of {invoice.total} was issued on "
+            f"{invoice.date.isoformat()}{due}.\n\n{company}\n"
+        ),
+        invoice=invoice,
+    )
+
+def queue_invoice_mails(invoices):
+    """Queue the invoice email of every invoice whose client has an address."""
+    company = company_name()
+    return MailMessage.objects.bulk_create([
+        invoice_message(invoice, company) for invoice in invoices if invoice.client.email
+    ])
+
+def retry_delay(attempts):
+    return min(settings.MAIL_RETRY_BASE * 2 ** (attempts - 1), settings.MAIL_RETRY_MAX)
+
+def _rate_key():
+    return f"mail_rate:{timezone.now().strftime('%Y%m%d%H%M')}"
+
+def rate_allowance():
+    """How many more messages may be sent in the current minute."""
+    if not settings.MAIL_RATE_LIMIT:
+        return settings.MAIL_BATCH_SIZE
+    return max(settings.MAIL_RATE_LIMIT - (cache.get(_rate_key()) or 0), 0)
+
+def _count_sent(count):
+    if not settings.MAIL_RATE_LIMIT or not count:
+        return
+    key = _rate_key()
+    cache.add(key, 0, 120)
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        cache.set(key, count, 120)
+
+def _failed(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= settings.MAIL_MAX_ATTEMPTS:
+        message.status = 'failed'
+        message.next_attempt = None
+        logger.error('Gave up mail %d to %s after %d attempts: %s', message.id, message.to, message.attempts, error)
+    else:
+        message.status = 'pending'
+        message.next_attempt = timezone.now() + datetime.timedelta(seconds=retry_delay(message.attempts))
+
+def lease_seconds():
+    # Long enough for a whole batch of sends to time out
+    return settings.EMAIL_TIMEOUT * (settings.MAIL_BATCH_SIZE + 1)
+
+def claim_batch(limit):
+    """Mark the next ``limit`` due messages ``sending`` for a lease; returns them."""
+    now = timezone.now()
+    with transaction.atomic():
+        # Concurrent workers take different messages
+        messages = list(
+            MailMessage.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending', next_attempt__isnull=True)
+                    | Q(status__in=('pending', 'sending'), next_attempt__lte=now))
+            .order_by('id')[:limit]
+        )
+        for message in messages:
+            message.status = 'sending'
+            message.next_attempt = now + datetime.timedelta(seconds=lease_seconds())
+        MailMessage.objects.bulk_update(messages, ['status', 'next_attempt'])
+    return messages
+
+def send_batch():
+    """Send the next batch of due messages; returns ``(sent, failed)``."""
+    limit = min(settings.MAIL_BATCH_SIZE, rate_allowance())
+    if not limit:
+        return 0, 0
+
+    messages = claim_batch(limit)
+    if not messages:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as e:
+        # The server is unreachable, the whole batch waits
+        for message in messages:
+            _failed(message, e)
+        failed = len(messages)
+    else:
+        try:
+            for message in messages:
+                try:
+                    EmailMessage(message.subject, message.body, settings.DEFAULT_FROM_EMAIL, [message.to],
+                                 connection=connection).send()
+                except (smtplib.SMTPException, OSError) as e:
+                    _failed(message, e)
+                    failed += 1
+                else:
+                    message.status = 'sent'
+                    message.sent = timezone.now()
+                    message.next_attempt = None
+                    message.attempts += 1
+                    message.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    MailMessage.objects.bulk_update(messages, ['status', 'attempts', 'next_attempt', 'last_error', 'sent'])
+    _count_sent(sent + failed)
+    return sent, failed
+
+def send_pending(max_batches=100):
+    """Send batches until the queue or the rate allowance runs out; returns ``(sent, failed)``."""
+    sent = failed = 0
+    for _ in range(max_batches):
+        batch_sent, batch_failed = send_batch()
+        sent += batch_sent
+        failed += batch_failed
+        if not batch_sent:
+            # Empty queue, no allowance left, or the server is failing
+            break
+    return sent, failed
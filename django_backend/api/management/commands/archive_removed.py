@@ -0,0 +1,40 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from api.archive import ARCHIVED_MODELS, archivable, archive, retention_days
+from api.workers import for_each_tenant
+
+class Command(BaseCommand):
+    help = 'Move rows removed longer than their retention into the archive, in every tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running as a worker')
+        parser.add_argument('--interval', type=float, default=86400.0, help='Seconds between passes with --loop')
+        parser.add_argument('--workers', type=int, default=4, help='Tenants processed in parallel')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be archived')
+
+    def handle(self, *args, **options):
+        task = self.count if options['dry_run'] else archive
+        while True:
+            close_old_connections()
+            totals = {}
+            for result in for_each_tenant(task, options['workers']):
+                for name, count in result.items():
+                    totals[name] = totals.get(name, 0) + count
+            verb = 'Would archive' if options['dry_run'] else 'Archived'
+            self.stdout.write(f'{verb} ' + (', '.join(f'{count} {name}' for name, count in totals.items()) or 'nothing'))
+            if not options['loop'] or options['dry_run']:
+                break
+            time.sleep(options['interval'])
+
+    def count(self):
+        now = timezone.now()
+        retention = retention_days()
+        return {
+            model._meta.model_name: archivable(model, now - datetime.timedelta(days=retention[model._meta.model_name])).count()
+            for model in ARCHIVED_MODELS
+            if retention[model._meta.model_name]
+        }
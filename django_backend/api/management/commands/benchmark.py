@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from api.benchmark.runner import BenchmarkRunner, SCENARIOS, find_regressions
+
+class Command(BaseCommand):
+    help = 'Run the API benchmark scenarios and report throughput and latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help=f'Comma separated scenarios (default: all of {", ".join(SCENARIOS)})',
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--host', help='Host header to send, selects the tenant')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+        parser.add_argument(
+            '--max-regression', type=float, default=0.2,
+            help='Allowed p95/throughput regression against the baseline, as a fraction',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+
+        try:
+            runner = BenchmarkRunner(
+                scenarios,
+                requests=options['requests'],
+                warmup=options['warmup'],
+                concurrency=options['concurrency'],
+                seed=options['seed'],
+                host=options['host'],
+            )
+            # Query logging and N+1 detection would dominate the measurements
+            with override_settings(DEBUG=False, NPLUSONE_ENABLED=False):
+                results = runner.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Database: {results['database']}, concurrency: {results['concurrency']}")
+        self.stdout.write(f"{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, result in results['scenarios'].items():
+            self.stdout.write(
+                f"{name:<18}{result['throughput']:>10}{result['p50_ms']:>10}{result['p90_ms']:>10}"
+                f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = find_regressions(results, baseline, options['max_regression'])
+            if regressions:
+                raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
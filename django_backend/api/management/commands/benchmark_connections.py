@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from api.benchmark.connections import available_modes, benchmark_connections
+
+class Command(BaseCommand):
+    help = 'Compare per-request latency with new, persistent and pooled database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', default=','.join(available_modes()),
+            help='Comma separated modes: per_request, persistent, pool (pool needs DB_POOL=True)',
+        )
+        parser.add_argument('--scenarios', default='client_list', help='Comma separated benchmark scenarios')
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--host', help='Host header to send, selects the tenant')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+
+        try:
+            with override_settings(DEBUG=False, NPLUSONE_ENABLED=False):
+                results = benchmark_connections(
+                    modes, scenarios,
+                    requests=options['requests'],
+                    warmup=options['warmup'],
+                    seed=options['seed'],
+                    host=options['host'],
+                )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'mode':<14}{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for mode, run in results.items():
+            for name, result in run['scenarios'].items():
+                self.stdout.write(
+                    f"{mode:<14}{name:<18}{result['throughput']:>10}{result['p50_ms']:>10}"
+                    f"{result['p95_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from api.benchmark.rendering import benchmark_renderers
+
+class Command(BaseCommand):
+    help = 'Compare render time and response size of the JSON renderers on large list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Rows per rendered page')
+        parser.add_argument('--repeat', type=int, default=50, help='Renders per page and renderer')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        try:
+            results = benchmark_renderers(limit=options['limit'], repeat=options['repeat'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'page/renderer':<22}{'rows':>6}{'best ms':>10}{'mean ms':>10}{'bytes':>10}{'gzip':>9}{'br':>9}")
+        for name, result in results.items():
+            br_bytes = result['br_bytes'] if result['br_bytes'] is not None else '-'
+            self.stdout.write(
+                f"{name:<22}{result['rows']:>6}{result['best_ms']:>10}{result['mean_ms']:>10}"
+                f"{result['bytes']:>10}{result['gzip_bytes']:>9}{br_bytes:>9}"
+            )
+
+        different = [name for name, result in results.items() if result.get('identical') is False]
+        if different:
+            self.stdout.write(self.style.WARNING(f"Output differs from DRF's JSONRenderer: {', '.join(different)}"))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from api.benchmark.serializers import benchmark_serializers, TARGETS
+
+class Command(BaseCommand):
+    help = 'Compare the ModelSerializers with the values() read path on list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--targets', default=','.join(TARGETS),
+            help=f'Comma separated serializers (default: all of {", ".join(TARGETS)})',
+        )
+        parser.add_argument('--limit', type=int, default=100, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed builds per page and variant')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        targets = [name.strip() for name in options['targets'].split(',') if name.strip()]
+        unknown = set(targets) - set(TARGETS)
+        if unknown:
+            raise CommandError(f'Unknown targets: {", ".join(sorted(unknown))}')
+
+        try:
+            with override_settings(DEBUG=False):
+                results = benchmark_serializers(targets, limit=options['limit'], repeat=options['repeat'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'serializer/variant':<20}{'rows':>6}{'queries':>9}{'best ms':>10}{'mean ms':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<20}{result['rows']:>6}{result['queries']:>9}{result['best_ms']:>10}{result['mean_ms']:>10}"
+            )
+
+        different = [name for name, result in results.items() if result.get('identical') is False]
+        if different:
+            raise CommandError(f"values() output differs from the ModelSerializer: {', '.join(different)}")
+        self.stdout.write(self.style.SUCCESS('values() output is identical for every serializer'))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.webhooks import dispatch_pending, prune_events
+from api.workers import for_each_tenant
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox events to the webhook endpoints of every tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running as a worker')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between passes with --loop')
+        parser.add_argument('--workers', type=int, default=4, help='Tenants processed in parallel')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            results = for_each_tenant(lambda: (dispatch_pending(), prune_events()), options['workers'])
+            sent = sum(sent for sent, _ in results)
+            pruned = sum(pruned for _, pruned in results)
+            if sent or pruned or not options['loop']:
+                self.stdout.write(f'Sent {sent} events, pruned {pruned}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
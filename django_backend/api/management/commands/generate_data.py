@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from api.benchmark.data import DataGenerator, flush_data
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic data for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--quotes', type=int, default=500)
+        parser.add_argument('--invoices', type=int, default=2000)
+        parser.add_argument('--items', type=int, default=5, help='Items per quote and invoice')
+        parser.add_argument('--paid-ratio', type=float, default=0.6, help='Share of invoices with a payment')
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Delete ALL existing customers, products, quotes, invoices and payments first',
+        )
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            flush_data()
+            self.stdout.write(self.style.WARNING('Existing data deleted'))
+
+        generator = DataGenerator(
+            seed=options['seed'],
+            customers=options['customers'],
+            products=options['products'],
+            quotes=options['quotes'],
+            invoices=options['invoices'],
+            items_per_document=options['items'],
+            paid_ratio=options['paid_ratio'],
+        )
+        counts = generator.generate()
+
+        for name, count in counts.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(self.style.SUCCESS('Benchmark data generated'))
@@ -0,0 +1,58 @@
+import json
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from api.imports import IMPORTERS, ImportFileError, file_format, run_import
+from api.models import Admin, ImportJob
+
+class Command(BaseCommand):
+    help = 'Import clients or products from a CSV/XLSX file, or resume a failed import'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', nargs='?', choices=list(IMPORTERS))
+        parser.add_argument('path', nargs='?', help='CSV or XLSX file')
+        parser.add_argument('--resume', help='Id of an import job to continue')
+        parser.add_argument('--email', help='Admin recorded as creator of the rows')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            job = ImportJob.objects.filter(id=options['resume']).first()
+            if job is None or not job.file:
+                raise CommandError(f"No resumable import {options['resume']}")
+        else:
+            job = self.create_job(options)
+
+        def progress(job):
+            self.stdout.write(f'{job.rows_processed} rows: {job.rows_imported} imported, {job.rows_failed} failed')
+
+        run_import(job, progress)
+
+        for error in job.errors:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {json.dumps(error['errors'])}"))
+        if job.status != 'completed':
+            raise CommandError(f'Import {job.id} failed: {job.message}; resume with --resume {job.id}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {job.rows_imported} {job.entity} rows, {job.rows_failed} failed'))
+
+    def create_job(self, options):
+        if not options['entity'] or not options['path']:
+            raise CommandError('Give an entity and a file, or --resume <job id>')
+        try:
+            file_format(options['path'])
+        except ImportFileError as e:
+            raise CommandError(str(e))
+
+        created_by = None
+        if options['email']:
+            created_by = Admin.objects.filter(email=options['email']).first()
+            if created_by is None:
+                raise CommandError(f"No admin {options['email']}")
+
+        filename = os.path.basename(options['path'])
+        job = ImportJob(entity=options['entity'], filename=filename, created_by=created_by)
+        with open(options['path'], 'rb') as f:
+            job.file.save(filename, File(f), save=False)
+        job.save()
+        self.stdout.write(f'Created import {job.id}')
+        return job
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from api.idempotency import prune_expired_keys
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys older than IDEMPOTENCY_KEY_TTL'
+
+    def handle(self, *args, **kwargs):
+        deleted = prune_expired_keys()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired idempotency keys'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from api.sessions import prune_expired_sessions
+
+class Command(BaseCommand):
+    help = 'Delete expired JWT sessions from the session store'
+
+    def handle(self, *args, **kwargs):
+        deleted = prune_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired sessions'))
@@ -0,0 +1,31 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.dunning import run_dunning
+from api.workers import for_each_tenant
+
+class Command(BaseCommand):
+    help = 'Flag overdue and settled invoices and queue payment reminders in every tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running as a worker')
+        parser.add_argument('--interval', type=float, default=3600.0, help='Seconds between passes with --loop')
+        parser.add_argument('--workers', type=int, default=4, help='Tenants processed in parallel')
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help='Run as of this day (YYYY-MM-DD) instead of today')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            results = for_each_tenant(lambda: run_dunning(options['date']), options['workers'])
+            settled = sum(settled for settled, _, _ in results)
+            overdue = sum(overdue for _, overdue, _ in results)
+            reminders = sum(reminders for _, _, reminders in results)
+            if settled or overdue or reminders or not options['loop']:
+                self.stdout.write(
+                    f'Flagged {settled} overdue invoices paid, {overdue} invoices overdue, queued {reminders} reminders')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
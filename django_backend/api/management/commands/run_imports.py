@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.imports import next_job, run_import
+from api.workers import for_each_tenant
+
+class Command(BaseCommand):
+    help = 'Process queued CSV/XLSX imports of every tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running as a worker')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+        parser.add_argument('--workers', type=int, default=4, help='Tenants processed in parallel')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = sum(for_each_tenant(self.process_schema, options['workers']))
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['interval'])
+
+    def process_schema(self):
+        processed = 0
+        while (job := next_job()) is not None:
+            run_import(job)
+            self.stdout.write(
+                f'Import {job.id} {job.status}: {job.rows_imported} imported, {job.rows_failed} failed'
+                + (f' ({job.message})' if job.message else '')
+            )
+            processed += 1
+        return processed
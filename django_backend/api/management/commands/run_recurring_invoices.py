@@ -0,0 +1,29 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.recurring import materialize_due
+from api.workers import for_each_tenant
+
+class Command(BaseCommand):
+    help = 'Create the invoices of due recurring invoices in every tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running as a worker')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between passes with --loop')
+        parser.add_argument('--workers', type=int, default=4, help='Tenants processed in parallel')
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help='Invoice billing dates up to this day (YYYY-MM-DD) instead of today')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            results = for_each_tenant(lambda: materialize_due(options['date']), options['workers'])
+            templates = sum(templates for templates, _ in results)
+            invoices = sum(invoices for _, invoices in results)
+            if invoices or not options['loop']:
+                self.stdout.write(f'Created {invoices} invoices from {templates} recurring invoices')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
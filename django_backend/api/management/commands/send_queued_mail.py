@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from api.mailer import send_pending
+
+class Command(BaseCommand):
+    help = 'Send the queued emails of every tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running as a worker')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between passes with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            sent, failed = self.send()
+            if sent or failed or not options['loop']:
+                self.stdout.write(f'Sent {sent} emails, {failed} failed')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def send(self):
+        if not hasattr(connection, 'set_tenant'):
+            # SQLite mode, no tenant schemas
+            return send_pending()
+
+        from django_tenants.utils import get_public_schema_name, get_tenant_model, tenant_context
+
+        sent = failed = 0
+        for tenant in get_tenant_model().objects.exclude(schema_name=get_public_schema_name()):
+            with tenant_context(tenant):
+                tenant_sent, tenant_failed = send_pending()
+            sent += tenant_sent
+            failed += tenant_failed
+        return sent, failed
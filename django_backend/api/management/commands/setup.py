@@ -22,7 +22,7 @@ class Command(BaseCommand):
             )
             
             # Create admin password record
-            AdminPassword.objects.create(user=admin, logged_sessions=[])
+            AdminPassword.objects.create(user=admin)
             
             self.stdout.write(self.style.SUCCESS('Default admin user created'))
         else:
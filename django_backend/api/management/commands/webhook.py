@@ -0,0 +1,52 @@
+import secrets
+
+from django.core.management.base import BaseCommand, CommandError
+from api.models import WebhookEndpoint
+from api.webhooks import start_position
+
+class Command(BaseCommand):
+    help = 'Manage webhook endpoints: add, list, enable, disable or remove'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['add', 'list', 'enable', 'disable', 'remove'])
+        parser.add_argument('target', nargs='?', help='URL for "add", endpoint id otherwise')
+        parser.add_argument('--topics', default='', help='Comma separated topic patterns, e.g. "invoice.*,payment.created"')
+        parser.add_argument('--secret', help='Signing secret (generated when omitted)')
+
+    def handle(self, *args, **options):
+        action = options['action']
+        if action == 'list':
+            for endpoint in WebhookEndpoint.objects.order_by('created'):
+                state = 'enabled' if endpoint.enabled else 'disabled'
+                self.stdout.write(
+                    f"{endpoint.id} {endpoint.url} [{state}] topics={','.join(endpoint.topics) or '*'} "
+                    f"position={endpoint.position} attempts={endpoint.attempts} {endpoint.last_error}"
+                )
+            return
+
+        if not options['target']:
+            raise CommandError(f'"{action}" needs a target')
+
+        if action == 'add':
+            endpoint = WebhookEndpoint.objects.create(
+                url=options['target'],
+                secret=options['secret'] or secrets.token_urlsafe(32),
+                topics=[topic.strip() for topic in options['topics'].split(',') if topic.strip()],
+                position=start_position(),
+            )
+            self.stdout.write(self.style.SUCCESS(f'Added {endpoint.id} with secret {endpoint.secret}'))
+            return
+
+        endpoint = WebhookEndpoint.objects.filter(id=options['target']).first()
+        if endpoint is None:
+            raise CommandError(f"No webhook endpoint {options['target']}")
+
+        if action == 'remove':
+            endpoint.delete()
+        else:
+            endpoint.enabled = action == 'enable'
+            endpoint.attempts = 0
+            endpoint.next_attempt = None
+            # Not the position, a worker may be moving it
+            endpoint.save(update_fields=['enabled', 'attempts', 'next_attempt', 'updated'])
+        self.stdout.write(self.style.SUCCESS(f'{action.capitalize()}d {endpoint.url}'))
@@ -0,0 +1,189 @@
+"""
+In-process request metrics, exposed in the Prometheus text format.
+
+``api.middleware.RequestMetricsMiddleware`` fills the registry below for every
+request; ``metrics_view`` renders it for scraping. Each worker process keeps
+its own registry, so scrape every worker (or run a single one) to get the
+full picture.
+"""
+
+import collections
+import contextlib
+import contextvars
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """A Prometheus-style cumulative histogram, one series per label set."""
+
+    def __init__(self, name, help_text, buckets, labels=('route', 'method')):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                labels = _format_labels(self.labels, label_values)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{labels}}} {total}')
+                lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=('route', 'method', 'status')):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = collections.Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{_format_labels(self.labels, label_values)}}} {value}')
+        return lines
+
+
+def _format_labels(names, values):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+REQUESTS = Counter('http_requests_total', 'Requests handled, by route, method and status.')
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Request latency in seconds.', LATENCY_BUCKETS)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries executed per request.', QUERY_COUNT_BUCKETS)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds', 'Time spent in database queries per request.', LATENCY_BUCKETS)
+SERIALIZER_DURATION = Histogram(
+    'http_request_serializer_duration_seconds', 'Time spent building serializer output per request.',
+    LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size in bytes.', SIZE_BUCKETS)
+
+METRICS = (REQUESTS, REQUEST_DURATION, DB_QUERIES, DB_DURATION, SERIALIZER_DURATION, RESPONSE_SIZE)
+
+
+class RequestStats:
+    """Per-request measurements, collected while the request is handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Used as a connection.execute_wrapper()
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+def start_request_stats():
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+def end_request_stats(token):
+    _current_stats.reset(token)
+
+@contextlib.contextmanager
+def serializer_timer():
+    """Add the time spent in the block to the current request's serializer time."""
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - start
+
+def record_request(route, method, status_code, duration, stats, response_size):
+    REQUESTS.inc(route, method, status_code)
+    REQUEST_DURATION.observe(duration, route, method)
+    DB_QUERIES.observe(stats.queries, route, method)
+    DB_DURATION.observe(stats.db_time, route, method)
+    SERIALIZER_DURATION.observe(stats.serializer_time, route, method)
+    if response_size is not None:
+        RESPONSE_SIZE.observe(response_size, route, method)
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not settings.METRICS_ENABLED or not token:
+        # Not served without a token, the metrics are not public
+        raise Http404
+    if request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Profiles of slow requests, newest last
+_profile_ids = itertools.count(1)
+_profiles = collections.deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+_profiles_lock = threading.Lock()
+
+def store_profile(entry):
+    with _profiles_lock:
+        entry['id'] = next(_profile_ids)
+        _profiles.append(entry)
+
+def list_profiles():
+    with _profiles_lock:
+        return list(_profiles)
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        for entry in _profiles:
+            if entry['id'] == profile_id:
+                return entry
+    return None
@@ -0,0 +1,271 @@
+import cProfile
+import io
+import pstats
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.http import HttpResponse, JsonResponse
+from django.middleware.gzip import GZipMiddleware
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+from rest_framework.exceptions import APIException
+
+from . import metrics
+from .authentication import SessionJWTAuthentication
+from .idempotency import (
+    MAX_KEY_LENGTH, UNSTORED_STATUSES, IdempotencyConflict, claim_key, request_fingerprint, store_response,
+)
+from .nplusone import check_query_shapes, record_query_shapes
+from .routers import SAFE_METHODS, end_routing, pin_key, start_routing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PROFILE_ROWS = 50
+MIN_COMPRESS_SIZE = 200
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, database query count and time, serializer time and
+    response size for every request, labelled by URL route (see api.metrics).
+
+    A PROFILE_SAMPLE_RATE fraction of requests also runs under cProfile; the
+    trace is kept in the profile ring buffer when the request took at least
+    PROFILE_THRESHOLD_MS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats, stats_token = metrics.start_request_stats()
+        profiler = self._start_profiler()
+        start = time.perf_counter()
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+            metrics.end_request_stats(stats_token)
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        response_size = None if response.streaming else len(response.content)
+
+        metrics.record_request(route, request.method, response.status_code, duration, stats, response_size)
+
+        if profiler and duration * 1000 >= settings.PROFILE_THRESHOLD_MS:
+            self._store_profile(profiler, request, route, response, duration, stats)
+
+        return response
+
+    def _start_profiler(self):
+        rate = settings.PROFILE_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate:
+            return None
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active
+            return None
+        return profiler
+
+    def _store_profile(self, profiler, request, route, response, duration, stats):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_ROWS)
+
+        metrics.store_profile({
+            'created': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': stats.queries,
+            'db_time_ms': round(stats.db_time * 1000, 2),
+            'serializer_time_ms': round(stats.serializer_time * 1000, 2),
+            'profile': output.getvalue(),
+        })
+
+
+class NPlusOneMiddleware:
+    """
+    Reports query shapes repeated within one request (see api.nplusone) when
+    NPLUSONE_ENABLED is on. Meant for DEBUG and the test suite.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.NPLUSONE_ENABLED:
+            return self.get_response(request)
+
+        with record_query_shapes() as recorder:
+            response = self.get_response(request)
+
+        check_query_shapes(recorder, f'{request.method} {request.path}')
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets api.routers.ReplicaRouter send the reads of safe requests to the
+    replicas, unless the client wrote in the last REPLICA_PIN_SECONDS, and
+    pins clients whose request wrote. Replica connections get the tenant
+    TenantMainMiddleware selected for the primary.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = pin_key(request)
+        use_replicas = request.method in SAFE_METHODS and not cache.get(key)
+        if use_replicas:
+            self._set_tenant()
+
+        state, token = start_routing(use_replicas)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_routing(token)
+
+        if state.wrote:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def _set_tenant(self):
+        tenant = getattr(connections[DEFAULT_DB_ALIAS], 'tenant', None)
+        if tenant is None:
+            return
+        for alias in settings.REPLICA_DATABASES:
+            replica = connections[alias]
+            if hasattr(replica, 'set_tenant') and getattr(replica, 'tenant', None) is not tenant:
+                replica.set_tenant(tenant)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compresses responses when RESPONSE_COMPRESSION is on: with brotli when the
+    client accepts it and the brotli package is installed, otherwise with
+    gzip (Django's GZipMiddleware). Streaming responses always use gzip.
+    """
+
+    def process_response(self, request, response):
+        if not settings.RESPONSE_COMPRESSION:
+            return response
+
+        if brotli is None or response.streaming:
+            return super().process_response(request, response)
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if not re_accepts_brotli.search(accept_encoding):
+            return super().process_response(request, response)
+
+        if len(response.content) < MIN_COMPRESS_SIZE or response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        compressed_content = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+
+        return response
+
+
+class IdempotencyMiddleware:
+    """
+    Runs authenticated POSTs that carry an ``Idempotency-Key`` header in one
+    transaction with their key, and answers retries with the stored response
+    (see api.idempotency).
+    """
+
+    def __init__(self, get_response):
+        if not settings.IDEMPOTENCY_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.headers.get('Idempotency-Key')
+        if request.method != 'POST' or not key or self._is_public_schema():
+            return self.get_response(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return self._error(f'Idempotency-Key is longer than {MAX_KEY_LENGTH} characters', 400)
+
+        user = self._authenticate(request)
+        if user is None:
+            # The view rejects the request; nothing to remember
+            return self.get_response(request)
+
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            try:
+                stored = claim_key(user, key, fingerprint, request.path)
+            except IdempotencyConflict as e:
+                return self._error(str(e), 422)
+
+            if stored is not None:
+                if stored.status_code is None:
+                    return self._error('A request with this Idempotency-Key is in progress', 409)
+                response = HttpResponse(bytes(stored.body), status=stored.status_code, content_type=stored.content_type)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            response = self.get_response(request)
+            if response.status_code >= 500 or response.status_code in UNSTORED_STATUSES or response.streaming:
+                # Undo the writes and the key; the request can be retried
+                transaction.set_rollback(True)
+            else:
+                store_response(user, key, response)
+
+        return response
+
+    def _is_public_schema(self):
+        # The key table only exists in tenant schemas
+        if not hasattr(connection, 'set_tenant'):
+            return False
+        from django_tenants.utils import get_public_schema_name
+        return connection.schema_name == get_public_schema_name()
+
+    def _authenticate(self, request):
+        try:
+            result = SessionJWTAuthentication().authenticate(request)
+        except APIException:
+            return None
+        return result[0] if result else None
+
+    def _error(self, message, status):
+        return JsonResponse({'success': False, 'result': None, 'message': message}, status=status)
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-19 17:52
+
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_logged_sessions(apps, schema_editor):
+    # Carry still-valid tokens over so existing logins survive the upgrade.
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    AdminPassword = apps.get_model('api', 'AdminPassword')
+    AdminSession = apps.get_model('api', 'AdminSession')
+
+    sessions = []
+    for admin_password in AdminPassword.objects.exclude(logged_sessions=[]):
+        for raw_token in admin_password.logged_sessions or []:
+            try:
+                token = AccessToken(raw_token)
+            except TokenError:
+                continue
+            sessions.append(AdminSession(
+                jti=token['jti'],
+                user_id=admin_password.user_id,
+                expires=datetime.datetime.fromtimestamp(token['exp'], tz=datetime.timezone.utc),
+            ))
+
+    AdminSession.objects.bulk_create(sessions, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_customer_alter_invoice_client_alter_payment_client_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminSession',
+            fields=[
+                ('jti', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_logged_sessions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='adminpassword',
+            name='logged_sessions',
+        ),
+    ]
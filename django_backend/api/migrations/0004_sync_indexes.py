@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_adminsession'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated', 'id'], name='customer_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['updated', 'id'], name='invoice_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['updated', 'id'], name='payment_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentmode',
+            index=models.Index(fields=['updated', 'id'], name='payment_mode_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated', 'id'], name='product_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['updated', 'id'], name='quote_updated_id_idx'),
+        ),
+    ]
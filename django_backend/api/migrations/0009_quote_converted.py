@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+def mark_converted_quotes(apps, schema_editor):
+    # Quotes converted before the flag existed have an invoice pointing at them
+    Quote = apps.get_model('api', 'Quote')
+    Invoice = apps.get_model('api', 'Invoice')
+    Quote.objects.filter(id__in=Invoice.objects.filter(quote__isnull=False).values('quote')).update(converted=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='converted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_converted_quotes, migrations.RunPython.noop),
+    ]
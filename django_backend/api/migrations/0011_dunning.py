@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_recurring_invoices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceReminder',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('level', models.PositiveSmallIntegerField()),
+                ('days_overdue', models.PositiveIntegerField()),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['status', 'expiry_date'], name='invoice_status_expiry_idx'),
+        ),
+        migrations.AddField(
+            model_name='invoicereminder',
+            name='invoice',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='api.invoice'),
+        ),
+        migrations.AddField(
+            model_name='invoicereminder',
+            name='message',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.mailmessage'),
+        ),
+        migrations.AddConstraint(
+            model_name='invoicereminder',
+            constraint=models.UniqueConstraint(fields=('invoice', 'level'), name='invoice_reminder_level_unique'),
+        ),
+    ]
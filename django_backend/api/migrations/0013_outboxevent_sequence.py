@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-20 09:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_existing_events(apps, schema_editor):
+    # Events written so far are committed; endpoint positions are their ids
+    OutboxEvent = apps.get_model('api', 'OutboxEvent')
+    OutboxEvent.objects.update(sequence=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_archivedrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing_events, migrations.RunPython.noop),
+    ]
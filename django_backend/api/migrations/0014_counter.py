@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-20 11:02
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def move_outbox_sequence(apps, schema_editor):
+    # The sequence was locked through a Setting row; the counter also holds its last value
+    Counter = apps.get_model('api', 'Counter')
+    OutboxEvent = apps.get_model('api', 'OutboxEvent')
+    Setting = apps.get_model('api', 'Setting')
+    last = OutboxEvent.objects.aggregate(last=Max('sequence'))['last'] or 0
+    Counter.objects.create(key='outbox_sequence', value=last)
+    Setting.objects.filter(key='outbox_sequence').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_outboxevent_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('key', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(move_outbox_sequence, migrations.RunPython.noop),
+    ]
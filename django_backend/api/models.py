@@ -1,9 +1,68 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 import uuid
 
-class AdminManager(BaseUserManager):
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """
+        Flag the rows removed, with the rows of soft-deletable models that
+        reference them with on_delete=CASCADE (the quotes, invoices, payments
+        and recurring invoices of a client, the payments of an invoice),
+        recursively. One UPDATE per model, in one transaction; returns
+        ``{model: primary keys of the rows flagged}``.
+        """
+        from .authentication import invalidate_cached_user
+        from .counts import invalidate_counts
+        from .reports import invalidate_aging
+        
+        now = timezone.now()
+        flagged = {}
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            roots = list(self.model.all_objects.using(self.db).filter(pk__in=pks, removed=False)
+                         .values_list('pk', flat=True))
+            if roots:
+                _soft_delete(self.model, roots, now, flagged, self.db)
+            
+            # update() sends no signals
+            transaction.on_commit(invalidate_aging, using=self.db)
+            for model in flagged:
+                transaction.on_commit(lambda model=model: invalidate_counts(model), using=self.db)
+            if issubclass(self.model, AbstractBaseUser):
+                transaction.on_commit(lambda: [invalidate_cached_user(pk) for pk in pks], using=self.db)
+        return flagged
+
+def _soft_delete(model, pks, now, flagged, using):
+    # Children first, while they can still be found by their parents
+    for relation in model._meta.related_objects:
+        related = relation.related_model
+        if relation.on_delete is models.CASCADE and isinstance(related._default_manager, SoftDeleteManager):
+            children = list(related.all_objects.using(using).filter(
+                **{f'{relation.field.name}__in': pks}, removed=False).values_list('pk', flat=True))
+            if children:
+                _soft_delete(related, children, now, flagged, using)
+    model.all_objects.using(using).filter(pk__in=pks).update(removed=True, updated=now)
+    flagged.setdefault(model, []).extend(pks)
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """
+    Default manager of the models with a ``removed`` flag: leaves removed
+    rows out. Their ``all_objects`` manager (``SoftDeleteQuerySet.as_manager()``)
+    has every row.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(removed=False)
+
+class SoftDeleteMixin:
+    def soft_delete(self):
+        """Flag this row removed, cascading like ``SoftDeleteQuerySet.soft_delete()``."""
+        flagged = type(self).all_objects.filter(pk=self.pk).soft_delete()
+        self.refresh_from_db(fields=['removed', 'updated'])
+        return flagged
+
+class AdminManager(SoftDeleteManager, BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
@@ -25,7 +84,11 @@ class AdminManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
-class Admin(AbstractBaseUser, PermissionsMixin):
+    def get_by_natural_key(self, email):
+        # Removed admins are found, so login can tell them they were removed
+        return self.model.all_objects.get(**{self.model.USERNAME_FIELD: email})
+
+class Admin(SoftDeleteMixin, AbstractBaseUser, PermissionsMixin):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
     name = models.CharField(max_length=255)
@@ -41,6 +104,7 @@ class Admin(AbstractBaseUser, PermissionsMixin):
     updated = models.DateTimeField(auto_now=True)
     
     objects = AdminManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
@@ -52,12 +116,26 @@ class AdminPassword(models.Model):
     user = models.OneToOneField(Admin, on_delete=models.CASCADE, related_name='password_info')
     password_reset_token = models.CharField(max_length=255, blank=True, null=True)
     password_reset_expires = models.DateTimeField(blank=True, null=True)
-    logged_sessions = models.JSONField(default=list)
-    
+
     def __str__(self):
         return f"Password info for {self.user.email}"
 
-class Customer(models.Model):
+class AdminSession(models.Model):
+    """
+    One row per login, keyed by the ``jti`` of its refresh token, which
+    access tokens carry as their ``sid`` claim (see ``api.sessions``).
+    Replaces the old ``AdminPassword.logged_sessions`` list.
+    """
+    jti = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(Admin, on_delete=models.CASCADE, related_name='sessions')
+
+    created = models.DateTimeField(default=timezone.now)
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Session {self.jti} for {self.user_id}"
+
+class Customer(SoftDeleteMixin, models.Model):
     """
     Renamed from Client to avoid confusion with tenant.Client
     """
@@ -77,10 +155,17 @@ class Customer(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        # Keyset order of the changes (sync) endpoints
+        indexes = [models.Index(fields=['updated', 'id'], name='customer_updated_id_idx')]
+    
     def __str__(self):
         return self.name
 
-class PaymentMode(models.Model):
+class PaymentMode(SoftDeleteMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -93,10 +178,16 @@ class PaymentMode(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [models.Index(fields=['updated', 'id'], name='payment_mode_updated_id_idx')]
+    
     def __str__(self):
         return self.name
 
-class Product(models.Model):
+class Product(SoftDeleteMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     reference = models.CharField(max_length=100, blank=True)
@@ -111,10 +202,16 @@ class Product(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [models.Index(fields=['updated', 'id'], name='product_updated_id_idx')]
+    
     def __str__(self):
         return self.name
 
-class Quote(models.Model):
+class Quote(SoftDeleteMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     number = models.CharField(max_length=50)
     year = models.IntegerField()
@@ -131,6 +228,8 @@ class Quote(models.Model):
     note = models.TextField(blank=True)
     status = models.CharField(max_length=50, default='draft')
     pdf = models.CharField(max_length=255, blank=True)
+    # Set once an invoice was made from the quote
+    converted = models.BooleanField(default=False)
     
     created_by = models.ForeignKey(Admin, on_delete=models.SET_NULL, null=True)
     
@@ -140,6 +239,12 @@ class Quote(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [models.Index(fields=['updated', 'id'], name='quote_updated_id_idx')]
+    
     def __str__(self):
         return f"Quote #{self.number} - {self.client.name}"
 
@@ -157,7 +262,7 @@ class QuoteItem(models.Model):
     def __str__(self):
         return f"{self.name} - {self.quote.number}"
 
-class Invoice(models.Model):
+class Invoice(SoftDeleteMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     number = models.CharField(max_length=50)
     year = models.IntegerField()
@@ -185,6 +290,17 @@ class Invoice(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated', 'id'], name='invoice_updated_id_idx'),
+            models.Index(fields=['date'], name='invoice_date_idx'),
+            # Open and overdue invoices past their expiry (api.dunning)
+            models.Index(fields=['status', 'expiry_date'], name='invoice_status_expiry_idx'),
+        ]
+    
     def __str__(self):
         return f"Invoice #{self.number} - {self.client.name}"
 
@@ -202,7 +318,7 @@ class InvoiceItem(models.Model):
     def __str__(self):
         return f"{self.name} - {self.invoice.number}"
 
-class Payment(models.Model):
+class Payment(SoftDeleteMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     number = models.CharField(max_length=50)
     year = models.IntegerField()
@@ -225,6 +341,15 @@ class Payment(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
     
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated', 'id'], name='payment_updated_id_idx'),
+            models.Index(fields=['date'], name='payment_date_idx'),
+        ]
+    
     def __str__(self):
         return f"Payment #{self.number} - {self.client.name}"
 
@@ -234,3 +359,262 @@ class Setting(models.Model):
     
     def __str__(self):
         return self.key
+
+class Counter(models.Model):
+    """
+    Internal counters, kept out of the user-editable Setting table. Writers
+    lock the row with select_for_update() and move ``value`` on.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    
+    updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
+class OutboxEvent(models.Model):
+    """
+    A change to an entity, written in the same transaction as the change
+    and delivered to the webhook endpoints by api.webhooks.
+    """
+    id = models.BigAutoField(primary_key=True)
+    topic = models.CharField(max_length=100)
+    entity_id = models.UUIDField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    # Delivery order, numbered by api.webhooks once the event is committed;
+    # ids are taken before commit and can become visible out of order
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)
+    
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    def __str__(self):
+        return f"{self.topic} {self.entity_id}"
+
+class WebhookEndpoint(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    url = models.URLField(max_length=500)
+    secret = models.CharField(max_length=100)
+    # Topic patterns like "invoice.*"; empty receives every event
+    topics = models.JSONField(default=list, blank=True)
+    
+    enabled = models.BooleanField(default=True)
+    # Sequence of the last outbox event handled, events are delivered in sequence order
+    position = models.BigIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created = models.DateTimeField(default=timezone.now)
+    updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.url
+
+
+def import_upload_path(instance, filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return f'imports/{instance.id}.{extension}'
+
+class ImportJob(models.Model):
+    """
+    A CSV/XLSX file of clients or products being imported by api.imports.
+    ``rows_processed`` only moves forward together with the inserted rows,
+    so a failed or interrupted job resumes where it stopped.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    entity = models.CharField(max_length=50)
+    file = models.FileField(upload_to=import_upload_path, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=50, default='pending')
+    
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True)
+    
+    created_by = models.ForeignKey(Admin, on_delete=models.SET_NULL, null=True)
+    
+    created = models.DateTimeField(default=timezone.now)
+    updated = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Import of {self.entity} from {self.filename}"
+
+class IdempotencyKey(models.Model):
+    """
+    The stored response of a POST sent with an ``Idempotency-Key`` header,
+    replayed to retries of the same request (see api.idempotency).
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(Admin, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    path = models.CharField(max_length=255)
+    
+    # Null until the response is stored
+    status_code = models.PositiveSmallIntegerField(null=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    body = models.BinaryField(default=bytes)
+    
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique')]
+    
+    def __str__(self):
+        return f"{self.key} {self.path}"
+
+class RecurringInvoice(SoftDeleteMixin, models.Model):
+    """
+    A template that api.recurring turns into an invoice every
+    ``interval_count`` ``interval``s, from ``start_date`` until ``end_date``.
+    ``next_date`` is the billing date of the next invoice.
+    """
+    INTERVALS = [('day', 'Day'), ('week', 'Week'), ('month', 'Month'), ('year', 'Year')]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, blank=True)
+    client = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='recurring_invoices')
+    
+    interval = models.CharField(max_length=10, choices=INTERVALS, default='month')
+    interval_count = models.PositiveIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_date = models.DateField()
+    
+    # The invoice's expiry_date is its date plus due_days
+    due_days = models.PositiveIntegerField(default=30)
+    tax_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    note = models.TextField(blank=True)
+    # Queue the invoice email to the client when an invoice is created
+    send_email = models.BooleanField(default=False)
+    
+    created_by = models.ForeignKey(Admin, on_delete=models.SET_NULL, null=True)
+    
+    enabled = models.BooleanField(default=True)
+    removed = models.BooleanField(default=False)
+    
+    created = models.DateTimeField(default=timezone.now)
+    updated = models.DateTimeField(auto_now=True)
+    
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated', 'id'], name='recurring_updated_id_idx'),
+            models.Index(fields=['next_date'], name='recurring_next_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Recurring invoice {self.name or self.id} - {self.client.name}"
+
+class RecurringInvoiceItem(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recurring_invoice = models.ForeignKey(RecurringInvoice, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True)
+    
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=15, decimal_places=2)
+    total = models.DecimalField(max_digits=15, decimal_places=2)
+    
+    def __str__(self):
+        return self.name
+
+class RecurringInvoiceRun(models.Model):
+    """
+    The invoice of one billing date of a recurring invoice. Unique per
+    template and date, so no date is ever invoiced twice.
+    """
+    id = models.BigAutoField(primary_key=True)
+    recurring_invoice = models.ForeignKey(RecurringInvoice, on_delete=models.CASCADE, related_name='runs')
+    date = models.DateField()
+    invoice = models.ForeignKey(Invoice, on_delete=models.SET_NULL, null=True, related_name='+')
+    
+    created = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recurring_invoice', 'date'], name='recurring_run_date_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.recurring_invoice_id} {self.date}"
+
+class MailMessage(models.Model):
+    """
+    An email waiting in the outgoing queue, sent by api.mailer
+    ("manage.py send_queued_mail --loop").
+    """
+    id = models.BigAutoField(primary_key=True)
+    # 'invoice' or 'reminder'
+    kind = models.CharField(max_length=50)
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    invoice = models.ForeignKey(Invoice, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    # 'pending', 'sending', 'sent' or 'failed'
+    status = models.CharField(max_length=20, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # Retry time of a pending message, end of the lease of a sending one
+    next_attempt = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent = models.DateTimeField(null=True, blank=True)
+    
+    created = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'], name='mail_status_id_idx')]
+    
+    def __str__(self):
+        return f"{self.kind} to {self.to}"
+
+class InvoiceReminder(models.Model):
+    """
+    A payment reminder of an overdue invoice, one per step of
+    DUNNING_REMINDER_DAYS (see api.dunning).
+    """
+    id = models.BigAutoField(primary_key=True)
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='reminders')
+    # 1 for the first step of DUNNING_REMINDER_DAYS, ...
+    level = models.PositiveSmallIntegerField()
+    days_overdue = models.PositiveIntegerField()
+    message = models.ForeignKey(MailMessage, on_delete=models.SET_NULL, null=True, related_name='+')
+    
+    created = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['invoice', 'level'], name='invoice_reminder_level_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Reminder {self.level} of {self.invoice_id}"
+
+class ArchivedRecord(models.Model):
+    """
+    A removed row that api.archive deleted from its table, with the rows
+    deleted along with it, as JSON.
+    """
+    id = models.BigAutoField(primary_key=True)
+    # Model label, e.g. "api.invoice"
+    model = models.CharField(max_length=100)
+    object_id = models.UUIDField()
+    # {"fields": {...}, "children": {"api.invoiceitem": [{...}, ...]}}
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    
+    # Last update of the row, i.e. when it was removed
+    removed = models.DateTimeField()
+    archived = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [models.Index(fields=['model', 'object_id'], name='archive_model_object_idx')]
+    
+    def __str__(self):
+        return f"{self.model} {self.object_id}"
@@ -0,0 +1,136 @@
+"""
+N+1 query detection.
+
+Executed SELECTs are grouped by their normalized shape (literals and IN lists
+stripped). When one shape runs more than ``NPLUSONE_THRESHOLD`` times in a
+single request it is reported, together with the serializer field (or project
+code line) that first issued it.
+
+``api.middleware.NPlusOneMiddleware`` checks every request when
+``NPLUSONE_ENABLED`` is on (the default in DEBUG). ``api.test_runner`` turns the
+check on for the test suite and makes findings fail the test; single blocks
+of test code can use ``assert_no_nplusone()``.
+"""
+
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_PROJECT_DIR = str(settings.BASE_DIR)
+_DRF_SERIALIZERS = os.path.join('rest_framework', 'serializers.py')
+# Argument names of a connection.execute_wrapper() callable
+_WRAPPER_ARGS = ('self', 'execute', 'sql', 'params', 'many', 'context')
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def normalize_sql(sql):
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+def _find_origin():
+    """
+    Name the serializer field being rendered when the query ran, falling back
+    to the innermost line of project code.
+    """
+    project_line = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.endswith(_DRF_SERIALIZERS) and frame.f_code.co_name == 'to_representation':
+            field = frame.f_locals.get('field')
+            serializer = frame.f_locals.get('self')
+            if field is not None and serializer is not None:
+                return f'{type(serializer).__name__}.{field.field_name}'
+        if (project_line is None and filename.startswith(_PROJECT_DIR)
+                and 'site-packages' not in filename
+                and frame.f_code.co_varnames[:6] != _WRAPPER_ARGS):
+            project_line = f'{os.path.relpath(filename, _PROJECT_DIR)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return project_line or 'unknown'
+
+
+class QueryShapeRecorder:
+    """Counts SELECTs by shape; used as a connection.execute_wrapper()."""
+
+    def __init__(self):
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            origins = self.shapes.setdefault(normalize_sql(sql), Counter())
+            origins[_find_origin()] += 1
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold=None):
+        """
+        Return ``(shape, count, origins)`` for shapes run more than ``threshold``
+        times; ``origins`` counts the issuing serializer fields or code lines.
+        """
+        if threshold is None:
+            threshold = settings.NPLUSONE_THRESHOLD
+        repeated = []
+        for shape, origins in self.shapes.items():
+            count = sum(origins.values())
+            if count > threshold:
+                repeated.append((shape, count, origins))
+        return repeated
+
+    def report(self, label, threshold=None):
+        repeated = self.repeated(threshold)
+        if not repeated:
+            return None
+
+        lines = [f'Possible N+1 queries in {label}:']
+        for shape, count, origins in sorted(repeated, key=lambda item: -item[1]):
+            sources = ', '.join(f'{origin} ({n}x)' for origin, n in origins.most_common())
+            lines.append(f'  {count}x {shape}')
+            lines.append(f'    from {sources}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def record_query_shapes():
+    recorder = QueryShapeRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+def check_query_shapes(recorder, label):
+    """Log, or raise when ``NPLUSONE_RAISE`` is on, any repeated query shapes."""
+    report = recorder.report(label)
+    if report is None:
+        return
+
+    if settings.NPLUSONE_RAISE:
+        raise NPlusOneError(report)
+    logger.warning(report)
+
+@contextmanager
+def assert_no_nplusone(threshold=None):
+    """Fail if the block runs any query shape more than ``threshold`` times."""
+    with record_query_shapes() as recorder:
+        yield recorder
+
+    report = recorder.report('block', threshold)
+    if report is not None:
+        raise NPlusOneError(report)
+
@@ -0,0 +1,42 @@
+"""
+Transactional outbox of entity changes.
+
+Writes call ``record_event()`` inside the transaction that changes the
+entity, so an event exists exactly when its change was committed. The
+events are pushed to webhook endpoints by ``api.webhooks``.
+"""
+
+from django.conf import settings
+
+from .models import OutboxEvent
+
+# Topics use the API's entity names
+ENTITY_NAMES = {
+    'customer': 'client',
+    'paymentmode': 'paymentMode',
+    'recurringinvoice': 'recurringInvoice',
+}
+
+
+def topic_for(instance, action):
+    model_name = instance._meta.model_name
+    return f'{ENTITY_NAMES.get(model_name, model_name)}.{action}'
+
+def record_event(instance, action, data):
+    """Add a ``<entity>.<action>`` event carrying ``data`` (the serialized entity)."""
+    if not settings.OUTBOX_ENABLED:
+        return None
+    return OutboxEvent.objects.create(
+        topic=topic_for(instance, action),
+        entity_id=instance.pk,
+        payload=data,
+    )
+
+def record_events(instances, action, data):
+    """``record_event()`` for many instances at once, ``data`` in the same order."""
+    if not settings.OUTBOX_ENABLED:
+        return []
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic_for(instance, action), entity_id=instance.pk, payload=payload)
+        for instance, payload in zip(instances, data)
+    ])
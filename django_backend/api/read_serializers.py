@@ -0,0 +1,172 @@
+"""
+values() based read path for list endpoints.
+
+``ValuesSerializer`` compiles a read-only ModelSerializer into a list of
+column mappers once, then builds the output straight from ``values_list()``
+rows: no model instances, no per-row field binding. SerializerMethodFields
+are replaced by the database expressions the serializer declares in its
+``values_annotations`` (e.g. ``{'client_name': F('client__name')}``), and
+nested ``many=True`` serializers of reverse relations are fetched with one
+extra query, like ``prefetch_related``. The rendered JSON is identical to
+the ModelSerializer's.
+"""
+
+import datetime
+import decimal
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+# Fields whose to_representation() returns values() results unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.EmailField, serializers.IntegerField,
+    serializers.BooleanField, serializers.ReadOnlyField,
+)
+
+
+def _decimal_mapper(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if (field.decimal_places is None or not coerce_to_string
+            or field.localize or field.normalize_output):
+        return field.to_representation
+
+    # DecimalField.quantize() without rebuilding the exponent and context per value
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def to_representation(value):
+        if not isinstance(value, decimal.Decimal):
+            return field.to_representation(value)
+        return '{:f}'.format(value.quantize(exponent, rounding=rounding, context=context))
+    return to_representation
+
+def _mapper(field):
+    """Return a callable converting a non-None column value, or None to keep it."""
+    field_class = type(field)
+    if field_class in PASSTHROUGH_FIELDS:
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if field_class is serializers.DecimalField:
+        return _decimal_mapper(field)
+    if field_class is serializers.UUIDField and field.uuid_format == 'hex_verbose':
+        return str
+    if field_class is serializers.DateField:
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format is not None and output_format.lower() == ISO_8601:
+            return datetime.date.isoformat
+    return field.to_representation
+
+
+class ValuesSerializer:
+    def __init__(self, serializer_class):
+        meta = serializer_class.Meta
+        self.model = meta.model
+        annotations = getattr(serializer_class, 'values_annotations', {})
+
+        self.names = []
+        self.columns = []
+        self.mappers = []
+        self.annotations = {}
+        self.nested = []
+
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in annotations:
+                    raise ImproperlyConfigured(
+                        f'{serializer_class.__name__}.values_annotations has no expression for "{name}"')
+                self.annotations[name] = annotations[name]
+                self._add_column(name, name, None)
+            elif isinstance(field, serializers.ListSerializer):
+                relation = self.model._meta.get_field(field.source)
+                if not relation.one_to_many:
+                    raise ImproperlyConfigured(
+                        f'{serializer_class.__name__}.{name} is not a reverse foreign key')
+                child = get_values_serializer(type(field.child))
+                self.nested.append((name, child, relation.field.name))
+                self._add_column(name, None, None)
+            elif isinstance(field, serializers.BaseSerializer) or '.' in field.source or field.source == '*':
+                raise ImproperlyConfigured(
+                    f'{serializer_class.__name__}.{name} cannot be read from values()')
+            else:
+                self._add_column(name, field.source, _mapper(field))
+
+        self.pk_index = None
+        if self.nested:
+            pk_name = self.model._meta.pk.name
+            if pk_name not in self.columns:
+                self.columns.append(pk_name)
+            self.pk_index = self.columns.index(pk_name)
+
+    def _add_column(self, name, column, mapper):
+        self.names.append(name)
+        if column is None:
+            self.mappers.append((None, None))
+            return
+        self.mappers.append((len(self.columns), mapper))
+        self.columns.append(column)
+
+    def rows(self, queryset):
+        """values_list() tuples of the queryset, in ``self.columns`` order."""
+        queryset = queryset.prefetch_related(None)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values_list(*self.columns)
+
+    def serialize(self, queryset):
+        return self.serialize_rows(list(self.rows(queryset)))
+
+    def serialize_rows(self, rows):
+        nested = [self._fetch_nested(rows, child, field_name) for _, child, field_name in self.nested]
+
+        data = []
+        names = self.names
+        mappers = self.mappers
+        for row in rows:
+            item = {}
+            nested_index = 0
+            for name, (index, mapper) in zip(names, mappers):
+                if index is None:
+                    item[name] = nested[nested_index].get(row[self.pk_index], [])
+                    nested_index += 1
+                    continue
+                value = row[index]
+                if mapper is not None and value is not None:
+                    value = mapper(value)
+                item[name] = value
+            data.append(item)
+        return data
+
+    def _fetch_nested(self, rows, child, field_name):
+        """Serialized children of ``rows`` grouped by parent pk."""
+        if not rows:
+            return {}
+
+        parent_ids = [row[self.pk_index] for row in rows]
+        queryset = child.model._default_manager.filter(**{f'{field_name}__in': parent_ids})
+        if child.annotations:
+            queryset = queryset.annotate(**child.annotations)
+        child_rows = list(queryset.values_list(field_name, *child.columns))
+
+        grouped = {}
+        for parent_id, item in zip(
+                (row[0] for row in child_rows),
+                child.serialize_rows([row[1:] for row in child_rows])):
+            grouped.setdefault(parent_id, []).append(item)
+        return grouped
+
+
+@lru_cache(maxsize=None)
+def get_values_serializer(serializer_class):
+    return ValuesSerializer(serializer_class)
+
+def supports_values(serializer_class):
+    return hasattr(serializer_class, 'values_annotations')
@@ -0,0 +1,219 @@
+"""
+Recurring invoices.
+
+``materialize_due()`` ("manage.py run_recurring_invoices --loop") turns the
+recurring invoices whose ``next_date`` has come into invoices, in batches of
+RECURRING_BATCH_SIZE templates. A batch is one transaction of set-based
+statements: the due templates are locked, skipping those another worker
+holds, and read with their items in two queries; the invoice numbers are
+taken from the ``invoice_number`` Counter row, locked; the invoices, their items and their runs are inserted with one ``bulk_create``
+each, and the templates' ``next_date`` with one ``bulk_update``. A template
+that fell behind gets one invoice per missed billing date.
+
+Every invoice is recorded as a RecurringInvoiceRun, unique per template and
+billing date, in the same transaction that moves ``next_date`` on; dates
+that already have a run are skipped, so a rerun never invoices a date twice.
+"""
+
+import calendar
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, F, Max, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .counts import invalidate_counts
+from .mailer import queue_invoice_mails
+from .models import (
+    Counter, Invoice, InvoiceItem, RecurringInvoice, RecurringInvoiceItem, RecurringInvoiceRun, Setting,
+)
+from .outbox import record_events
+from .reports import CENT, invalidate_aging
+from .serializers import InvoiceSerializer
+
+COPIED_ITEM_FIELDS = ('product_id', 'name', 'description', 'quantity', 'price', 'total')
+# Billing dates of one template per batch; a template further behind is
+# picked up again by the next batch
+MAX_DATES_PER_BATCH = 100
+INVOICE_NUMBER_COUNTER = 'invoice_number'
+# Invoices numbered by hand are looked for this far before the counter last
+# moved, for transactions that were still open then
+NUMBER_SCAN_OVERLAP = datetime.timedelta(minutes=5)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year = day.year + month // 12
+    month = month % 12 + 1
+    # Billing on the 31st falls on the last day of shorter months
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+def billing_date(recurring, n):
+    """The ``n``-th billing date of ``recurring``, counted from its start_date (0)."""
+    step = n * recurring.interval_count
+    if recurring.interval == 'day':
+        return recurring.start_date + datetime.timedelta(days=step)
+    if recurring.interval == 'week':
+        return recurring.start_date + datetime.timedelta(weeks=step)
+    if recurring.interval == 'year':
+        return add_months(recurring.start_date, 12 * step)
+    return add_months(recurring.start_date, step)
+
+def next_billing_date(recurring, after):
+    """The first billing date of ``recurring`` after ``after``."""
+    start = recurring.start_date
+    # Start from a lower bound of the number of intervals in between
+    if recurring.interval in ('day', 'week'):
+        days = 7 if recurring.interval == 'week' else 1
+        n = (after - start).days // (days * recurring.interval_count)
+    else:
+        months = 12 if recurring.interval == 'year' else 1
+        n = ((after.year - start.year) * 12 + after.month - start.month) // (months * recurring.interval_count) - 1
+    n = max(n, 0)
+    while (date := billing_date(recurring, n)) <= after:
+        n += 1
+    return date
+
+def due_dates(recurring, today):
+    """The billing dates of ``recurring`` from its next_date up to ``today``."""
+    dates = []
+    date = recurring.next_date
+    while (date <= today and (recurring.end_date is None or date <= recurring.end_date)
+           and len(dates) < MAX_DATES_PER_BATCH):
+        dates.append(date)
+        date = next_billing_date(recurring, date)
+    return dates, date
+
+def highest_invoice_number(since=None):
+    """
+    The highest all-digit invoice number, among the invoices saved since
+    ``since`` if given (found through the ``(updated, id)`` index).
+    """
+    invoices = Invoice.all_objects.filter(number__regex=r'^[0-9]{1,18}$')
+    if since is not None:
+        invoices = invoices.filter(updated__gte=since)
+    return invoices.aggregate(last=Max(Cast('number', BigIntegerField())))['last'] or 0
+
+def _configured_last_number():
+    value = Setting.objects.filter(key='last_invoice_number').values_list('value', flat=True).first()
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+def allocate_invoice_numbers(count):
+    """
+    Reserve ``count`` consecutive invoice numbers; must run in a transaction.
+    They follow the counter, the ``last_invoice_number`` setting and any
+    higher number given to an invoice by hand since the counter last moved.
+    """
+    counter, created = Counter.objects.select_for_update().get_or_create(key=INVOICE_NUMBER_COUNTER)
+    # A new counter looks at every invoice once
+    since = None if created else counter.updated - NUMBER_SCAN_OVERLAP
+    first = max(counter.value, highest_invoice_number(since), _configured_last_number()) + 1
+    counter.value = first + count - 1
+    counter.save(update_fields=['value', 'updated'])
+    return range(first, first + count)
+
+def build_invoice(recurring, items, date, number):
+    sub_total = sum((item['total'] for item in items), Decimal(0))
+    tax_total = (sub_total * recurring.tax_rate / 100).quantize(CENT)
+    invoice = Invoice(
+        number=str(number),
+        year=date.year,
+        date=date,
+        expiry_date=date + datetime.timedelta(days=recurring.due_days),
+        client_id=recurring.client_id,
+        sub_total=sub_total,
+        tax_rate=recurring.tax_rate,
+        tax_total=tax_total,
+        discount=0,
+        total=sub_total + tax_total,
+        credit=0,
+        note=recurring.note,
+        status='pending',
+        created_by_id=recurring.created_by_id,
+    )
+    invoice.pdf = f"invoice-{invoice.id}.pdf"
+    return invoice
+
+def due_queryset(today):
+    return (RecurringInvoice.objects
+            .filter(enabled=True, next_date__lte=today)
+            .filter(Q(end_date__isnull=True) | Q(end_date__gte=F('next_date'))))
+
+def materialize_batch(today, batch_size):
+    """
+    Invoice the billing dates up to ``today`` of the next ``batch_size`` due
+    recurring invoices. Returns ``(templates, invoices)``, the numbers of
+    templates handled and of invoices created.
+    """
+    with transaction.atomic():
+        # Concurrent workers take different templates
+        templates = list(due_queryset(today).select_for_update(skip_locked=True).order_by('next_date', 'id')[:batch_size])
+        if not templates:
+            return 0, 0
+
+        items = defaultdict(list)
+        for item in (RecurringInvoiceItem.objects.filter(recurring_invoice__in=templates)
+                     .values('recurring_invoice_id', *COPIED_ITEM_FIELDS)):
+            items[item.pop('recurring_invoice_id')].append(item)
+
+        dates = {}
+        for template in templates:
+            dates[template.id], template.next_date = due_dates(template, today)
+        invoiced = set(RecurringInvoiceRun.objects
+                       .filter(recurring_invoice__in=templates, date__lte=today)
+                       .values_list('recurring_invoice_id', 'date'))
+        due = [(template, date) for template in templates for date in dates[template.id]
+               if (template.id, date) not in invoiced]
+
+        invoices, invoice_items, runs = [], [], []
+        for (template, date), number in zip(due, allocate_invoice_numbers(len(due)) if due else ()):
+            invoice = build_invoice(template, items[template.id], date, number)
+            invoices.append(invoice)
+            invoice_items += [InvoiceItem(invoice=invoice, **item) for item in items[template.id]]
+            runs.append(RecurringInvoiceRun(recurring_invoice=template, date=date, invoice=invoice))
+        Invoice.objects.bulk_create(invoices)
+        InvoiceItem.objects.bulk_create(invoice_items)
+        RecurringInvoiceRun.objects.bulk_create(runs)
+
+        now = timezone.now()
+        for template in templates:
+            template.updated = now
+        RecurringInvoice.objects.bulk_update(templates, ['next_date', 'updated'])
+        transaction.on_commit(lambda: invalidate_counts(RecurringInvoice))
+
+        if invoices:
+            queryset = InvoiceSerializer.setup_eager_loading(Invoice.objects.filter(id__in=[i.id for i in invoices]))
+            by_id = {invoice.id: invoice for invoice in queryset}
+            created = [by_id[invoice.id] for invoice in invoices]
+            record_events(created, 'created', InvoiceSerializer(created, many=True).data)
+
+            mailed = {template.id for template in templates if template.send_email}
+            queue_invoice_mails([invoice for invoice, run in zip(created, runs)
+                                 if run.recurring_invoice_id in mailed])
+
+            # bulk_create sends no signals
+            transaction.on_commit(invalidate_aging)
+            transaction.on_commit(lambda: invalidate_counts(Invoice))
+
+    return len(templates), len(invoices)
+
+def materialize_due(today=None):
+    """
+    Invoice every due recurring invoice of the current tenant, batch after
+    batch; returns ``(templates, invoices)`` like ``materialize_batch()``.
+    """
+    today = today or timezone.localdate()
+    handled = created = 0
+    while True:
+        templates, invoices = materialize_batch(today, settings.RECURRING_BATCH_SIZE)
+        if not templates:
+            return handled, created
+        handled += templates
+        created += invoices
@@ -0,0 +1,312 @@
+"""
+Accounts-receivable reports.
+
+The client ledger merges a client's invoices (debits) and payments
+(credits) into one chronological stream with a running balance. The
+database computes the balance with a window function over the whole
+ledger, and pages are cut by keyset on ``(date, created, id)``, so every
+page costs the same however deep it is.
+
+The revenue series sums invoiced, outstanding (``total - credit``) and
+collected amounts per day, week or month in one query: the grouped
+invoices and the grouped payments are combined with UNION ALL, and the
+periods without documents are filled in with zeros.
+
+The aging report buckets what clients still owe (``total - credit`` of
+their invoices) by how many days the invoice is past its ``expiry_date``,
+in one grouped query. Reports are cached; the cache keys carry a
+generation number that every invoice, payment or client write bumps (see
+``api.signals``), so a cached report never outlives a change to the data
+behind it. With django-tenants the cache keys are prefixed with the tenant
+schema, so every tenant has its own reports and generation.
+"""
+
+import base64
+import binascii
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import Case, CharField, DateField, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+from .models import Invoice, Payment
+from .sync import InvalidCursor
+
+AGING_GENERATION_KEY = 'ar_aging:generation'
+# (name, fewest days past due, most days past due)
+AGING_BUCKETS = (
+    ('days_1_30', 1, 30),
+    ('days_31_60', 31, 60),
+    ('days_61_90', 61, 90),
+    ('days_over_90', 91, None),
+)
+AGING_COLUMNS = ('current',) + tuple(name for name, _, _ in AGING_BUCKETS) + ('total',)
+
+# Invoices add to the balance, payments reduce it. The balance runs over the
+# whole ledger; the outer query only cuts the page
+LEDGER_SQL = """
+    SELECT kind, id, number, year, date, created, debit, credit, balance, closing
+    FROM (
+        SELECT entries.*,
+            SUM(debit - credit) OVER (
+                ORDER BY date, created, id ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+            ) AS balance,
+            SUM(debit - credit) OVER () AS closing
+        FROM (
+            SELECT 'invoice' AS kind, id, number, year, date, created, total AS debit, 0 AS credit
+            FROM {invoice} WHERE client_id = %s AND removed = %s
+            UNION ALL
+            SELECT 'payment', id, number, year, date, created, 0, amount
+            FROM {payment} WHERE client_id = %s AND removed = %s
+        ) entries
+    ) ledger
+    {after}
+    ORDER BY date, created, id
+    LIMIT %s
+"""
+LEDGER_COLUMNS = ('kind', 'id', 'number', 'year', 'date', 'created', 'debit', 'credit', 'balance', 'closing')
+
+REVENUE_INTERVALS = ('day', 'week', 'month')
+REVENUE_AMOUNTS = ('invoiced', 'outstanding', 'collected')
+# split -> (the model it splits, its group field)
+REVENUE_SPLITS = {
+    'status': (Invoice, 'status'),
+    'payment_mode': (Payment, 'payment_mode__name'),
+}
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    # SQLite sums decimals as floats
+    return Decimal(value or 0).quantize(CENT)
+
+def encode_ledger_cursor(entry):
+    value = f"{entry['date']}|{entry['created']}|{entry['id']}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+def decode_ledger_cursor(cursor):
+    try:
+        date, created, id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.date.fromisoformat(date), datetime.datetime.fromisoformat(created), uuid.UUID(id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+
+def ledger_page(client, limit, cursor=None):
+    """
+    Up to ``limit`` ledger entries of ``client`` after ``cursor`` (a
+    ``(date, created, id)`` triple), and the client's closing balance.
+    Fetches one entry more than ``limit`` so callers can tell whether
+    another page follows.
+    """
+    alias = router.db_for_read(Invoice)
+    connection = connections[alias]
+    fields = {name: Invoice._meta.get_field(name) for name in ('id', 'number', 'year', 'date', 'created')}
+
+    def prep(name, value):
+        return fields[name].get_db_prep_value(value, connection)
+
+    client_id = prep('id', client.pk)
+    params = [client_id, False, client_id, False]
+    after = ''
+    if cursor is not None:
+        date, created, id = cursor
+        after = 'WHERE (date, created, id) > (%s, %s, %s)'
+        params += [prep('date', date), prep('created', created), prep('id', id)]
+    params.append(limit + 1)
+
+    sql = LEDGER_SQL.format(
+        invoice=connection.ops.quote_name(Invoice._meta.db_table),
+        payment=connection.ops.quote_name(Payment._meta.db_table),
+        after=after,
+    )
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+
+    entries = []
+    closing = None
+    for row in rows:
+        row = dict(zip(LEDGER_COLUMNS, row))
+        created = fields['created'].to_python(row['created'])
+        if settings.USE_TZ and timezone.is_naive(created):
+            # SQLite returns stored UTC datetimes as naive strings
+            created = timezone.make_aware(created, datetime.timezone.utc)
+        closing = row['closing']
+        entries.append({
+            'kind': row['kind'],
+            'id': str(fields['id'].to_python(row['id'])),
+            'number': row['number'],
+            'year': row['year'],
+            'date': fields['date'].to_python(row['date']).isoformat(),
+            'created': created.isoformat(),
+            'debit': _money(row['debit']),
+            'credit': _money(row['credit']),
+            'balance': _money(row['balance']),
+        })
+
+    if closing is None:
+        # Past the last entry; the window gave no row to read it from
+        totals = (Invoice.objects.using(alias).filter(client=client).aggregate(total=Sum('total')),
+                  Payment.objects.using(alias).filter(client=client).aggregate(total=Sum('amount')))
+        closing = (totals[0]['total'] or 0) - (totals[1]['total'] or 0)
+
+    return entries, _money(closing)
+
+def period_start(day, interval):
+    if interval == 'week':
+        # Weeks start on Monday, as with the databases' week truncation
+        return day - datetime.timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+def next_period(period, interval):
+    if interval == 'week':
+        return period + datetime.timedelta(days=7)
+    if interval == 'month':
+        return (period + datetime.timedelta(days=32)).replace(day=1)
+    return period + datetime.timedelta(days=1)
+
+def revenue_periods(start, end, interval):
+    period = period_start(start, interval)
+    while period <= end:
+        yield period
+        period = next_period(period, interval)
+
+def _grouped(model, start, end, interval, split, **amounts):
+    zero = Value(0, output_field=MONEY)
+    if split is not None and REVENUE_SPLITS[split][0] is model:
+        group = Coalesce(F(REVENUE_SPLITS[split][1]), Value(''), output_field=CharField())
+    else:
+        group = Value('', output_field=CharField())
+    return (model.objects
+            .filter(date__gte=start, date__lte=end)
+            .annotate(period=Trunc('date', interval, output_field=DateField()), group=group,
+                      source=Value(model._meta.model_name, output_field=CharField()))
+            .values('period', 'group', 'source')
+            .annotate(**{name: amounts.get(name, zero) for name in REVENUE_AMOUNTS}))
+
+def revenue_series(start, end, interval='month', split=None):
+    """
+    Invoiced, outstanding and collected amounts per ``interval`` from
+    ``start`` to ``end`` (dates, inclusive), oldest first. With ``split``
+    ('status' or 'payment_mode') every period also carries the invoiced and
+    outstanding amounts per invoice status, or the collected amounts per
+    payment mode, under ``groups``.
+    """
+    invoices = _grouped(Invoice, start, end, interval, split,
+                        invoiced=Sum('total'), outstanding=Sum(F('total') - F('credit'), output_field=MONEY))
+    payments = _grouped(Payment, start, end, interval, split, collected=Sum('amount'))
+
+    series = {}
+    for period in revenue_periods(start, end, interval):
+        series[period] = {'period': period.isoformat(), **{name: _money(0) for name in REVENUE_AMOUNTS}}
+        if split is not None:
+            series[period]['groups'] = {}
+    split_source = REVENUE_SPLITS[split][0]._meta.model_name if split is not None else None
+
+    for row in invoices.union(payments, all=True):
+        # Trunc gives a datetime on some backends
+        period = row['period'].date() if isinstance(row['period'], datetime.datetime) else row['period']
+        bucket = series[period_start(period, interval)]
+        amounts = {name: _money(row[name]) for name in REVENUE_AMOUNTS}
+        for name, amount in amounts.items():
+            bucket[name] += amount
+        if row['source'] == split_source:
+            names = ('collected',) if split_source == 'payment' else ('invoiced', 'outstanding')
+            group = bucket['groups'].setdefault(row['group'], {name: _money(0) for name in names})
+            for name in names:
+                group[name] += amounts[name]
+
+    return list(series.values())
+
+def _generation():
+    generation = cache.get(AGING_GENERATION_KEY)
+    if generation is None:
+        generation = 1
+        cache.add(AGING_GENERATION_KEY, generation, None)
+    return generation
+
+def invalidate_aging():
+    """Drop every cached aging report of the current tenant."""
+    try:
+        cache.incr(AGING_GENERATION_KEY)
+    except ValueError:
+        # Not cached yet (or evicted): no report can refer to it
+        cache.add(AGING_GENERATION_KEY, 1, None)
+
+def _outstanding(as_of):
+    # Payments dated after the as-of date were not received yet on that day
+    later_payments = (Payment.objects
+                      .filter(invoice=OuterRef('pk'), date__gt=as_of)
+                      .values('invoice')
+                      .annotate(amount=Sum('amount'))
+                      .values('amount'))
+    return F('total') - F('credit') + Coalesce(Subquery(later_payments, output_field=MONEY), Value(0, output_field=MONEY))
+
+def _bucket_sum(condition):
+    return Coalesce(
+        Sum(Case(When(condition, then=F('outstanding')), default=Value(0), output_field=MONEY)),
+        Value(0, output_field=MONEY),
+    )
+
+def aging_rows(as_of, client=None):
+    """
+    Outstanding amounts per client as of ``as_of``, one dict per client with
+    a balance, largest total first.
+    """
+    # Compare with cut-off dates instead of computing day differences, which
+    # keeps the query portable and lets expiry_date be compared directly
+    columns = {'current': _bucket_sum(Q(expiry_date__isnull=True) | Q(expiry_date__gte=as_of))}
+    for name, low, high in AGING_BUCKETS:
+        condition = Q(expiry_date__lte=as_of - datetime.timedelta(days=low))
+        if high is not None:
+            condition &= Q(expiry_date__gte=as_of - datetime.timedelta(days=high))
+        columns[name] = _bucket_sum(condition)
+    columns['total'] = Coalesce(Sum('outstanding'), Value(0, output_field=MONEY))
+
+    invoices = Invoice.objects.filter(date__lte=as_of)
+    if client is not None:
+        invoices = invoices.filter(client=client)
+
+    rows = (invoices
+            .annotate(outstanding=_outstanding(as_of))
+            .filter(outstanding__gt=0)
+            .values('client_id', 'client__name')
+            .annotate(**columns)
+            .order_by('-total', 'client__name'))
+
+    return [
+        {
+            'client': {'id': str(row['client_id']), 'name': row['client__name']},
+            **{name: _money(row[name]) for name in AGING_COLUMNS},
+        }
+        for row in rows
+    ]
+
+def aging_report(as_of, client=None):
+    """The aging report for ``as_of`` (a date), from the cache when possible."""
+    key = f"ar_aging:{_generation()}:{as_of.isoformat()}:{client or 'all'}"
+    timeout = settings.AR_AGING_CACHE_TIMEOUT
+    if timeout:
+        report = cache.get(key)
+        if report is not None:
+            return report
+
+    rows = aging_rows(as_of, client)
+    report = {
+        'date': as_of.isoformat(),
+        'clients': rows,
+        'totals': {name: sum((row[name] for row in rows), Decimal(0)) for name in AGING_COLUMNS},
+    }
+
+    if timeout:
+        cache.set(key, report, timeout)
+    return report
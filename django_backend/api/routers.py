@@ -0,0 +1,127 @@
+"""
+Read replica routing.
+
+``ReplicaRouter`` sends the reads of GET/HEAD/OPTIONS requests to one of the
+``REPLICA_DATABASES`` and everything else to ``default``. It sits in front
+of ``django_tenants.routers.TenantSyncRouter``, which still decides where
+migrations run; replicas are never migrated.
+
+Reads stay on the primary:
+
+- outside requests (management commands, shell) and in unsafe requests;
+- for the rest of a request once it has written, and for REPLICA_PIN_SECONDS
+  afterwards for the same client (read-your-writes, tracked in the cache);
+- inside transactions on the primary;
+- for authentication models, so revoked sessions and disabled admins apply
+  immediately;
+- when every replica lags more than REPLICA_MAX_LAG seconds or is down
+  (checked at most every REPLICA_LAG_CHECK_INTERVAL seconds per replica).
+"""
+
+import contextvars
+import hashlib
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Models whose reads must never be stale
+PRIMARY_MODELS = {'api.admin', 'api.adminpassword', 'api.adminsession'}
+
+# PostgreSQL standby lag in seconds; 0 when it has replayed everything received
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class RoutingState:
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+# alias -> (checked at, usable)
+_replica_status = {}
+
+
+def start_routing(use_replicas):
+    state = RoutingState(use_replicas)
+    return state, _state.set(state)
+
+def end_routing(token):
+    _state.reset(token)
+
+def pin_key(request):
+    """Cache key of the read-your-writes pin of the requesting client."""
+    client = request.META.get('HTTP_AUTHORIZATION') or request.META.get('REMOTE_ADDR', '')
+    return 'replica_pin:' + hashlib.sha256(client.encode()).hexdigest()
+
+def replica_lag(alias):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+def is_replica_usable(alias):
+    now = time.monotonic()
+    status = _replica_status.get(alias)
+    if status and now - status[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return status[1]
+
+    try:
+        lag = replica_lag(alias)
+    except DatabaseError as e:
+        logger.warning('Replica %s is unavailable: %s', alias, e)
+        usable = False
+    else:
+        usable = lag <= settings.REPLICA_MAX_LAG
+        if not usable:
+            logger.warning('Replica %s lags %.1fs behind, reading from the primary', alias, lag)
+
+    _replica_status[alias] = (now, usable)
+    return usable
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replicas or state.wrote:
+            return None
+        if model._meta.label_lower in PRIMARY_MODELS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        replicas = [alias for alias in settings.REPLICA_DATABASES if is_replica_usable(alias)]
+        if not replicas:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -1,16 +1,48 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import (
     Admin, AdminPassword, Customer, PaymentMode, Product, 
-    Quote, QuoteItem, Invoice, InvoiceItem, Payment, Setting
+    Quote, QuoteItem, Invoice, InvoiceItem, Payment, Setting, ImportJob,
+    RecurringInvoice, RecurringInvoiceItem, InvoiceReminder
 )
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F
 import uuid
+from .outbox import record_event
+
+# Removed admins keep their email, the default manager leaves them out
+UNIQUE_ADMIN_EMAIL = {'validators': [UniqueValidator(queryset=Admin.all_objects.all())]}
+
+class ChangedFieldsMixin:
+    """
+    ``update()`` that assigns and saves only the fields whose value changed,
+    instead of writing every column; ``changed_fields`` lists them.
+    """
+    changed_fields = ()
+    
+    def update(self, instance, validated_data):
+        changed = []
+        for name, value in validated_data.items():
+            field = instance._meta.get_field(name)
+            # Compare foreign keys by id, without loading the related row
+            current = getattr(instance, field.attname)
+            new = value.pk if field.is_relation and value is not None else value
+            if current != new:
+                setattr(instance, name, value)
+                changed.append(name)
+        
+        if changed:
+            instance.save(update_fields=[*changed, 'updated'])
+        self.changed_fields = changed
+        return instance
 
 class AdminSerializer(serializers.ModelSerializer):
     class Meta:
         model = Admin
         fields = ['id', 'email', 'name', 'surname', 'photo', 'enabled', 'created', 'updated']
         read_only_fields = ['id', 'created', 'updated']
+        extra_kwargs = {'email': UNIQUE_ADMIN_EMAIL}
 
 class AdminCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
@@ -19,6 +51,7 @@ class AdminCreateSerializer(serializers.ModelSerializer):
         model = Admin
         fields = ['id', 'email', 'name', 'surname', 'password', 'photo', 'enabled']
         read_only_fields = ['id']
+        extra_kwargs = {'email': UNIQUE_ADMIN_EMAIL}
     
     def create(self, validated_data):
         password = validated_data.pop('password')
@@ -27,11 +60,11 @@ class AdminCreateSerializer(serializers.ModelSerializer):
         admin.save()
         
         # Create AdminPassword record
-        AdminPassword.objects.create(user=admin, logged_sessions=[])
+        AdminPassword.objects.create(user=admin)
         
         return admin
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
     assigned_name = serializers.SerializerMethodField()
     
@@ -42,6 +75,16 @@ class CustomerSerializer(serializers.ModelSerializer):
                   'enabled', 'removed', 'created', 'updated']
         read_only_fields = ['id', 'created', 'updated', 'created_by_name', 'assigned_name']
     
+    # values() read path of list views (api.read_serializers)
+    values_annotations = {
+        'created_by_name': F('created_by__name'),
+        'assigned_name': F('assigned__name'),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('created_by', 'assigned')
+    
     def get_created_by_name(self, obj):
         if obj.created_by:
             return obj.created_by.name
@@ -52,7 +95,7 @@ class CustomerSerializer(serializers.ModelSerializer):
             return obj.assigned.name
         return None
 
-class PaymentModeSerializer(serializers.ModelSerializer):
+class PaymentModeSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -61,12 +104,16 @@ class PaymentModeSerializer(serializers.ModelSerializer):
                   'enabled', 'removed', 'created', 'updated']
         read_only_fields = ['id', 'created', 'updated', 'created_by_name']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('created_by')
+    
     def get_created_by_name(self, obj):
         if obj.created_by:
             return obj.created_by.name
         return None
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -76,6 +123,12 @@ class ProductSerializer(serializers.ModelSerializer):
                   'created', 'updated']
         read_only_fields = ['id', 'created', 'updated', 'created_by_name']
     
+    values_annotations = {'created_by_name': F('created_by__name')}
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('created_by')
+    
     def get_created_by_name(self, obj):
         if obj.created_by:
             return obj.created_by.name
@@ -86,9 +139,9 @@ class QuoteItemSerializer(serializers.ModelSerializer):
         model = QuoteItem
         fields = ['id', 'quote', 'product', 'name', 'description', 
                   'quantity', 'price', 'total']
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'quote']
 
-class QuoteSerializer(serializers.ModelSerializer):
+class QuoteSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     items = QuoteItemSerializer(many=True, read_only=True)
     client_name = serializers.SerializerMethodField()
     created_by_name = serializers.SerializerMethodField()
@@ -97,9 +150,18 @@ class QuoteSerializer(serializers.ModelSerializer):
         model = Quote
         fields = ['id', 'number', 'year', 'date', 'expiry_date', 'client', 'client_name',
                   'sub_total', 'tax_rate', 'tax_total', 'discount', 'total',
-                  'note', 'status', 'pdf', 'items', 'created_by', 'created_by_name',
+                  'note', 'status', 'pdf', 'converted', 'items', 'created_by', 'created_by_name',
                   'enabled', 'removed', 'created', 'updated']
-        read_only_fields = ['id', 'created', 'updated', 'client_name', 'created_by_name']
+        read_only_fields = ['id', 'converted', 'created', 'updated', 'client_name', 'created_by_name']
+    
+    values_annotations = {
+        'client_name': F('client__name'),
+        'created_by_name': F('created_by__name'),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('client', 'created_by').prefetch_related('items')
     
     def get_client_name(self, obj):
         return obj.client.name if obj.client else None
@@ -138,9 +200,9 @@ class InvoiceItemSerializer(serializers.ModelSerializer):
         model = InvoiceItem
         fields = ['id', 'invoice', 'product', 'name', 'description', 
                   'quantity', 'price', 'total']
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'invoice']
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     items = InvoiceItemSerializer(many=True, read_only=True)
     client_name = serializers.SerializerMethodField()
     created_by_name = serializers.SerializerMethodField()
@@ -153,6 +215,15 @@ class InvoiceSerializer(serializers.ModelSerializer):
                   'enabled', 'removed', 'created', 'updated']
         read_only_fields = ['id', 'created', 'updated', 'client_name', 'created_by_name']
     
+    values_annotations = {
+        'client_name': F('client__name'),
+        'created_by_name': F('created_by__name'),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('client', 'created_by').prefetch_related('items')
+    
     def get_client_name(self, obj):
         return obj.client.name if obj.client else None
     
@@ -185,7 +256,7 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
         
         return invoice
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
     client_name = serializers.SerializerMethodField()
     invoice_number = serializers.SerializerMethodField()
     payment_mode_name = serializers.SerializerMethodField()
@@ -199,6 +270,17 @@ class PaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created', 'updated', 'client_name', 'invoice_number', 
                            'payment_mode_name', 'created_by_name']
     
+    values_annotations = {
+        'client_name': F('client__name'),
+        'invoice_number': F('invoice__number'),
+        'payment_mode_name': F('payment_mode__name'),
+        'created_by_name': F('created_by__name'),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('client', 'invoice', 'payment_mode', 'created_by')
+    
     def get_client_name(self, obj):
         return obj.client.name if obj.client else None
     
@@ -220,6 +302,7 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
                   'invoice', 'client', 'note', 'ref', 'created_by']
         read_only_fields = ['id']
     
+    @transaction.atomic
     def create(self, validated_data):
         payment = Payment.objects.create(**validated_data)
         
@@ -232,11 +315,106 @@ class PaymentCreateSerializer(serializers.ModelSerializer):
         invoice = payment.invoice
         if invoice:
             invoice.credit = invoice.credit + payment.amount
+            if invoice.status == 'overdue' and invoice.credit >= invoice.total:
+                # Settled, no longer counted or reminded as overdue
+                invoice.status = 'paid'
             invoice.save()
+            # The payment's own event is recorded by the view
+            record_event(invoice, 'updated', InvoiceSerializer(invoice).data)
         
         return payment
 
+class RecurringInvoiceItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecurringInvoiceItem
+        fields = ['id', 'recurring_invoice', 'product', 'name', 'description',
+                  'quantity', 'price', 'total']
+        read_only_fields = ['id', 'recurring_invoice']
+
+def validate_schedule(data, instance=None):
+    start_date = data.get('start_date', getattr(instance, 'start_date', None))
+    end_date = data.get('end_date', getattr(instance, 'end_date', None))
+    if end_date and start_date and end_date < start_date:
+        raise serializers.ValidationError({'end_date': 'end_date must not be before start_date'})
+    if data.get('interval_count') == 0:
+        raise serializers.ValidationError({'interval_count': 'interval_count must be at least 1'})
+    return data
+
+class RecurringInvoiceSerializer(ChangedFieldsMixin, serializers.ModelSerializer):
+    items = RecurringInvoiceItemSerializer(many=True, read_only=True)
+    client_name = serializers.SerializerMethodField()
+    created_by_name = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = RecurringInvoice
+        fields = ['id', 'name', 'client', 'client_name', 'interval', 'interval_count',
+                  'start_date', 'end_date', 'next_date', 'due_days', 'tax_rate', 'note',
+                  'send_email', 'items', 'created_by', 'created_by_name',
+                  'enabled', 'removed', 'created', 'updated']
+        read_only_fields = ['id', 'created', 'updated', 'client_name', 'created_by_name']
+    
+    values_annotations = {
+        'client_name': F('client__name'),
+        'created_by_name': F('created_by__name'),
+    }
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('client', 'created_by').prefetch_related('items')
+    
+    def validate(self, data):
+        return validate_schedule(data, self.instance)
+    
+    def get_client_name(self, obj):
+        return obj.client.name if obj.client else None
+    
+    def get_created_by_name(self, obj):
+        if obj.created_by:
+            return obj.created_by.name
+        return None
+
+class RecurringInvoiceCreateSerializer(serializers.ModelSerializer):
+    items = RecurringInvoiceItemSerializer(many=True)
+    
+    class Meta:
+        model = RecurringInvoice
+        fields = ['id', 'name', 'client', 'interval', 'interval_count', 'start_date', 'end_date',
+                  'next_date', 'due_days', 'tax_rate', 'note', 'send_email', 'items', 'created_by']
+        read_only_fields = ['id']
+        # The first invoice is due on start_date unless told otherwise
+        extra_kwargs = {'next_date': {'required': False}}
+    
+    def validate(self, data):
+        return validate_schedule(data)
+    
+    def create(self, validated_data):
+        items_data = validated_data.pop('items')
+        validated_data.setdefault('next_date', validated_data['start_date'])
+        recurring_invoice = RecurringInvoice.objects.create(**validated_data)
+        
+        RecurringInvoiceItem.objects.bulk_create([
+            RecurringInvoiceItem(recurring_invoice=recurring_invoice, **item_data) for item_data in items_data
+        ])
+        
+        return recurring_invoice
+
+class InvoiceReminderSerializer(serializers.ModelSerializer):
+    # Queue state of the reminder email: pending, sent or failed
+    mail_status = serializers.CharField(source='message.status', default=None, read_only=True)
+    
+    class Meta:
+        model = InvoiceReminder
+        fields = ['id', 'invoice', 'level', 'days_overdue', 'mail_status', 'created']
+        read_only_fields = fields
+
 class SettingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Setting
-        fields = ['key', 'value']
\ No newline at end of file
+        fields = ['key', 'value']
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'entity', 'filename', 'status', 'rows_processed', 'rows_imported',
+                  'rows_failed', 'errors', 'message', 'created_by', 'created', 'updated']
+        read_only_fields = fields
\ No newline at end of file
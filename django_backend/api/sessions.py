@@ -0,0 +1,107 @@
+"""
+Session store for issued JWT access tokens.
+
+Each login opens an ``AdminSession`` row keyed by the ``jti`` of the refresh
+token it hands out. That key is also stored in the refresh token's ``sid``
+claim, which simplejwt copies into every access token minted from it, so a
+refreshed access token belongs to the same session. A token is only accepted
+(and a refresh token only refreshed) while its row exists, so logout and
+revoke-all are plain deletes. Lookups are mirrored in the cache
+(when ``JWT_SESSION_CACHE`` is on) so authenticating a request normally costs
+no query at all. The mirror needs a cache shared by every worker, as only the
+worker handling a logout updates it.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import AdminSession
+
+CACHE_PREFIX = 'jwt_session'
+SESSION_ID_CLAIM = 'sid'
+
+
+def _cache_key(jti):
+    return f'{CACHE_PREFIX}:{jti}'
+
+def _session_id(token):
+    # Access tokens issued before sessions spanned refreshes have no sid
+    return token.get(SESSION_ID_CLAIM) or token.get(api_settings.JTI_CLAIM)
+
+def _token_expires(token):
+    return datetime.datetime.fromtimestamp(token['exp'], tz=datetime.timezone.utc)
+
+def _cache_timeout(expires):
+    # Never cache past the token's own expiry; it is rejected by then anyway.
+    return max(int((expires - timezone.now()).total_seconds()), 1)
+
+def open_session(user):
+    """
+    Issue a refresh token for ``user`` and record its session. The access
+    token is ``refresh.access_token``.
+    """
+    refresh = RefreshToken.for_user(user)
+    refresh[SESSION_ID_CLAIM] = refresh[api_settings.JTI_CLAIM]
+    start_session(user, refresh)
+    return refresh
+
+def start_session(user, token):
+    """Record a freshly issued token as an active session."""
+    jti = _session_id(token)
+    expires = _token_expires(token)
+
+    AdminSession.objects.create(jti=jti, user=user, expires=expires)
+
+    if settings.JWT_SESSION_CACHE:
+        cache.set(_cache_key(jti), True, _cache_timeout(expires))
+
+def is_session_active(token):
+    """Return True if the token's session has not been revoked or pruned."""
+    jti = _session_id(token)
+    if not jti:
+        return False
+
+    if settings.JWT_SESSION_CACHE:
+        active = cache.get(_cache_key(jti))
+        if active is not None:
+            return active
+
+    expires = _token_expires(token)
+    active = AdminSession.objects.filter(jti=jti, expires__gt=timezone.now()).exists()
+
+    if settings.JWT_SESSION_CACHE:
+        cache.set(_cache_key(jti), active, _cache_timeout(expires))
+
+    return active
+
+def end_session(token):
+    """Revoke the session of ``token``, with its refresh token."""
+    jti = _session_id(token)
+    AdminSession.objects.filter(jti=jti).delete()
+
+    if settings.JWT_SESSION_CACHE:
+        cache.set(_cache_key(jti), False, _cache_timeout(_token_expires(token)))
+
+def end_all_sessions(user):
+    """Revoke every session of ``user``. Returns the number revoked."""
+    sessions = list(AdminSession.objects.filter(user=user).values_list('jti', 'expires'))
+    if not sessions:
+        return 0
+
+    AdminSession.objects.filter(jti__in=[jti for jti, _ in sessions]).delete()
+
+    if settings.JWT_SESSION_CACHE:
+        timeout = _cache_timeout(max(expires for _, expires in sessions))
+        cache.set_many({_cache_key(jti): False for jti, _ in sessions}, timeout)
+
+    return len(sessions)
+
+def prune_expired_sessions():
+    """Delete sessions whose token has expired. Returns the number deleted."""
+    deleted, _ = AdminSession.objects.filter(expires__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .counts import invalidate_counts
+from .models import Admin, Customer, Invoice, Payment, PaymentMode, Product, Quote, RecurringInvoice
+from .reports import invalidate_aging
+
+
+@receiver(post_save, sender=Admin)
+@receiver(post_delete, sender=Admin)
+def invalidate_admin_cache(sender, instance, **kwargs):
+    # Covers profile edits, disabling, soft removal and password changes
+    invalidate_cached_user(instance.pk)
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=Customer)
+def invalidate_aging_reports(sender, instance, **kwargs):
+    # After commit, or a report built before the commit could be cached again
+    transaction.on_commit(invalidate_aging)
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_list_counts(sender, instance, **kwargs):
+    if sender in (Customer, PaymentMode, Product, Quote, Invoice, Payment, RecurringInvoice):
+        transaction.on_commit(lambda: invalidate_counts(sender))
@@ -0,0 +1,107 @@
+"""
+Incremental sync ("changes since") for offline clients.
+
+Rows are returned in ``(updated, id)`` order and paged by keyset: every
+response carries a ``cursor`` naming the last row sent, and the next call
+with that cursor continues right after it. Soft-deleted rows are sent with
+``removed: true`` so clients can drop them locally; the first sync (no
+``since`` and no ``cursor``) leaves them out.
+
+A transaction can commit rows whose ``updated`` is older than a cursor the
+client already holds. A sync "round" (following cursors while ``more`` is
+true) remembers when it started; its last cursor points back at most to
+SYNC_OVERLAP_SECONDS before that, so the next round reads that trailing
+window again and picks up what transactions open at the time committed
+since. Clients get those rows twice and must apply changes idempotently;
+transactions longer than SYNC_OVERLAP_SECONDS can still be missed.
+"""
+
+import base64
+import binascii
+import datetime
+import uuid
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(updated, id, started=None):
+    value = f'{updated.isoformat()}|{id}'
+    if started is not None:
+        value += f'|{started.isoformat()}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+def decode_cursor(cursor):
+    """``(updated, id, started)``; ``started`` is None between rounds."""
+    try:
+        updated, id, *started = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if len(started) > 1:
+            raise ValueError
+        started = datetime.datetime.fromisoformat(started[0]) if started else None
+        return datetime.datetime.fromisoformat(updated), uuid.UUID(id), started
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+
+def parse_since(since):
+    try:
+        value = parse_datetime(since)
+    except ValueError:
+        value = None
+    if value is None:
+        raise InvalidCursor('Invalid since, expected an ISO 8601 datetime')
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+def round_start(cursor):
+    """When the sync round ``cursor`` belongs to started; now for a new round."""
+    if cursor is not None and cursor[2] is not None:
+        return cursor[2]
+    return timezone.now()
+
+def changes_queryset(model, since=None, cursor=None):
+    """
+    Rows of ``model`` changed after ``cursor`` (an ``(updated, id, started)``
+    tuple) or at or after ``since``, in keyset order.
+    """
+    # Removed rows are changes too
+    queryset = model.all_objects.all()
+
+    if cursor is not None:
+        updated, id, _ = cursor
+        queryset = queryset.filter(Q(updated__gt=updated) | Q(updated=updated, id__gt=id))
+    elif since is not None:
+        queryset = queryset.filter(updated__gte=since)
+    else:
+        queryset = queryset.filter(removed=False)
+
+    return queryset.order_by('updated', 'id')
+
+def next_cursor(rows, cursor, since, started, more):
+    """
+    Cursor after the last serialized row. Within a round it carries the
+    round's start; the last one of a round goes back to SYNC_OVERLAP_SECONDS
+    before that start if it is further on.
+    """
+    if rows:
+        position = datetime.datetime.fromisoformat(rows[-1]['updated']), uuid.UUID(str(rows[-1]['id']))
+    elif cursor is not None:
+        position = cursor[:2]
+    elif since is not None:
+        position = since, uuid.UUID(int=0)
+    else:
+        position = None
+
+    if more:
+        return encode_cursor(*position, started)
+
+    rewind = started - datetime.timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    if position is None or position[0] > rewind:
+        position = rewind, uuid.UUID(int=0)
+    return encode_cursor(*position)
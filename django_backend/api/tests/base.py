@@ -0,0 +1,36 @@
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..models import Admin, Customer, Invoice, Payment
+from ..sessions import start_session
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        # Counts and aging reports are cached across tests otherwise
+        cache.clear()
+        self.admin = Admin.objects.create_user('admin@example.com', 'password', name='Admin')
+        token = AccessToken.for_user(self.admin)
+        start_session(self.admin, token)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.customer = Customer.objects.create(name='Acme', email='billing@acme.test')
+
+    def create_invoice(self, number, customer=None, total='100.00', **fields):
+        fields.setdefault('status', 'pending')
+        fields.setdefault('date', datetime.date(2024, 1, 1))
+        return Invoice.objects.create(
+            number=str(number), year=2024, client=customer or self.customer,
+            sub_total=Decimal(total), total=Decimal(total), **fields,
+        )
+
+    def create_payment(self, invoice, amount='10.00', date=datetime.date(2024, 1, 2)):
+        return Payment.objects.create(
+            number='1', year=2024, date=date, amount=Decimal(amount),
+            invoice=invoice, client=invoice.client,
+        )
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import override_settings
+
+from ..authentication import USER_CACHE_FIELDS, _user_cache_key, get_cached_user
+from ..models import Admin
+from .base import APITestCase
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=60)
+class CachedUserTests(APITestCase):
+    def test_only_authentication_fields_are_cached(self):
+        get_cached_user(self.admin.pk)
+
+        values = cache.get(_user_cache_key(self.admin.pk))
+        self.assertEqual(len(values), len(USER_CACHE_FIELDS))
+        self.assertNotIn(self.admin.password, values)
+
+    def test_cached_user_authenticates_without_queries(self):
+        self.client.get('/api/client/list')
+
+        user = get_cached_user(self.admin.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((user.pk, user.email, user.is_active), (self.admin.pk, 'admin@example.com', True))
+
+    def test_saving_a_cached_user_keeps_the_password(self):
+        get_cached_user(self.admin.pk)
+        user = get_cached_user(self.admin.pk)  # from the cache
+        user.name = 'Renamed'
+        user.save()
+
+        admin = Admin.objects.get(pk=self.admin.pk)
+        self.assertEqual(admin.name, 'Renamed')
+        self.assertTrue(admin.check_password('password'))
+
+    def test_disabling_drops_the_entry(self):
+        self.assertEqual(self.client.get('/api/client/list').status_code, 200)
+
+        Admin.objects.filter(pk=self.admin.pk).update(enabled=False)
+        self.assertEqual(self.client.get('/api/client/list').status_code, 200)
+        self.admin.refresh_from_db()
+        self.admin.save()
+
+        self.assertEqual(self.client.get('/api/client/list').status_code, 401)
@@ -0,0 +1,54 @@
+from django.test import override_settings
+
+from .base import APITestCase
+
+
+class IfMatchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/client/update/{self.customer.id}'
+
+    def etag(self):
+        response = self.client.get(f'/api/client/read/{self.customer.id}')
+        return response['ETag']
+
+    def update(self, if_match=None, **data):
+        headers = {'HTTP_IF_MATCH': if_match} if if_match else {}
+        return self.client.patch(self.url, data, format='json', **headers)
+
+    def test_current_etag_updates(self):
+        etag = self.etag()
+
+        response = self.update(etag, name='Acme Corp')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response['ETag'], self.etag())
+
+    def test_stale_etag_is_refused(self):
+        stale = self.etag()
+        self.update(stale, name='Acme Corp')
+
+        response = self.update(stale, name='Acme Ltd')
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response.json()['result']['name'], 'Acme Corp')
+        self.assertEqual(response['ETag'], self.etag())
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.name, 'Acme Corp')
+
+    def test_weak_and_wildcard_etags_match(self):
+        self.assertEqual(self.update(f'W/{self.etag()}', name='Acme Corp').status_code, 200)
+        self.assertEqual(self.update('*', name='Acme Ltd').status_code, 200)
+
+    def test_missing_if_match_is_allowed_by_default(self):
+        self.assertEqual(self.update(name='Acme Corp').status_code, 200)
+
+    @override_settings(REQUIRE_IF_MATCH=True)
+    def test_missing_if_match_is_refused_when_required(self):
+        response = self.update(name='Acme Corp')
+
+        self.assertEqual(response.status_code, 428)
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.name, 'Acme')
+        self.assertEqual(self.update(self.etag(), name='Acme Corp').status_code, 200)
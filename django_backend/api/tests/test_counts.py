@@ -0,0 +1,42 @@
+from django.test import override_settings
+
+from .base import APITestCase
+
+
+@override_settings(PAGINATION_COUNT='auto', PAGINATION_COUNT_CAP=2, PAGINATION_COUNT_CACHE_TIMEOUT=0)
+class PaginationCountTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(10, 13):
+            self.create_invoice(number)
+
+    def pagination(self, **params):
+        response = self.client.get('/api/invoice/list', {'limit': 2, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['pagination']
+
+    def test_filtered_count_is_capped(self):
+        first = self.pagination(status='pending')
+        last = self.pagination(status='pending', page=2)
+
+        self.assertEqual((first['total'], first['exact'], first['next']), (2, False, 2))
+        self.assertEqual((last['total'], last['exact'], last['next']), (2, False, None))
+        self.assertEqual(self.pagination(number='10')['total'], 1)
+        self.assertTrue(self.pagination(number='10')['exact'])
+
+    def test_search_counts_as_a_filter(self):
+        self.assertEqual(self.pagination(q='1')['exact'], False)
+
+    def test_unfiltered_count_is_exact(self):
+        for params in ({}, {'_': '1700000000000'}, {'q': ''}, {'items': 10}, {'ordering': '-total'}):
+            pagination = self.pagination(**params)
+            self.assertEqual((pagination['total'], pagination['exact'], pagination['pages']), (3, True, 2), params)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=60)
+    def test_counts_are_cached_until_a_write(self):
+        self.assertEqual(self.pagination()['total'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_invoice(13)
+
+        self.assertEqual(self.pagination()['total'], 4)
@@ -0,0 +1,46 @@
+import datetime
+
+from .base import APITestCase
+
+
+class FilterTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.draft = self.create_invoice(1, total='50.00', status='draft', date=datetime.date(2024, 1, 10))
+        self.pending = self.create_invoice(2, total='150.00', date=datetime.date(2024, 2, 10))
+        self.paid = self.create_invoice(3, total='250.00', status='paid', date=datetime.date(2024, 3, 10))
+
+    def numbers(self, **params):
+        response = self.client.get('/api/invoice/list', params)
+        self.assertEqual(response.status_code, 200, response.json())
+        return [invoice['number'] for invoice in response.json()['result']]
+
+    def assertRejected(self, **params):
+        response = self.client.get('/api/invoice/list', params)
+        self.assertEqual(response.status_code, 400, params)
+        self.assertFalse(response.json()['success'])
+
+    def test_conditions_are_combined(self):
+        self.assertEqual(self.numbers(status__in='draft,pending', ordering='-total'), ['2', '1'])
+        self.assertEqual(self.numbers(date__gte='2024-02-01', total__lt='200', client=str(self.customer.id)), ['2'])
+        self.assertEqual(self.numbers(number__icontains='3'), ['3'])
+        self.assertEqual(self.numbers(filter='status', equal='paid'), ['3'])
+
+    def test_unknown_fields_and_operators_are_rejected(self):
+        self.assertRejected(removed='true')
+        self.assertRejected(created_by=str(self.admin.id))
+        self.assertRejected(client__name='Acme')
+        self.assertRejected(total__regex='.*')
+        self.assertRejected(status__icontains='pa')
+        self.assertRejected(filter='removed', equal='true')
+        self.assertRejected(ordering='pdf')
+
+    def test_malformed_values_are_rejected(self):
+        self.assertRejected(date__gte='last week')
+        self.assertRejected(client='not-an-id')
+        self.assertRejected(status__in=','.join(['draft'] * 101))
+
+    def test_unrelated_parameters_are_ignored(self):
+        self.assertEqual(len(self.numbers(_='1700000000000')), 3)
+        # The frontend's page size
+        self.assertEqual(len(self.numbers(page=1, items=10)), 3)
@@ -0,0 +1,86 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from ..models import Customer, IdempotencyKey, ImportJob
+from .base import APITestCase
+
+
+class IdempotencyTests(APITestCase):
+    def create_client(self, key, **data):
+        return self.client.post('/api/client/create', {'name': 'Initech', **data}, format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.create_client('create-initech')
+        retry = self.create_client('create-initech')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Customer.objects.filter(name='Initech').count(), 1)
+
+    def test_key_reused_for_another_body_is_refused(self):
+        self.create_client('create-initech')
+
+        response = self.create_client('create-initech', email='sales@initech.test')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Customer.objects.filter(name='Initech').count(), 1)
+
+    def test_new_key_runs_the_request_again(self):
+        self.create_client('create-initech')
+
+        self.assertEqual(self.create_client('create-initech-again').status_code, 201)
+        self.assertEqual(Customer.objects.filter(name='Initech').count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+    def test_failed_validation_is_replayed_too(self):
+        first = self.client.post('/api/client/create', {}, format='json', HTTP_IDEMPOTENCY_KEY='empty')
+        retry = self.client.post('/api/client/create', {}, format='json', HTTP_IDEMPOTENCY_KEY='empty')
+
+        self.assertEqual((first.status_code, retry.status_code), (400, 400))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+
+
+class MultipartIdempotencyTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, content, name='clients.csv'):
+        return self.client.post('/api/import/create', {
+            'entity': 'client', 'file': SimpleUploadedFile(name, content),
+        }, format='multipart', HTTP_IDEMPOTENCY_KEY='import-clients')
+
+    def test_same_upload_is_replayed(self):
+        first = self.upload(b'name\nInitech\n')
+        retry = self.upload(b'name\nInitech\n')
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    def test_other_file_of_the_same_size_is_refused(self):
+        self.upload(b'name\nInitech\n')
+
+        self.assertEqual(self.upload(b'name\nGlobex!\n').status_code, 422)
+        self.assertEqual(self.upload(b'name\nInitech\n', name='other.csv').status_code, 422)
+        self.assertEqual(ImportJob.objects.count(), 1)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=16)
+    def test_upload_in_a_temporary_file_is_stored_whole(self):
+        content = b'name\n' + b''.join(b'Client %d\n' % n for n in range(100))
+        response = self.upload(content)
+        call_command('run_imports', stdout=io.StringIO())
+
+        job = ImportJob.objects.get(id=response.json()['result']['id'])
+        self.assertEqual(job.rows_imported, 100)
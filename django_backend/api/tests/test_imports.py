@@ -0,0 +1,52 @@
+import io
+import shutil
+import tempfile
+
+import openpyxl
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+
+from ..models import Customer, ImportJob
+from .base import APITestCase
+
+
+class ImportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def upload(self, name, content):
+        return self.client.post('/api/import/create', {
+            'entity': 'client', 'file': SimpleUploadedFile(name, content),
+        }, format='multipart')
+
+    def test_xlsx_import(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['Name', 'Email'])
+        workbook.active.append(['Globex', 'info@globex.test'])
+        workbook.active.append(['', 'missing-name@example.com'])
+        content = io.BytesIO()
+        workbook.save(content)
+
+        response = self.upload('clients.xlsx', content.getvalue())
+        self.assertEqual(response.status_code, 202)
+        call_command('run_imports', stdout=io.StringIO())
+
+        job = ImportJob.objects.get(id=response.json()['result']['id'])
+        self.assertEqual((job.status, job.rows_imported, job.rows_failed), ('completed', 1, 1))
+        self.assertTrue(Customer.objects.filter(name='Globex', email='info@globex.test').exists())
+
+    def test_csv_import(self):
+        response = self.upload('clients.csv', b'name,country\nInitech,US\nHooli,US\n')
+        call_command('run_imports', stdout=io.StringIO())
+
+        job = ImportJob.objects.get(id=response.json()['result']['id'])
+        self.assertEqual((job.status, job.rows_imported), ('completed', 2))
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.upload('clients.ods', b'...').status_code, 400)
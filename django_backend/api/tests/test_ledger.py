@@ -0,0 +1,38 @@
+import datetime
+
+from .base import APITestCase
+
+
+class LedgerTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        january = self.create_invoice(1, total='100.00', date=datetime.date(2024, 1, 1))
+        self.create_payment(january, amount='30.00', date=datetime.date(2024, 1, 15))
+        self.create_invoice(2, total='50.00', date=datetime.date(2024, 2, 1))
+        self.url = f'/api/client/ledger/{self.customer.id}'
+
+    def ledger(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_pages_follow_the_cursor_with_a_running_balance(self):
+        first = self.ledger(limit=2).json()
+        second = self.ledger(limit=2, cursor=first['cursor']).json()
+
+        self.assertTrue(first['more'])
+        self.assertFalse(second['more'])
+        entries = first['result']['entries'] + second['result']['entries']
+        self.assertEqual([entry['kind'] for entry in entries], ['invoice', 'payment', 'invoice'])
+        self.assertEqual([float(entry['balance']) for entry in entries], [100, 70, 120])
+        self.assertEqual(float(first['result']['balance']), 120)
+        self.assertEqual(float(second['result']['balance']), 120)
+
+    def test_limit_is_clamped(self):
+        for limit in (0, -5):
+            page = self.ledger(limit=limit).json()
+            self.assertEqual(len(page['result']['entries']), 1)
+            self.assertTrue(page['more'])
+            self.assertIsNotNone(page['cursor'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.ledger(limit='ten').status_code, 400)
+        self.assertEqual(self.ledger(cursor='nope').status_code, 400)
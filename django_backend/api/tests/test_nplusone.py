@@ -0,0 +1,59 @@
+import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+
+from ..models import Customer, Invoice, Quote
+from ..nplusone import NPlusOneError, assert_no_nplusone
+from ..serializers import InvoiceSerializer
+from .base import APITestCase
+
+
+class NPlusOneTests(APITestCase):
+    def test_runner_turns_findings_into_failures(self):
+        # api.test_runner.NPlusOneTestRunner runs the suite
+        self.assertTrue(settings.NPLUSONE_ENABLED)
+        self.assertTrue(settings.NPLUSONE_RAISE)
+
+    def test_lazy_related_access_in_list_view_fails(self):
+        for number in range(settings.NPLUSONE_THRESHOLD + 2):
+            customer = Customer.objects.create(name=f'Client {number}')
+            self.create_invoice(number, customer=customer)
+
+        with override_settings(VALUES_SERIALIZERS=False), \
+                mock.patch.object(InvoiceSerializer, 'setup_eager_loading', staticmethod(lambda queryset: queryset)):
+            with self.assertRaises(NPlusOneError) as raised:
+                self.client.get('/api/invoice/list')
+        self.assertIn('InvoiceSerializer.client_name', str(raised.exception))
+
+    def test_eager_loaded_list_view_passes(self):
+        for number in range(settings.NPLUSONE_THRESHOLD + 2):
+            self.create_invoice(number)
+
+        with override_settings(VALUES_SERIALIZERS=False):
+            response = self.client.get('/api/invoice/list')
+        self.assertEqual(response.status_code, 200)
+
+    def test_assert_no_nplusone_block(self):
+        for number in range(settings.NPLUSONE_THRESHOLD + 2):
+            self.create_invoice(number)
+
+        with self.assertRaises(NPlusOneError):
+            with assert_no_nplusone():
+                [invoice.client.name for invoice in Invoice.objects.all()]
+
+    def test_summaries_run_one_query_per_figure(self):
+        for number, status in enumerate(('draft', 'pending', 'paid', 'overdue')):
+            self.create_invoice(number, status=status, credit=10 if status == 'paid' else 0)
+            Quote.objects.create(number=str(number), year=2024, date=datetime.date(2024, 1, 1),
+                                 client=self.customer, total=50, status=status)
+
+        invoices = self.client.get('/api/invoice/summary', {'year': 2024}).json()['result']
+        quotes = self.client.get('/api/quote/summary', {'year': 2024}).json()['result']
+
+        self.assertEqual((invoices['total'], invoices['draft_count'], invoices['overdue_count']), (4, 1, 1))
+        self.assertEqual((invoices['total_amount'], invoices['unpaid_amount']), (400, 390))
+        self.assertEqual((quotes['total'], quotes['pending_count'], quotes['sent_count']), (4, 1, 0))
+        for path in ('/api/payment/summary', '/api/client/summary', '/api/invoice/aging'):
+            self.assertEqual(self.client.get(path).status_code, 200, path)
@@ -0,0 +1,76 @@
+import datetime
+from decimal import Decimal
+
+from ..models import Counter, Invoice, InvoiceItem, RecurringInvoice, RecurringInvoiceItem, RecurringInvoiceRun, Setting
+from ..recurring import INVOICE_NUMBER_COUNTER, materialize_due
+from .base import APITestCase
+
+
+class RecurringInvoiceTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.recurring = RecurringInvoice.objects.create(
+            client=self.customer, interval='month', interval_count=1,
+            start_date=datetime.date(2024, 1, 31), next_date=datetime.date(2024, 1, 31),
+            due_days=14, tax_rate=Decimal('10'), created_by=self.admin,
+        )
+        RecurringInvoiceItem.objects.create(
+            recurring_invoice=self.recurring, name='Hosting', quantity=1, price=Decimal('50'), total=Decimal('50'))
+
+    def create_by_hand(self, number):
+        item = {'name': 'Setup', 'quantity': 1, 'price': '10.00', 'total': '10.00'}
+        response = self.client.post('/api/invoice/create', {
+            'number': number, 'year': 2024, 'date': '2024-01-01', 'client': str(self.customer.id),
+            'total': '10.00', 'items': [item],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def numbers(self):
+        return list(RecurringInvoiceRun.objects.order_by('date').values_list('invoice__number', flat=True))
+
+    def test_catches_up_once_per_billing_date(self):
+        templates, invoices = materialize_due(datetime.date(2024, 4, 30))
+
+        self.assertEqual((templates, invoices), (1, 4))
+        dates = list(Invoice.objects.order_by('date').values_list('date', flat=True))
+        self.assertEqual(dates, [datetime.date(2024, 1, 31), datetime.date(2024, 2, 29),
+                                 datetime.date(2024, 3, 31), datetime.date(2024, 4, 30)])
+        self.assertEqual(self.numbers(), ['1', '2', '3', '4'])
+        self.assertEqual(InvoiceItem.objects.count(), 4)
+        self.recurring.refresh_from_db()
+        self.assertEqual(self.recurring.next_date, datetime.date(2024, 5, 31))
+
+    def test_rerun_does_not_invoice_a_date_twice(self):
+        materialize_due(datetime.date(2024, 2, 29))
+        self.assertEqual(materialize_due(datetime.date(2024, 2, 29)), (0, 0))
+
+        # Even when next_date is moved back
+        RecurringInvoice.objects.filter(pk=self.recurring.pk).update(next_date=datetime.date(2024, 1, 31))
+        self.assertEqual(materialize_due(datetime.date(2024, 2, 29)), (1, 0))
+
+        self.assertEqual(Invoice.objects.count(), 2)
+        self.assertEqual(RecurringInvoiceRun.objects.count(), 2)
+
+    def test_numbers_follow_invoices_created_by_hand(self):
+        self.create_by_hand('41')
+        self.create_by_hand('INV-900')
+        materialize_due(datetime.date(2024, 1, 31))
+
+        self.create_by_hand('50')
+        materialize_due(datetime.date(2024, 2, 29))
+
+        self.assertEqual(self.numbers(), ['42', '51'])
+
+    def test_creating_an_invoice_by_hand_takes_no_counter(self):
+        self.create_by_hand('41')
+
+        self.assertFalse(Counter.objects.filter(key=INVOICE_NUMBER_COUNTER).exists())
+        self.assertFalse(Setting.objects.filter(key='last_invoice_number').exists())
+
+    def test_numbers_follow_the_last_invoice_number_setting(self):
+        Setting.objects.create(key='last_invoice_number', value=1000)
+
+        materialize_due(datetime.date(2024, 2, 29))
+
+        self.assertEqual(self.numbers(), ['1001', '1002'])
+        self.assertEqual(Counter.objects.get(key=INVOICE_NUMBER_COUNTER).value, 1002)
@@ -0,0 +1,72 @@
+from rest_framework.test import APIClient
+
+from ..models import AdminPassword, AdminSession
+from .base import APITestCase
+
+
+class SessionTests(APITestCase):
+    def login(self):
+        response = self.client.post('/api/login', {'email': 'admin@example.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['result']
+
+    def refresh(self, refresh_token):
+        return APIClient().post('/api/auth/refresh-token/', {'refresh': refresh_token})
+
+    def get_clients(self, access_token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        return client.get('/api/client/list')
+
+    def test_refreshed_token_belongs_to_the_session(self):
+        tokens = self.login()
+
+        response = self.refresh(tokens['refreshToken'])
+
+        self.assertEqual(response.status_code, 200)
+        access = response.json()['access']
+        self.assertNotEqual(access, tokens['token'])
+        self.assertEqual(self.get_clients(access).status_code, 200)
+        self.assertEqual(self.get_clients(tokens['token']).status_code, 200)
+
+    def test_logout_revokes_the_refresh_token(self):
+        tokens = self.login()
+        access = self.refresh(tokens['refreshToken']).json()['access']
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(client.post('/api/logout').status_code, 200)
+
+        self.assertEqual(self.refresh(tokens['refreshToken']).status_code, 401)
+        self.assertEqual(self.get_clients(tokens['token']).status_code, 401)
+        self.assertEqual(self.get_clients(access).status_code, 401)
+
+    def test_logout_all_revokes_every_session(self):
+        first, second = self.login(), self.login()
+
+        response = self.client.post('/api/logoutall')
+
+        self.assertEqual(response.json()['result']['revoked'], 3)
+        for tokens in (first, second):
+            self.assertEqual(self.refresh(tokens['refreshToken']).status_code, 401)
+            self.assertEqual(self.get_clients(tokens['token']).status_code, 401)
+
+    def test_password_reset_revokes_refresh_tokens(self):
+        tokens = self.login()
+        self.client.post('/api/forgetpassword', {'email': 'admin@example.com'})
+        reset_token = AdminPassword.objects.get(user=self.admin).password_reset_token
+
+        response = APIClient().post('/api/resetpassword', {
+            'email': 'admin@example.com', 'resetToken': reset_token, 'password': 'new-password',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(tokens['refreshToken']).status_code, 401)
+        self.assertFalse(AdminSession.objects.filter(user=self.admin).exists())
+
+    def test_removed_admin_cannot_refresh(self):
+        tokens = self.login()
+        self.admin.soft_delete()
+        response = self.refresh(tokens['refreshToken'])
+
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,43 @@
+import datetime
+
+from ..models import Customer, Invoice, OutboxEvent, Payment, Quote
+from .base import APITestCase
+
+
+class SoftDeleteTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.quote = Quote.objects.create(
+            number='1', year=2024, date=datetime.date(2024, 1, 1), client=self.customer)
+        self.invoice = self.create_invoice(1)
+        self.payment = self.create_payment(self.invoice)
+
+    def test_deleting_a_client_removes_its_documents(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/client/delete/{self.customer.id}')
+        self.assertEqual(response.status_code, 200)
+
+        for model, row in ((Customer, self.customer), (Quote, self.quote),
+                           (Invoice, self.invoice), (Payment, self.payment)):
+            self.assertTrue(model.all_objects.get(pk=row.pk).removed)
+            self.assertFalse(model.objects.filter(pk=row.pk).exists())
+
+        events = set(OutboxEvent.objects.values_list('topic', 'entity_id'))
+        self.assertEqual(events, {
+            ('client.deleted', self.customer.id), ('quote.deleted', self.quote.id),
+            ('invoice.deleted', self.invoice.id), ('payment.deleted', self.payment.id),
+        })
+
+    def test_removed_rows_are_hidden(self):
+        self.client.delete(f'/api/invoice/delete/{self.invoice.id}')
+
+        self.assertEqual(self.client.get(f'/api/invoice/read/{self.invoice.id}').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/payment/read/{self.payment.id}').status_code, 404)
+        self.assertEqual(self.client.get('/api/invoice/list').json()['result'], [])
+        self.assertEqual(self.client.get(f'/api/client/read/{self.customer.id}').status_code, 200)
+
+    def test_queryset_soft_delete(self):
+        flagged = Invoice.all_objects.filter(pk=self.invoice.pk).soft_delete()
+
+        self.assertEqual(flagged, {Payment: [self.payment.pk], Invoice: [self.invoice.pk]})
+        self.assertEqual(Invoice.all_objects.filter(pk=self.invoice.pk).soft_delete(), {})
@@ -0,0 +1,57 @@
+import datetime
+
+from django.utils import timezone
+
+from ..models import Invoice
+from .base import APITestCase
+
+
+class SyncTests(APITestCase):
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get('/api/invoice/changes', params).json()
+
+    def test_pages_then_catches_up(self):
+        invoices = [self.create_invoice(number) for number in range(5)]
+
+        first = self.sync(limit=2)
+        second = self.sync(first['cursor'], limit=2)
+        third = self.sync(second['cursor'], limit=2)
+
+        self.assertTrue(first['more'] and second['more'])
+        self.assertFalse(third['more'])
+        ids = [row['id'] for page in (first, second, third) for row in page['result']]
+        self.assertEqual(sorted(ids), sorted(str(invoice.id) for invoice in invoices))
+
+    def test_rows_committed_late_are_sent_by_the_next_sync(self):
+        self.create_invoice(1)
+        cursor = self.sync()['cursor']
+
+        # Saved by a transaction that started a minute ago and commits now
+        late = self.create_invoice(2)
+        Invoice.objects.filter(pk=late.pk).update(updated=timezone.now() - datetime.timedelta(minutes=1))
+
+        ids = [row['id'] for row in self.sync(cursor)['result']]
+        self.assertIn(str(late.id), ids)
+
+    def test_removed_rows_are_sent_as_changes(self):
+        invoice = self.create_invoice(1)
+        cursor = self.sync()['cursor']
+        invoice.soft_delete()
+
+        rows = {row['id']: row for row in self.sync(cursor)['result']}
+        self.assertTrue(rows[str(invoice.id)]['removed'])
+
+    def test_limit_is_clamped(self):
+        self.create_invoice(1)
+        self.create_invoice(2)
+
+        for limit in (0, -5):
+            response = self.client.get('/api/invoice/changes', {'limit': limit})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['result']), 1)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/invoice/changes', {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/invoice/changes', {'limit': 'ten'}).status_code, 400)
@@ -0,0 +1,100 @@
+import io
+from unittest import mock
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from .. import webhooks
+from ..models import Counter, OutboxEvent, WebhookEndpoint
+from .base import APITestCase
+
+
+class WebhookDeliveryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.endpoint = WebhookEndpoint.objects.create(
+            url='https://hooks.example.com/', secret='secret', position=webhooks.start_position())
+        self.delivered = []
+
+    def record_event(self):
+        return OutboxEvent.objects.create(topic='client.updated', entity_id=self.customer.id, payload={})
+
+    def dispatch(self):
+        def deliver(endpoint, events):
+            self.delivered.extend(event.id for event in events)
+
+        with mock.patch.object(webhooks, 'deliver', deliver):
+            return webhooks.dispatch_pending()
+
+    def test_delivers_in_order_and_moves_the_position(self):
+        events = [self.record_event() for _ in range(3)]
+
+        self.assertEqual(self.dispatch(), 3)
+        self.assertEqual(self.delivered, [event.id for event in events])
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.position, OutboxEvent.objects.get(id=events[-1].id).sequence)
+        self.assertIsNone(self.endpoint.next_attempt)
+
+        self.assertEqual(self.dispatch(), 0)
+
+    def test_event_committed_after_a_younger_one_is_delivered(self):
+        older = self.record_event()
+        younger = self.record_event()
+        # The older event's transaction has not committed yet
+        OutboxEvent.objects.filter(id=older.id).delete()
+        self.dispatch()
+
+        OutboxEvent.objects.create(id=older.id, topic=older.topic, entity_id=older.entity_id, payload={})
+        self.dispatch()
+
+        self.assertEqual(self.delivered, [younger.id, older.id])
+
+    def test_failed_delivery_is_retried_later(self):
+        self.record_event()
+
+        with mock.patch.object(webhooks, 'deliver', side_effect=webhooks.DeliveryError('HTTP 500')):
+            self.assertEqual(webhooks.dispatch_pending(), 0)
+
+        self.endpoint.refresh_from_db()
+        self.assertEqual(self.endpoint.attempts, 1)
+        self.assertEqual(self.endpoint.last_error, 'HTTP 500')
+        self.assertGreater(self.endpoint.next_attempt, timezone.now())
+        # Not due yet
+        self.assertEqual(self.dispatch(), 0)
+
+    def test_worker_command(self):
+        self.record_event()
+        out = io.StringIO()
+
+        with mock.patch.object(webhooks, 'deliver', lambda endpoint, events: self.delivered.extend(events)):
+            call_command('dispatch_webhooks', stdout=out)
+
+        self.assertEqual(len(self.delivered), 1)
+        self.assertIn('Sent 1 events', out.getvalue())
+
+    def test_claimed_endpoint_is_skipped(self):
+        self.record_event()
+        self.assertIsNotNone(webhooks.claim_endpoint(self.endpoint.id))
+
+        self.assertEqual(self.dispatch(), 0)
+        self.assertEqual(self.delivered, [])
+
+    def test_sequence_is_kept_out_of_settings(self):
+        self.record_event()
+        self.dispatch()
+
+        keys = [setting['key'] for setting in self.client.get('/api/setting').json()['result']]
+        self.assertNotIn(webhooks.SEQUENCE_COUNTER, keys)
+        self.assertEqual(self.client.get(f'/api/setting/{webhooks.SEQUENCE_COUNTER}').status_code, 404)
+
+    def test_sequence_continues_after_events_are_pruned(self):
+        self.record_event()
+        self.dispatch()
+        OutboxEvent.objects.all().delete()
+
+        position = webhooks.start_position()
+        event = self.record_event()
+        self.dispatch()
+
+        self.assertEqual(position, Counter.objects.get(key=webhooks.SEQUENCE_COUNTER).value - 1)
+        self.assertEqual(OutboxEvent.objects.get(id=event.id).sequence, position + 1)
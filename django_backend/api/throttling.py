@@ -0,0 +1,35 @@
+import hashlib
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginIPThrottle(SimpleRateThrottle):
+    """
+    Limits login attempts per client IP. Runs before the view, so throttled
+    requests never reach the password hashing.
+    """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class LoginEmailThrottle(SimpleRateThrottle):
+    """
+    Limits login attempts per target email, whatever IP they come from.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not email:
+            return None
+
+        ident = hashlib.sha256(str(email).strip().lower().encode('utf-8')).hexdigest()
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': ident,
+        }
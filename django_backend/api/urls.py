@@ -7,6 +7,7 @@ urlpatterns = [
     # Auth routes
     path('login', auth.login, name='login'),
     path('logout', auth.logout, name='logout'),
+    path('logoutall', auth.logout_all, name='logout_all'),
     path('forgetpassword', auth.forget_password, name='forget_password'),
     path('resetpassword', auth.reset_password, name='reset_password'),
     
@@ -19,6 +20,8 @@ urlpatterns = [
     path('client/listAll', views.list_all_clients, name='list_all_clients'),
     path('client/filter', views.filter_clients, name='filter_clients'),
     path('client/search', views.search_clients, name='search_clients'),
+    path('client/changes', views.client_changes, name='client_changes'),
+    path('client/ledger/<uuid:id>', views.client_ledger, name='client_ledger'),
     path('client/summary', views.client_summary, name='client_summary'),
     
     # PaymentMode routes
@@ -30,6 +33,7 @@ urlpatterns = [
     path('paymentMode/listAll', views.list_all_payment_modes, name='list_all_payment_modes'),
     path('paymentMode/filter', views.filter_payment_modes, name='filter_payment_modes'),
     path('paymentMode/search', views.search_payment_modes, name='search_payment_modes'),
+    path('paymentMode/changes', views.payment_mode_changes, name='payment_mode_changes'),
     
     # Product routes
     path('product/create', views.create_product, name='create_product'),
@@ -40,6 +44,7 @@ urlpatterns = [
     path('product/listAll', views.list_all_products, name='list_all_products'),
     path('product/filter', views.filter_products, name='filter_products'),
     path('product/search', views.search_products, name='search_products'),
+    path('product/changes', views.product_changes, name='product_changes'),
     
     # Quote routes
     path('quote/create', views.create_quote, name='create_quote'),
@@ -50,8 +55,10 @@ urlpatterns = [
     path('quote/listAll', views.list_all_quotes, name='list_all_quotes'),
     path('quote/filter', views.filter_quotes, name='filter_quotes'),
     path('quote/search', views.search_quotes, name='search_quotes'),
+    path('quote/changes', views.quote_changes, name='quote_changes'),
     path('quote/summary', views.quote_summary, name='quote_summary'),
     path('quote/convert/<uuid:id>', views.convert_quote_to_invoice, name='convert_quote_to_invoice'),
+    path('quote/convert', views.convert_quotes_to_invoices, name='convert_quotes_to_invoices'),
     path('quote/mail', views.mail_quote, name='mail_quote'),
     
     # Invoice routes
@@ -63,9 +70,23 @@ urlpatterns = [
     path('invoice/listAll', views.list_all_invoices, name='list_all_invoices'),
     path('invoice/filter', views.filter_invoices, name='filter_invoices'),
     path('invoice/search', views.search_invoices, name='search_invoices'),
+    path('invoice/changes', views.invoice_changes, name='invoice_changes'),
     path('invoice/summary', views.invoice_summary, name='invoice_summary'),
+    path('invoice/aging', views.invoice_aging, name='invoice_aging'),
+    path('invoice/reminders/<uuid:id>', views.invoice_reminders, name='invoice_reminders'),
+    path('revenue/timeseries', views.revenue_timeseries, name='revenue_timeseries'),
     path('invoice/mail', views.mail_invoice, name='mail_invoice'),
     
+    # Recurring invoice routes
+    path('recurringInvoice/create', views.create_recurring_invoice, name='create_recurring_invoice'),
+    path('recurringInvoice/read/<uuid:id>', views.read_recurring_invoice, name='read_recurring_invoice'),
+    path('recurringInvoice/update/<uuid:id>', views.update_recurring_invoice, name='update_recurring_invoice'),
+    path('recurringInvoice/delete/<uuid:id>', views.delete_recurring_invoice, name='delete_recurring_invoice'),
+    path('recurringInvoice/list', views.list_recurring_invoices, name='list_recurring_invoices'),
+    path('recurringInvoice/listAll', views.list_all_recurring_invoices, name='list_all_recurring_invoices'),
+    path('recurringInvoice/filter', views.filter_recurring_invoices, name='filter_recurring_invoices'),
+    path('recurringInvoice/search', views.search_recurring_invoices, name='search_recurring_invoices'),
+    
     # Payment routes
     path('payment/create', views.create_payment, name='create_payment'),
     path('payment/read/<uuid:id>', views.read_payment, name='read_payment'),
@@ -75,10 +96,20 @@ urlpatterns = [
     path('payment/listAll', views.list_all_payments, name='list_all_payments'),
     path('payment/filter', views.filter_payments, name='filter_payments'),
     path('payment/search', views.search_payments, name='search_payments'),
+    path('payment/changes', views.payment_changes, name='payment_changes'),
     path('payment/summary', views.payment_summary, name='payment_summary'),
     path('payment/mail', views.mail_payment, name='mail_payment'),
     
     # Settings routes
     path('setting', views.settings, name='settings'),
     path('setting/<str:key>', views.settings, name='settings_key'),
+    
+    # Import routes
+    path('import/create', views.create_import, name='create_import'),
+    path('import/read/<uuid:id>', views.read_import, name='read_import'),
+    path('import/resume/<uuid:id>', views.resume_import, name='resume_import'),
+    
+    # Profiling routes (staff only)
+    path('profile/list', views.list_profiles, name='list_profiles'),
+    path('profile/read/<int:id>', views.profile_detail, name='profile_detail'),
 ]
\ No newline at end of file
@@ -1,27 +1,59 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.fields import DateTimeField
 from rest_framework.response import Response
-from django.db.models import Q, Sum
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.http import HttpResponse
+from django.utils.http import parse_etags
 import datetime
 import json
+import uuid
+from itertools import islice
 
 from .models import (
-    Admin, Customer, PaymentMode, Product, Quote, QuoteItem,
-    Invoice, InvoiceItem, Payment, Setting
+    Admin, Customer, PaymentMode, Product, Quote,
+    Invoice, InvoiceItem, Payment, Setting, ImportJob, RecurringInvoice
 )
+from .conversions import convert_quotes
+from .counts import pagination_count
+from .filters import FilterError, compile_filters
+from .imports import IMPORTERS, ImportFileError, file_format
+from .mailer import queue_invoice_mails
+from .outbox import record_event, record_events
+from .metrics import serializer_timer, list_profiles as list_stored_profiles, get_profile
+from .reports import (
+    REVENUE_INTERVALS, REVENUE_SPLITS, aging_report, decode_ledger_cursor, encode_ledger_cursor, ledger_page,
+    revenue_periods, revenue_series,
+)
+from .read_serializers import get_values_serializer, supports_values
+from .sync import InvalidCursor, changes_queryset, decode_cursor, next_cursor, parse_since, round_start
 from .serializers import (
     AdminSerializer, AdminCreateSerializer, CustomerSerializer,
     PaymentModeSerializer, ProductSerializer, QuoteSerializer,
     QuoteCreateSerializer, InvoiceSerializer, InvoiceCreateSerializer,
-    PaymentSerializer, PaymentCreateSerializer, SettingSerializer
+    PaymentSerializer, PaymentCreateSerializer, SettingSerializer, ImportJobSerializer,
+    RecurringInvoiceSerializer, RecurringInvoiceCreateSerializer, InvoiceReminderSerializer
 )
 
+# Payloads of the deleted events of rows soft-deleted along with another
+DELETED_SERIALIZERS = {
+    Admin: AdminSerializer,
+    Customer: CustomerSerializer,
+    PaymentMode: PaymentModeSerializer,
+    Product: ProductSerializer,
+    Quote: QuoteSerializer,
+    Invoice: InvoiceSerializer,
+    Payment: PaymentSerializer,
+    RecurringInvoice: RecurringInvoiceSerializer,
+}
+
 # Helper functions
-def calculate_pagination(page, limit, count):
+def calculate_pagination(page, limit, count, exact=True):
     pages = (count + limit - 1) // limit
     prev_page = page - 1 if page > 1 else None
     next_page = page + 1 if page < pages else None
@@ -31,40 +63,68 @@ def calculate_pagination(page, limit, count):
         'limit': limit,
         'pages': pages,
         'total': count,
+        # False when total is an estimate or a capped count
+        'exact': exact,
         'prev': prev_page,
         'next': next_page,
     }
 
-def get_filter_options(request, model):
-    filter_options = {}
-    
-    # Common filters for all models
-    filter_options['removed'] = False
-    
-    # Get filter parameter
-    filter_param = request.query_params.get('filter')
-    equal_param = request.query_params.get('equal')
+def parse_limit(request, default, maximum):
+    """
+    The ``limit`` query parameter, clamped to 1..``maximum``; raises
+    ValueError when it is not an integer.
+    """
+    return max(min(int(request.query_params.get('limit', default)), maximum), 1)
+
+def filter_queryset(request, model, default_ordering=()):
+    """
+    The filtered and ordered queryset, and whether any filter condition
+    applies; raises FilterError on parameters outside the model's whitelist.
+    """
+    conditions, ordering = compile_filters(model, request.query_params)
+    queryset = model.objects.filter(**conditions)
     
-    if filter_param and equal_param:
-        filter_options[filter_param] = equal_param
-    
-    return filter_options
+    if ordering:
+        # The id keeps pages stable when the ordered values repeat
+        queryset = queryset.order_by(*ordering, 'id')
+    elif default_ordering:
+        queryset = queryset.order_by(*default_ordering)
+    return queryset, bool(conditions)
+
+def filter_error_response(error):
+    return Response({
+        'success': False,
+        'result': None,
+        'message': str(error),
+    }, status=status.HTTP_400_BAD_REQUEST)
 
-def search_model(request, model, search_fields):
+def eager_load(queryset, serializer_class):
+    # Serializers list the relations they render so list views avoid N+1 queries
+    setup_eager_loading = getattr(serializer_class, 'setup_eager_loading', None)
+    if setup_eager_loading:
+        queryset = setup_eager_loading(queryset)
+    return queryset
+
+def serialize_list(queryset, serializer_class):
+    # Serializers declaring values_annotations are read straight from values() rows
+    with serializer_timer():
+        if django_settings.VALUES_SERIALIZERS and supports_values(serializer_class):
+            return get_values_serializer(serializer_class).serialize(queryset)
+        return serializer_class(eager_load(queryset, serializer_class), many=True).data
+
+def search_query(request, search_fields):
     query = request.query_params.get('q', '')
     
-    if not query:
-        return model.objects.filter(removed=False)
-    
     q_objects = Q()
-    for field in search_fields:
-        q_objects |= Q(**{f"{field}__icontains": query})
-    
-    return model.objects.filter(q_objects, removed=False)
+    if query:
+        for field in search_fields:
+            q_objects |= Q(**{f"{field}__icontains": query})
+    return q_objects
 
-# Generic CRUD views
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
+def search_model(request, model, search_fields):
+    return model.objects.filter(search_query(request, search_fields))
+
+# Generic CRUD helpers, called by the decorated views below
 def create_item(request, model, serializer_class, create_serializer_class=None):
     if create_serializer_class is None:
         create_serializer_class = serializer_class
@@ -76,10 +136,15 @@ def create_item(request, model, serializer_class, create_serializer_class=None):
     serializer = create_serializer_class(data=request.data)
     
     if serializer.is_valid():
-        serializer.save()
+        with transaction.atomic():
+            item = serializer.save()
+            with serializer_timer():
+                data = serializer.data
+            record_event(item, 'created', data)
+        
         return Response({
             'success': True,
-            'result': serializer.data,
+            'result': data,
             'message': f"{model.__name__} created successfully",
         }, status=status.HTTP_201_CREATED)
     
@@ -89,126 +154,215 @@ def create_item(request, model, serializer_class, create_serializer_class=None):
         'message': serializer.errors,
     }, status=status.HTTP_400_BAD_REQUEST)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
 def read_item(request, id, model, serializer_class):
-    item = get_object_or_404(model, id=id, removed=False)
+    item = get_object_or_404(model, id=id)
     serializer = serializer_class(item)
     
-    return Response({
+    with serializer_timer():
+        data = serializer.data
+    
+    response = Response({
         'success': True,
-        'result': serializer.data,
+        'result': data,
         'message': f"{model.__name__} retrieved successfully",
     }, status=status.HTTP_200_OK)
+    response['ETag'] = item_etag(item)
+    return response
+
+def item_etag(item):
+    # The row's updated stamp, as serializers render it
+    return f'"{DateTimeField().to_representation(item.updated)}"'
+
+def if_match_failed(request, item):
+    if_match = request.headers.get('If-Match')
+    if not if_match:
+        return False
+    # Compression weakens ETags on the way out, compare without the W/ prefix
+    etags = [etag.removeprefix('W/') for etag in parse_etags(if_match)]
+    return '*' not in etags and item_etag(item) not in etags
 
-@api_view(['PATCH'])
-@permission_classes([IsAuthenticated])
 def update_item(request, id, model, serializer_class):
-    item = get_object_or_404(model, id=id, removed=False)
-    serializer = serializer_class(item, data=request.data, partial=True)
-    
-    if serializer.is_valid():
-        serializer.save()
+    if django_settings.REQUIRE_IF_MATCH and not request.headers.get('If-Match'):
         return Response({
-            'success': True,
-            'result': serializer.data,
-            'message': f"{model.__name__} updated successfully",
-        }, status=status.HTTP_200_OK)
+            'success': False,
+            'result': None,
+            'message': 'If-Match header required',
+        }, status=status.HTTP_428_PRECONDITION_REQUIRED)
     
-    return Response({
-        'success': False,
-        'result': None,
-        'message': serializer.errors,
-    }, status=status.HTTP_400_BAD_REQUEST)
+    with transaction.atomic():
+        # The row stays locked from the version check to the write
+        item = get_object_or_404(model.objects.select_for_update(), id=id)
+        
+        if if_match_failed(request, item):
+            with serializer_timer():
+                data = serializer_class(item).data
+            response = Response({
+                'success': False,
+                'result': data,
+                'message': f"{model.__name__} was modified by another request",
+            }, status=status.HTTP_412_PRECONDITION_FAILED)
+            response['ETag'] = item_etag(item)
+            return response
+        
+        serializer = serializer_class(item, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'result': None,
+                'message': serializer.errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        item = serializer.save()
+        with serializer_timer():
+            data = serializer.data
+        if serializer.changed_fields:
+            record_event(item, 'updated', data)
+    
+    response = Response({
+        'success': True,
+        'result': data,
+        'message': f"{model.__name__} updated successfully",
+    }, status=status.HTTP_200_OK)
+    response['ETag'] = item_etag(item)
+    return response
+
+def record_cascade_events(flagged, root):
+    """Record a deleted event for every row soft-deleted along with ``root``."""
+    for model, pks in flagged.items():
+        pks = [pk for pk in pks if not (model is type(root) and pk == root.pk)]
+        if not pks:
+            continue
+        serializer_class = DELETED_SERIALIZERS[model]
+        instances = list(eager_load(model.all_objects.filter(pk__in=pks), serializer_class))
+        with serializer_timer():
+            data = serializer_class(instances, many=True).data
+        record_events(instances, 'deleted', data)
 
-@api_view(['DELETE'])
-@permission_classes([IsAuthenticated])
 def delete_item(request, id, model, serializer_class):
-    item = get_object_or_404(model, id=id, removed=False)
-    
-    # Soft delete
-    item.removed = True
-    item.save()
+    item = get_object_or_404(model, id=id)
     
     serializer = serializer_class(item)
     
+    # Soft delete, with the rows that belong to the item
+    with transaction.atomic():
+        flagged = item.soft_delete()
+        with serializer_timer():
+            data = serializer.data
+        record_event(item, 'deleted', data)
+        record_cascade_events(flagged, item)
+    
     return Response({
         'success': True,
-        'result': serializer.data,
+        'result': data,
         'message': f"{model.__name__} deleted successfully",
     }, status=status.HTTP_200_OK)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
 def list_items(request, model, serializer_class, search_fields=None):
     page = int(request.query_params.get('page', 1))
     limit = int(request.query_params.get('limit', 10))
     
     # Apply filters
-    filter_options = get_filter_options(request, model)
+    try:
+        queryset, filtered = filter_queryset(request, model, ['-created'])
+    except FilterError as e:
+        return filter_error_response(e)
     
     # Apply search if search_fields provided
     if search_fields and request.query_params.get('q'):
-        queryset = search_model(request, model, search_fields)
-    else:
-        queryset = model.objects.filter(**filter_options)
+        queryset = queryset.filter(search_query(request, search_fields))
+        filtered = True
     
-    # Calculate total count
-    count = queryset.count()
+    # Calculate total count, estimated or capped on big tables
+    count, exact = pagination_count(queryset, filtered)
     
     # Apply pagination
     start = (page - 1) * limit
     end = page * limit
-    queryset = queryset.order_by('-created')[start:end]
+    queryset = queryset[start:end]
     
-    serializer = serializer_class(queryset, many=True)
+    pagination = calculate_pagination(page, limit, count, exact)
     
-    pagination = calculate_pagination(page, limit, count)
+    data = serialize_list(queryset, serializer_class)
+    if not exact:
+        # The count may be short of the real one: a full page has a successor
+        pagination['next'] = page + 1 if len(data) == limit else None
     
     return Response({
         'success': True,
-        'result': serializer.data,
+        'result': data,
         'pagination': pagination,
         'message': f"{model.__name__} list retrieved successfully",
     }, status=status.HTTP_200_OK)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
 def list_all_items(request, model, serializer_class):
-    queryset = model.objects.filter(removed=False)
-    serializer = serializer_class(queryset, many=True)
+    data = serialize_list(model.objects.all(), serializer_class)
     
     return Response({
         'success': True,
-        'result': serializer.data,
+        'result': data,
         'message': f"All {model.__name__} retrieved successfully",
     }, status=status.HTTP_200_OK)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
 def filter_items(request, model, serializer_class):
-    filter_options = get_filter_options(request, model)
-    queryset = model.objects.filter(**filter_options)
-    serializer = serializer_class(queryset, many=True)
+    try:
+        queryset, _ = filter_queryset(request, model)
+    except FilterError as e:
+        return filter_error_response(e)
+    
+    data = serialize_list(queryset, serializer_class)
     
     return Response({
         'success': True,
-        'result': serializer.data,
+        'result': data,
         'message': f"Filtered {model.__name__} retrieved successfully",
     }, status=status.HTTP_200_OK)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
 def search_items(request, model, serializer_class, search_fields):
-    queryset = search_model(request, model, search_fields)
-    serializer = serializer_class(queryset, many=True)
+    data = serialize_list(search_model(request, model, search_fields), serializer_class)
     
     return Response({
         'success': True,
-        'result': serializer.data,
+        'result': data,
         'message': f"Search results for {model.__name__}",
     }, status=status.HTTP_200_OK)
 
+def list_changes(request, model, serializer_class):
+    cursor_param = request.query_params.get('cursor')
+    since_param = request.query_params.get('since')
+    
+    try:
+        limit = parse_limit(request, 100, django_settings.SYNC_MAX_LIMIT)
+    except ValueError:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Invalid limit',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        cursor = decode_cursor(cursor_param) if cursor_param else None
+        since = parse_since(since_param) if since_param and cursor is None else None
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': str(e),
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    started = round_start(cursor)
+    # One extra row tells whether another page follows
+    data = serialize_list(changes_queryset(model, since, cursor)[:limit + 1], serializer_class)
+    more = len(data) > limit
+    data = data[:limit]
+    
+    return Response({
+        'success': True,
+        'result': data,
+        'cursor': next_cursor(data, cursor, since, started, more),
+        'more': more,
+        'message': f"{model.__name__} changes retrieved successfully",
+    }, status=status.HTTP_200_OK)
+
 # Customer views (renamed from Client)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -250,6 +404,11 @@ def filter_clients(request):
 def search_clients(request):
     return search_items(request, Customer, CustomerSerializer, ['name', 'email', 'phone'])
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def client_changes(request):
+    return list_changes(request, Customer, CustomerSerializer)
+
 # PaymentMode views
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -291,6 +450,11 @@ def filter_payment_modes(request):
 def search_payment_modes(request):
     return search_items(request, PaymentMode, PaymentModeSerializer, ['name'])
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payment_mode_changes(request):
+    return list_changes(request, PaymentMode, PaymentModeSerializer)
+
 # Product views
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -332,6 +496,11 @@ def filter_products(request):
 def search_products(request):
     return search_items(request, Product, ProductSerializer, ['name', 'reference'])
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def product_changes(request):
+    return list_changes(request, Product, ProductSerializer)
+
 # Quote views
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -375,60 +544,56 @@ def search_quotes(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def quote_changes(request):
+    return list_changes(request, Quote, QuoteSerializer)
+
+# GET as well, the shipped frontend and the Express API convert with GET
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
 def convert_quote_to_invoice(request, id):
-    quote = get_object_or_404(Quote, id=id, removed=False)
-    
-    # Create invoice from quote
-    invoice_data = {
-        'number': quote.number,
-        'year': quote.year,
-        'date': quote.date,
-        'expiry_date': quote.expiry_date,
-        'client': quote.client.id,
-        'sub_total': quote.sub_total,
-        'tax_rate': quote.tax_rate,
-        'tax_total': quote.tax_total,
-        'discount': quote.discount,
-        'total': quote.total,
-        'credit': 0,
-        'note': quote.note,
-        'status': 'draft',
-        'quote': quote.id,
-        'created_by': request.user.id,
-    }
+    get_object_or_404(Quote, id=id)
+    invoices, skipped = convert_quotes([id], request.user)
     
-    # Get quote items
-    quote_items = QuoteItem.objects.filter(quote=quote)
-    
-    # Create invoice items
-    invoice_items = []
-    for item in quote_items:
-        invoice_items.append({
-            'product': item.product.id if item.product else None,
-            'name': item.name,
-            'description': item.description,
-            'quantity': item.quantity,
-            'price': item.price,
-            'total': item.total,
-        })
-    
-    # Create invoice
-    invoice_data['items'] = invoice_items
-    serializer = InvoiceCreateSerializer(data=invoice_data)
+    if skipped:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Quote was already converted',
+        }, status=status.HTTP_409_CONFLICT)
     
-    if serializer.is_valid():
-        invoice = serializer.save()
+    return Response({
+        'success': True,
+        'result': invoices[0],
+        'message': 'Quote converted to invoice successfully',
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def convert_quotes_to_invoices(request):
+    ids = request.data.get('ids')
+    
+    try:
+        if not isinstance(ids, list) or not 0 < len(ids) <= django_settings.QUOTE_CONVERT_MAX:
+            raise ValueError
+        ids = [uuid.UUID(str(id)) for id in ids]
+    except ValueError:
         return Response({
-            'success': True,
-            'result': InvoiceSerializer(invoice).data,
-            'message': 'Quote converted to invoice successfully',
-        }, status=status.HTTP_201_CREATED)
+            'success': False,
+            'result': None,
+            'message': f'Send ids, a list of 1 to {django_settings.QUOTE_CONVERT_MAX} quote ids',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    invoices, skipped = convert_quotes(ids, request.user)
     
     return Response({
-        'success': False,
-        'result': None,
-        'message': serializer.errors,
-    }, status=status.HTTP_400_BAD_REQUEST)
+        'success': True,
+        'result': {
+            'invoices': invoices,
+            # Missing, removed or already converted
+            'skipped': [str(id) for id in skipped],
+        },
+        'message': f'{len(invoices)} quotes converted to invoices',
+    }, status=status.HTTP_201_CREATED if invoices else status.HTTP_200_OK)
 
 # Invoice views
 @api_view(['POST'])
@@ -471,6 +636,52 @@ def filter_invoices(request):
 def search_invoices(request):
     return search_items(request, Invoice, InvoiceSerializer, ['number'])
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def invoice_changes(request):
+    return list_changes(request, Invoice, InvoiceSerializer)
+
+# Recurring invoice views
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_recurring_invoice(request):
+    return create_item(request, RecurringInvoice, RecurringInvoiceSerializer, RecurringInvoiceCreateSerializer)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def read_recurring_invoice(request, id):
+    return read_item(request, id, RecurringInvoice, RecurringInvoiceSerializer)
+
+@api_view(['PATCH'])
+@permission_classes([IsAuthenticated])
+def update_recurring_invoice(request, id):
+    return update_item(request, id, RecurringInvoice, RecurringInvoiceSerializer)
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_recurring_invoice(request, id):
+    return delete_item(request, id, RecurringInvoice, RecurringInvoiceSerializer)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_recurring_invoices(request):
+    return list_items(request, RecurringInvoice, RecurringInvoiceSerializer, ['name'])
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_all_recurring_invoices(request):
+    return list_all_items(request, RecurringInvoice, RecurringInvoiceSerializer)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def filter_recurring_invoices(request):
+    return filter_items(request, RecurringInvoice, RecurringInvoiceSerializer)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_recurring_invoices(request):
+    return search_items(request, RecurringInvoice, RecurringInvoiceSerializer, ['name'])
+
 # Payment views
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -512,11 +723,56 @@ def filter_payments(request):
 def search_payments(request):
     return search_items(request, Payment, PaymentSerializer, ['number'])
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payment_changes(request):
+    return list_changes(request, Payment, PaymentSerializer)
+
 # Summary views
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def client_ledger(request, id):
+    client = get_object_or_404(Customer, id=id)
+    cursor_param = request.query_params.get('cursor')
+    
+    try:
+        limit = parse_limit(request, 100, django_settings.LEDGER_MAX_LIMIT)
+    except ValueError:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Invalid limit',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        cursor = decode_ledger_cursor(cursor_param) if cursor_param else None
+    except InvalidCursor as e:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': str(e),
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    entries, balance = ledger_page(client, limit, cursor)
+    more = len(entries) > limit
+    entries = entries[:limit]
+    
+    return Response({
+        'success': True,
+        'result': {
+            'client': {'id': str(client.id), 'name': client.name},
+            'entries': entries,
+            'balance': balance,
+        },
+        'cursor': encode_ledger_cursor(entries[-1]) if entries else cursor_param,
+        'more': more,
+        'message': 'Client ledger retrieved successfully',
+    }, status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def client_summary(request):
-    total_clients = Customer.objects.filter(removed=False).count()
+    total_clients = Customer.objects.count()
     
     return Response({
         'success': True,
@@ -534,7 +790,7 @@ def invoice_summary(request):
     month = request.query_params.get('month')
     
     # Base query
-    query = Q(removed=False)
+    query = Q()
     
     # Add year filter
     if year:
@@ -547,31 +803,114 @@ def invoice_summary(request):
     # Get invoices
     invoices = Invoice.objects.filter(query)
     
-    # Calculate totals
-    total_count = invoices.count()
-    total_amount = invoices.aggregate(Sum('total'))['total__sum'] or 0
-    paid_amount = invoices.aggregate(Sum('credit'))['credit__sum'] or 0
+    # Calculate totals and status counts in one query
+    totals = invoices.aggregate(
+        total_count=Count('id'),
+        total_amount=Sum('total'),
+        paid_amount=Sum('credit'),
+        draft_count=Count('id', filter=Q(status='draft')),
+        pending_count=Count('id', filter=Q(status='pending')),
+        paid_count=Count('id', filter=Q(status='paid')),
+        overdue_count=Count('id', filter=Q(status='overdue')),
+    )
+    total_amount = totals['total_amount'] or 0
+    paid_amount = totals['paid_amount'] or 0
     unpaid_amount = total_amount - paid_amount
     
-    # Calculate status counts
-    draft_count = invoices.filter(status='draft').count()
-    pending_count = invoices.filter(status='pending').count()
-    paid_count = invoices.filter(status='paid').count()
-    
     return Response({
         'success': True,
         'result': {
-            'total': total_count,
+            'total': totals['total_count'],
             'total_amount': total_amount,
             'paid_amount': paid_amount,
             'unpaid_amount': unpaid_amount,
-            'draft_count': draft_count,
-            'pending_count': pending_count,
-            'paid_count': paid_count,
+            'draft_count': totals['draft_count'],
+            'pending_count': totals['pending_count'],
+            'paid_count': totals['paid_count'],
+            'overdue_count': totals['overdue_count'],
         },
         'message': 'Invoice summary retrieved successfully',
     }, status=status.HTTP_200_OK)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def invoice_reminders(request, id):
+    invoice = get_object_or_404(Invoice, id=id)
+    reminders = invoice.reminders.select_related('message').order_by('level')
+    
+    return Response({
+        'success': True,
+        'result': InvoiceReminderSerializer(reminders, many=True).data,
+        'message': 'Invoice reminders retrieved successfully',
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def invoice_aging(request):
+    as_of = request.query_params.get('date')
+    client = request.query_params.get('client')
+    
+    try:
+        as_of = datetime.date.fromisoformat(as_of) if as_of else timezone.localdate()
+        client = uuid.UUID(client) if client else None
+    except ValueError:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Invalid date or client',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'result': aging_report(as_of, client),
+        'message': 'Aging report retrieved successfully',
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def revenue_timeseries(request):
+    interval = request.query_params.get('interval', 'month')
+    split = request.query_params.get('split') or None
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+    
+    try:
+        end = datetime.date.fromisoformat(end) if end else timezone.localdate()
+        # Default to the last twelve months
+        start = datetime.date.fromisoformat(start) if start else (end - datetime.timedelta(days=365)).replace(day=1)
+    except ValueError:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Invalid start or end date',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if interval not in REVENUE_INTERVALS or (split is not None and split not in REVENUE_SPLITS) or start > end:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': f"Expected interval in ({', '.join(REVENUE_INTERVALS)}), split in ({', '.join(REVENUE_SPLITS)}) and start <= end",
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_periods = django_settings.REVENUE_MAX_PERIODS
+    if len(list(islice(revenue_periods(start, end, interval), max_periods + 1))) > max_periods:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': f'At most {django_settings.REVENUE_MAX_PERIODS} periods per request',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'result': {
+            'interval': interval,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'periods': revenue_series(start, end, interval, split),
+        },
+        'message': 'Revenue retrieved successfully',
+    }, status=status.HTTP_200_OK)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def quote_summary(request):
@@ -580,7 +919,7 @@ def quote_summary(request):
     month = request.query_params.get('month')
     
     # Base query
-    query = Q(removed=False)
+    query = Q()
     
     # Add year filter
     if year:
@@ -593,23 +932,23 @@ def quote_summary(request):
     # Get quotes
     quotes = Quote.objects.filter(query)
     
-    # Calculate totals
-    total_count = quotes.count()
-    total_amount = quotes.aggregate(Sum('total'))['total__sum'] or 0
-    
-    # Calculate status counts
-    draft_count = quotes.filter(status='draft').count()
-    pending_count = quotes.filter(status='pending').count()
-    sent_count = quotes.filter(status='sent').count()
+    # Calculate totals and status counts in one query
+    totals = quotes.aggregate(
+        total_count=Count('id'),
+        total_amount=Sum('total'),
+        draft_count=Count('id', filter=Q(status='draft')),
+        pending_count=Count('id', filter=Q(status='pending')),
+        sent_count=Count('id', filter=Q(status='sent')),
+    )
     
     return Response({
         'success': True,
         'result': {
-            'total': total_count,
-            'total_amount': total_amount,
-            'draft_count': draft_count,
-            'pending_count': pending_count,
-            'sent_count': sent_count,
+            'total': totals['total_count'],
+            'total_amount': totals['total_amount'] or 0,
+            'draft_count': totals['draft_count'],
+            'pending_count': totals['pending_count'],
+            'sent_count': totals['sent_count'],
         },
         'message': 'Quote summary retrieved successfully',
     }, status=status.HTTP_200_OK)
@@ -622,7 +961,7 @@ def payment_summary(request):
     month = request.query_params.get('month')
     
     # Base query
-    query = Q(removed=False)
+    query = Q()
     
     # Add year filter
     if year:
@@ -635,15 +974,14 @@ def payment_summary(request):
     # Get payments
     payments = Payment.objects.filter(query)
     
-    # Calculate totals
-    total_count = payments.count()
-    total_amount = payments.aggregate(Sum('amount'))['amount__sum'] or 0
+    # Calculate totals in one query
+    totals = payments.aggregate(total_count=Count('id'), total_amount=Sum('amount'))
     
     return Response({
         'success': True,
         'result': {
-            'total': total_count,
-            'total_amount': total_amount,
+            'total': totals['total_count'],
+            'total_amount': totals['total_amount'] or 0,
         },
         'message': 'Payment summary retrieved successfully',
     }, status=status.HTTP_200_OK)
@@ -706,13 +1044,31 @@ def settings(request, key=None):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mail_invoice(request):
-    # In a real application, this would send an email with the invoice
-    # For now, we'll just return a success response
+    try:
+        invoice_id = uuid.UUID(str(request.data.get('id')))
+    except ValueError:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Send id, the id of the invoice',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    invoice = get_object_or_404(Invoice.objects.select_related('client'), id=invoice_id)
+    
+    if not invoice.client.email:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'The client has no email address',
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Sent by "manage.py send_queued_mail"
+    queue_invoice_mails([invoice])
     
     return Response({
         'success': True,
         'result': None,
-        'message': 'Invoice email sent successfully',
+        'message': 'Invoice email queued successfully',
     }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
@@ -738,3 +1094,104 @@ def mail_payment(request):
         'result': None,
         'message': 'Payment receipt email sent successfully',
     }, status=status.HTTP_200_OK)
+
+# Import views
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_import(request):
+    entity = request.data.get('entity')
+    upload = request.FILES.get('file')
+    
+    if entity not in IMPORTERS or upload is None:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': f"Send a file and an entity ({', '.join(IMPORTERS)})",
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        file_format(upload.name)
+    except ImportFileError as e:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': str(e),
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE arrive as temporary files and
+    # are copied to storage in chunks; the import worker streams them from there
+    job = ImportJob(entity=entity, filename=upload.name, created_by=request.user)
+    job.file.save(upload.name, upload, save=False)
+    job.save()
+    
+    return Response({
+        'success': True,
+        'result': ImportJobSerializer(job).data,
+        'message': 'Import queued successfully',
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def read_import(request, id):
+    job = get_object_or_404(ImportJob, id=id)
+    
+    return Response({
+        'success': True,
+        'result': ImportJobSerializer(job).data,
+        'message': 'Import retrieved successfully',
+    }, status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def resume_import(request, id):
+    job = get_object_or_404(ImportJob, id=id)
+    
+    if job.status != 'failed':
+        return Response({
+            'success': False,
+            'result': ImportJobSerializer(job).data,
+            'message': 'Only failed imports can be resumed',
+        }, status=status.HTTP_409_CONFLICT)
+    
+    job.status = 'pending'
+    job.save(update_fields=['status', 'updated'])
+    
+    return Response({
+        'success': True,
+        'result': ImportJobSerializer(job).data,
+        'message': 'Import queued successfully',
+    }, status=status.HTTP_202_ACCEPTED)
+
+# Profiling views
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def list_profiles(request):
+    # Traces are only returned by profile_detail, keep the list light
+    profiles = [
+        {key: value for key, value in entry.items() if key != 'profile'}
+        for entry in reversed(list_stored_profiles())
+    ]
+    
+    return Response({
+        'success': True,
+        'result': profiles,
+        'message': 'Request profiles retrieved successfully',
+    }, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def profile_detail(request, id):
+    profile = get_profile(id)
+    
+    if profile is None:
+        return Response({
+            'success': False,
+            'result': None,
+            'message': 'Profile not found',
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': True,
+        'result': profile,
+        'message': 'Request profile retrieved successfully',
+    }, status=status.HTTP_200_OK)
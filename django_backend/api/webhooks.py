@@ -0,0 +1,200 @@
+"""
+Webhook delivery of outbox events.
+
+Event ids are taken before their transaction commits, so events can become
+visible out of id order. A dispatch pass first numbers the committed events
+that have no ``sequence`` yet, one pass at a time, so the sequence follows
+the order in which events became visible and never goes back.
+
+Every endpoint keeps a position in that sequence. An endpoint is claimed
+for a lease (its ``next_attempt``) in a short transaction; the next batch
+of matching events after its position is then posted as one signed
+request, outside any transaction, and the position is advanced when the
+endpoint answers 2xx, so events reach each endpoint in order. Delivery is
+at least once: a worker that dies after posting leaves the batch to be
+posted again when the lease ends. A failed batch is retried with
+exponential backoff and blocks the endpoint, keeping the order intact;
+after WEBHOOK_MAX_ATTEMPTS failures the endpoint is disabled until it is
+re-enabled with ``manage.py webhook enable``.
+
+Requests carry ``X-Webhook-Timestamp`` and ``X-Webhook-Signature:
+sha256=<hex>``, the HMAC-SHA256 of ``"<timestamp>.<body>"`` with the
+endpoint secret.
+"""
+
+import datetime
+import fnmatch
+import hashlib
+import hmac
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Counter, OutboxEvent, WebhookEndpoint
+
+logger = logging.getLogger(__name__)
+
+# Counter holding the last sequence number, locked while events are numbered
+SEQUENCE_COUNTER = 'outbox_sequence'
+SEQUENCE_BATCH_SIZE = 1000
+
+
+class DeliveryError(Exception):
+    pass
+
+
+def sign(secret, timestamp, body):
+    message = f'{timestamp}.'.encode() + body
+    return 'sha256=' + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+def matches(endpoint, topic):
+    return not endpoint.topics or any(fnmatch.fnmatchcase(topic, pattern) for pattern in endpoint.topics)
+
+def serialize_event(event):
+    return {
+        'id': event.id,
+        'topic': event.topic,
+        'entity_id': event.entity_id,
+        'created': event.created,
+        'data': event.payload,
+    }
+
+def deliver(endpoint, events):
+    body = json.dumps({'events': [serialize_event(event) for event in events]}, cls=DjangoJSONEncoder).encode()
+    timestamp = str(int(time.time()))
+    request = urllib.request.Request(endpoint.url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'User-Agent': 'idurar-webhooks',
+        'X-Webhook-Timestamp': timestamp,
+        'X-Webhook-Signature': sign(endpoint.secret, timestamp, body),
+    })
+
+    try:
+        with urllib.request.urlopen(request, timeout=settings.WEBHOOK_TIMEOUT) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        raise DeliveryError(f'HTTP {e.code}')
+    except (urllib.error.URLError, OSError) as e:
+        raise DeliveryError(str(getattr(e, 'reason', e)))
+
+    if not 200 <= status < 300:
+        raise DeliveryError(f'HTTP {status}')
+
+def retry_delay(attempts):
+    return min(settings.WEBHOOK_RETRY_BASE * 2 ** (attempts - 1), settings.WEBHOOK_RETRY_MAX)
+
+def lease_seconds():
+    # Long enough for a delivery to time out
+    return settings.WEBHOOK_TIMEOUT * 6
+
+def sequence_events():
+    """Number the next committed events without a sequence; returns how many."""
+    with transaction.atomic():
+        # One numbering pass at a time, later passes see its numbers
+        counter, _ = Counter.objects.select_for_update().get_or_create(key=SEQUENCE_COUNTER)
+        ids = list(OutboxEvent.objects.filter(sequence__isnull=True).order_by('id')
+                   .values_list('id', flat=True)[:SEQUENCE_BATCH_SIZE])
+        if not ids:
+            return 0
+        OutboxEvent.objects.bulk_update(
+            [OutboxEvent(id=id, sequence=counter.value + n) for n, id in enumerate(ids, start=1)], ['sequence'])
+        counter.value += len(ids)
+        counter.save(update_fields=['value', 'updated'])
+    return len(ids)
+
+def pending_events(position, limit):
+    return list(OutboxEvent.objects.filter(sequence__gt=position).order_by('sequence')[:limit])
+
+def claim_endpoint(endpoint_id):
+    """Lease the endpoint if it is due and no other worker holds it; returns it or None."""
+    now = timezone.now()
+    with transaction.atomic():
+        endpoint = (WebhookEndpoint.objects.select_for_update(skip_locked=True)
+                    .filter(id=endpoint_id, enabled=True)
+                    .filter(Q(next_attempt__isnull=True) | Q(next_attempt__lte=now))
+                    .first())
+        if endpoint is None:
+            return None
+        endpoint.next_attempt = now + datetime.timedelta(seconds=lease_seconds())
+        endpoint.save(update_fields=['next_attempt', 'updated'])
+    return endpoint
+
+def dispatch_endpoint(endpoint):
+    """
+    Deliver the next batch of ``endpoint``, claimed with ``claim_endpoint()``;
+    returns the number of events sent. The endpoint is only written if its
+    position is unchanged, so a worker whose lease ran out cannot move it back.
+    """
+    position = endpoint.position
+    unchanged = WebhookEndpoint.objects.filter(id=endpoint.id, position=position)
+    events = pending_events(position, settings.WEBHOOK_BATCH_SIZE)
+    if not events:
+        unchanged.update(next_attempt=None)
+        return 0
+
+    batch = [event for event in events if matches(endpoint, event.topic)]
+    if batch:
+        try:
+            deliver(endpoint, batch)
+        except DeliveryError as e:
+            endpoint.attempts += 1
+            endpoint.last_error = str(e)
+            if endpoint.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                endpoint.enabled = False
+                endpoint.next_attempt = None
+                logger.error('Disabled webhook %s after %d failed attempts: %s', endpoint.url, endpoint.attempts, e)
+            else:
+                endpoint.next_attempt = timezone.now() + datetime.timedelta(seconds=retry_delay(endpoint.attempts))
+                logger.warning('Webhook %s failed (attempt %d): %s', endpoint.url, endpoint.attempts, e)
+            unchanged.update(attempts=endpoint.attempts, last_error=endpoint.last_error, enabled=endpoint.enabled,
+                             next_attempt=endpoint.next_attempt, updated=timezone.now())
+            return 0
+
+    endpoint.position = events[-1].sequence
+    unchanged.update(position=endpoint.position, attempts=0, next_attempt=None, last_error='', updated=timezone.now())
+    return len(batch)
+
+def dispatch_pending(max_batches=100):
+    """
+    Number the new events, then run batches for every due endpoint until
+    they are caught up (or ``max_batches`` per endpoint); returns the number
+    of events sent.
+    """
+    while sequence_events():
+        pass
+
+    sent = 0
+    now = timezone.now()
+    due = WebhookEndpoint.objects.filter(enabled=True).filter(Q(next_attempt__isnull=True) | Q(next_attempt__lte=now))
+
+    for endpoint_id in due.values_list('id', flat=True):
+        for _ in range(max_batches):
+            # Concurrent workers skip endpoints another worker holds
+            endpoint = claim_endpoint(endpoint_id)
+            if endpoint is None:
+                break
+            position = endpoint.position
+            sent += dispatch_endpoint(endpoint)
+            if endpoint.position == position:
+                break
+    return sent
+
+def start_position():
+    """Outbox position of a new endpoint: only events from now on."""
+    while sequence_events():
+        pass
+    return Counter.objects.filter(key=SEQUENCE_COUNTER).values_list('value', flat=True).first() or 0
+
+def prune_events():
+    """Delete events older than OUTBOX_RETENTION_DAYS."""
+    cutoff = timezone.now() - datetime.timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxEvent.objects.filter(created__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,42 @@
+"""
+Tenant iteration of the worker commands.
+
+``for_each_tenant()`` calls a function in every tenant schema, or once when
+multi-tenancy is off (SQLite mode). With ``workers`` > 1 the tenants are
+processed in parallel threads; each thread has its own database connection
+and schema, and closes its connections when its tenant is done.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+
+def _run_in_tenant(tenant, function):
+    from django_tenants.utils import tenant_context
+
+    try:
+        with tenant_context(tenant):
+            return function()
+    except Exception:
+        # One failing tenant must not stop the others
+        logger.exception('Worker failed in schema %s', tenant.schema_name)
+        return None
+    finally:
+        connections.close_all()
+
+def for_each_tenant(function, workers=1):
+    """The results of ``function()`` in every tenant; tenants that failed are left out."""
+    if not hasattr(connection, 'set_tenant'):
+        # SQLite mode, no tenant schemas
+        return [function()]
+
+    from django_tenants.utils import get_public_schema_name, get_tenant_model
+
+    tenants = list(get_tenant_model().objects.exclude(schema_name=get_public_schema_name()))
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results = executor.map(lambda tenant: _run_in_tenant(tenant, function), tenants)
+        return [result for result in results if result is not None]
@@ -27,7 +27,7 @@ if not Admin.objects.filter(email='admin@example.com').exists():
     admin.save()
     
     # Create admin password record
-    AdminPassword.objects.create(user=admin, logged_sessions=[])
+    AdminPassword.objects.create(user=admin)
     
     print(f"Superuser created with email: admin@example.com and password: {password}")
 else:
@@ -0,0 +1,14 @@
+"""
+Database connection helpers referenced from settings.
+"""
+
+
+def reset_search_path(connection):
+    """
+    psycopg pool ``reset`` callback: connections go back to the pool with the
+    search_path of the last tenant they served, so restore the server default
+    before another request checks them out.
+    """
+    connection.execute('RESET search_path')
+    if not connection.autocommit:
+        connection.commit()
@@ -14,6 +14,8 @@ from pathlib import Path
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
+from django.core.exceptions import ImproperlyConfigured
 
 # Load environment variables from .env file
 load_dotenv()
@@ -79,6 +81,10 @@ TENANT_DOMAIN_MODEL = "tenant.Domain"  # app.Model
 
 MIDDLEWARE = [
     'django_tenants.middleware.main.TenantMainMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
+    'api.middleware.NPlusOneMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -87,6 +93,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.IdempotencyMiddleware',
 ]
 
 ROOT_URLCONF = 'idurar.urls'
@@ -127,9 +134,31 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'postgres'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Keep connections open between requests (seconds, 0 closes them
+        # after every request) and check them before reuse
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {},
     }
 }
 
+# psycopg connection pool (requires psycopg[pool] instead of psycopg2); the
+# pool replaces persistent connections
+if os.getenv('DB_POOL', 'False') == 'True':
+    from idurar.db import reset_search_path
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'reset': reset_search_path,
+    }
+
+# Set the tenant search_path once per connection checkout (and again after
+# every tenant switch) rather than on every cursor
+TENANT_LIMIT_SET_CALLS = os.getenv('TENANT_LIMIT_SET_CALLS', 'True') == 'True'
+
 # For SQLite fallback during development
 if os.getenv('USE_SQLITE', 'False') == 'True':
     DATABASES = {
@@ -157,6 +186,28 @@ if os.getenv('USE_SQLITE', 'False') == 'True':
     ]
     ROOT_URLCONF = 'idurar.urls_sqlite'
 
+# Read replicas (api.routers.ReplicaRouter): comma separated standby hosts
+# (host or host:port), or database files with USE_SQLITE. Reads of GET
+# requests go to a replica lagging at most REPLICA_MAX_LAG seconds; clients
+# read from the primary for REPLICA_PIN_SECONDS after they write
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    replica_settings = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if os.getenv('USE_SQLITE', 'False') == 'True':
+        replica_settings['NAME'] = replica
+    else:
+        host, _, port = replica.partition(':')
+        replica_settings['HOST'] = host
+        replica_settings['PORT'] = port or replica_settings['PORT']
+        replica_settings['OPTIONS'] = dict(replica_settings['OPTIONS'])
+    DATABASES[f'replica{index}'] = replica_settings
+
+REPLICA_DATABASES = [alias for alias in DATABASES if alias != 'default']
+if REPLICA_DATABASES:
+    DATABASE_ROUTERS = ['api.routers.ReplicaRouter', *DATABASE_ROUTERS]
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', '5'))
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -212,16 +263,31 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Password hashing (api.backends.BcryptBackend)
+# bcrypt hashes below BCRYPT_ROUNDS are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.SessionJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # api.renderers.ORJSONRenderer renders the same JSON as DRF's
+    # JSONRenderer, faster; set API_JSON_RENDERER to switch back
+    'DEFAULT_RENDERER_CLASSES': (
+        os.getenv('API_JSON_RENDERER', 'api.renderers.ORJSONRenderer'),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('LOGIN_IP_THROTTLE_RATE', '30/min'),
+        'login_email': os.getenv('LOGIN_EMAIL_THROTTLE_RATE', '5/min'),
+    },
 }
 
 # JWT settings
@@ -243,6 +309,8 @@ SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
 
+    'TOKEN_REFRESH_SERIALIZER': 'api.authentication.SessionTokenRefreshSerializer',
+
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
 
@@ -253,9 +321,169 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=7),
 }
 
+# Mirror the JWT session store (api.sessions) in the cache so that checking
+# a token for revocation does not hit the database on every request. On by
+# default only with a shared cache (REDIS_URL): with per-process caches a
+# logout would only reach the worker that handled it
+JWT_SESSION_CACHE = os.getenv('JWT_SESSION_CACHE', str(bool(os.getenv('REDIS_URL')))) == 'True'
+
+# Seconds the authenticated Admin's id, flags and name (never the password
+# hash) are cached for, 0 disables the cache; saving or deleting the admin
+# drops the entry, which only reaches every worker with a shared cache, so
+# it is off by default without REDIS_URL
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60' if os.getenv('REDIS_URL') else '0'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Share the cache between workers with Redis (requires the redis package)
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+# The read-your-writes pin of ReplicaRoutingMiddleware is kept in the cache
+# and must be seen by every worker; the SQLite mode runs a single one
+if REPLICA_DATABASES and not os.getenv('REDIS_URL') and os.getenv('USE_SQLITE', 'False') != 'True':
+    raise ImproperlyConfigured('DB_REPLICAS requires a shared cache, set REDIS_URL')
+
+# Keep cache keys of different tenant schemas apart
+if os.getenv('USE_SQLITE', 'False') != 'True':
+    CACHES['default']['KEY_FUNCTION'] = 'django_tenants.cache.make_key'
+    CACHES['default']['REVERSE_KEY_FUNCTION'] = 'django_tenants.cache.reverse_key'
+
+# Request metrics and profiling (api.middleware.RequestMetricsMiddleware)
+# Metrics are served in the Prometheus format on /metrics once METRICS_TOKEN
+# is set, to clients sending "Authorization: Bearer <token>"
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Fraction of requests run under cProfile; traces of those slower than
+# PROFILE_THRESHOLD_MS are kept (last PROFILE_BUFFER_SIZE) for staff at
+# /api/profile/list
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_THRESHOLD_MS = float(os.getenv('PROFILE_THRESHOLD_MS', '500'))
+PROFILE_BUFFER_SIZE = int(os.getenv('PROFILE_BUFFER_SIZE', '50'))
+
+# N+1 query detection (api.middleware.NPlusOneMiddleware): report SELECTs of
+# the same shape run more than NPLUSONE_THRESHOLD times in one request.
+# Logged by default; the test runner turns reports into test failures
+NPLUSONE_ENABLED = os.getenv('NPLUSONE_ENABLED', str(DEBUG)) == 'True'
+NPLUSONE_RAISE = os.getenv('NPLUSONE_RAISE', 'False') == 'True'
+NPLUSONE_THRESHOLD = int(os.getenv('NPLUSONE_THRESHOLD', '3'))
+
+TEST_RUNNER = 'api.test_runner.NPlusOneTestRunner'
+
+# Build list responses from values() rows for serializers that support it
+# (api.read_serializers); the output is the same as the ModelSerializer's
+VALUES_SERIALIZERS = os.getenv('VALUES_SERIALIZERS', 'True') == 'True'
+
+# Incremental sync endpoints (api.sync): largest page, and the trailing
+# window every sync reads again for rows committed by longer transactions
+# (longer than the longest transaction: imports, batch jobs)
+SYNC_MAX_LIMIT = int(os.getenv('SYNC_MAX_LIMIT', '1000'))
+SYNC_OVERLAP_SECONDS = float(os.getenv('SYNC_OVERLAP_SECONDS', '300'))
+
+# Change events (api.outbox) and their webhook delivery (api.webhooks,
+# "manage.py dispatch_webhooks --loop")
+OUTBOX_ENABLED = os.getenv('OUTBOX_ENABLED', 'True') == 'True'
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', '100'))
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '10'))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '10'))
+WEBHOOK_RETRY_BASE = float(os.getenv('WEBHOOK_RETRY_BASE', '5'))
+WEBHOOK_RETRY_MAX = float(os.getenv('WEBHOOK_RETRY_MAX', '3600'))
+
+# CSV/XLSX imports (api.imports, "manage.py run_imports --loop"): rows per
+# validated and inserted chunk, errors kept per job, and how long a running
+# job may go without progress before another worker takes it over
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', '100'))
+IMPORT_STALE_SECONDS = int(os.getenv('IMPORT_STALE_SECONDS', '600'))
+
+# Seconds an accounts-receivable aging report is cached (0 = off); invoice,
+# payment and client writes drop the cached reports of their tenant
+AR_AGING_CACHE_TIMEOUT = int(os.getenv('AR_AGING_CACHE_TIMEOUT', '300'))
+
+# Largest page of a client ledger (/api/client/ledger/<id>)
+LEDGER_MAX_LIMIT = int(os.getenv('LEDGER_MAX_LIMIT', '500'))
+
+# Most periods (days, weeks or months) one /api/revenue/timeseries call returns
+REVENUE_MAX_PERIODS = int(os.getenv('REVENUE_MAX_PERIODS', '1000'))
+
+# Pagination totals of list endpoints (api.counts): 'exact', or 'auto' for
+# the planner's estimate on unfiltered lists of more than
+# PAGINATION_ESTIMATE_THRESHOLD rows and counts capped at PAGINATION_COUNT_CAP
+# on filtered ones. Exact counts are cached until the next write
+PAGINATION_COUNT = os.getenv('PAGINATION_COUNT', 'auto')
+PAGINATION_ESTIMATE_THRESHOLD = int(os.getenv('PAGINATION_ESTIMATE_THRESHOLD', '10000'))
+PAGINATION_COUNT_CAP = int(os.getenv('PAGINATION_COUNT_CAP', '10000'))
+PAGINATION_COUNT_CACHE_TIMEOUT = int(os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', '60'))
+
+# Idempotency-Key support for POST requests (api.middleware.IdempotencyMiddleware);
+# stored responses are replayed for IDEMPOTENCY_KEY_TTL seconds, prune older
+# keys with "manage.py prune_idempotency_keys"
+IDEMPOTENCY_ENABLED = os.getenv('IDEMPOTENCY_ENABLED', 'True') == 'True'
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+
+# Optimistic locking of PATCH .../update/<id>: reads and updates return an
+# ETag, and a stale If-Match is answered with 412. Set to require If-Match
+REQUIRE_IF_MATCH = os.getenv('REQUIRE_IF_MATCH', 'False') == 'True'
+
+# Most quotes one POST /api/quote/convert call converts
+QUOTE_CONVERT_MAX = int(os.getenv('QUOTE_CONVERT_MAX', '500'))
+
+# Recurring invoices (api.recurring, "manage.py run_recurring_invoices --loop"):
+# templates invoiced per transaction
+RECURRING_BATCH_SIZE = int(os.getenv('RECURRING_BATCH_SIZE', '100'))
+
+# Outgoing email (api.mailer, "manage.py send_queued_mail --loop"): messages
+# per SMTP connection, messages per minute and tenant (0 = no limit), and
+# retries with exponential backoff
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = float(os.getenv('EMAIL_TIMEOUT', '30'))
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+MAIL_BATCH_SIZE = int(os.getenv('MAIL_BATCH_SIZE', '50'))
+MAIL_RATE_LIMIT = int(os.getenv('MAIL_RATE_LIMIT', '60'))
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', '5'))
+MAIL_RETRY_BASE = float(os.getenv('MAIL_RETRY_BASE', '60'))
+MAIL_RETRY_MAX = float(os.getenv('MAIL_RETRY_MAX', '3600'))
+
+# Overdue invoices and reminders (api.dunning, "manage.py run_dunning --loop"):
+# invoices per transaction, and the days past due at which reminders are sent
+DUNNING_BATCH_SIZE = int(os.getenv('DUNNING_BATCH_SIZE', '500'))
+DUNNING_REMINDER_DAYS = sorted(int(days) for days in os.getenv('DUNNING_REMINDER_DAYS', '1,7,14,30').split(',') if days.strip())
+
+# Archival of removed rows (api.archive, "manage.py archive_removed"): days
+# a row stays removed before it is archived, "<days>" for every model and
+# "<model>=<days>" for one (e.g. "365,invoice=730"; 0 = never), and rows per
+# transaction
+ARCHIVE_RETENTION_DAYS = os.getenv('ARCHIVE_RETENTION_DAYS', '365')
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+
+# Compress API responses (api.middleware.CompressionMiddleware) with brotli
+# when the client accepts it and the brotli package is installed, gzip
+# otherwise. Leave off when a reverse proxy already compresses
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', 'False') == 'True'
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'if-match')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'ETag']
 
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
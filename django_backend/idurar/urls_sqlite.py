@@ -8,8 +8,11 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/refresh-token/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/', include('api.urls')),
     path('api/', include('api.urls')),